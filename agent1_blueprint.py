@@ -4,20 +4,26 @@ Matches Canvas Quiz Questions by Number
 """
 
 from flask import Blueprint, Flask, render_template_string, request, jsonify, session, redirect, url_for
-from anthropic import Anthropic
 from functools import wraps
-import os
 import json
 from datetime import datetime
 import secrets
 import random
+import logging
+import hint_bank
+import hint_cache
+import fallback_hints
+from single_flight import one_chat_at_a_time
+from streaming import wants_stream, sse_response
+from prompt_builder import clip_student_message
+from subnet_calc import TOOL_PROMPT, subnet_tools
+import problem_generator
+import answer_check
 
 agent1_bp = Blueprint("agent1", __name__)
+log = logging.getLogger(__name__)
 
 
-# Initialize Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-
 # Subnetting Matrix Reference
 SUBNETTING_MATRIX = {
     "binary_values": [128, 64, 32, 16, 8, 4, 2, 1],
@@ -151,7 +157,7 @@ ATTEMPT PROGRESSION:
 4. Fourth: Detailed step-by-step with matrix
 5. Fifth: Complete answer with full explanation
 
-Be encouraging, use humor, reference the Powers of 2 Matrix, and celebrate learning from mistakes!"""
+Be encouraging, use humor, reference the Powers of 2 Matrix, and celebrate learning from mistakes!""" + "\n\n" + TOOL_PROMPT
 
 HTML_TEMPLATE = """<!DOCTYPE html>
 <html>
@@ -301,6 +307,8 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 
         document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('question-select-btn').addEventListener('click', selectQuestionNumber);
+            document.getElementById('practice-btn').addEventListener('click', practiceQuestion);
+            document.getElementById('drill-set-btn').addEventListener('click', showDrillSet);
             document.getElementById('reset-btn').addEventListener('click', resetSession);
             document.getElementById('submit-btn').addEventListener('click', sendMessage);
             document.getElementById('user-input').addEventListener('keypress', function(e) {
@@ -308,25 +316,71 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             });
         });
 
-        function selectQuestionNumber() {
-            var quizType = document.getElementById('quiz-type').value;
+        function readQuestionNumber() {
             var questionNum = parseInt(document.getElementById('question-num').value);
             
             if (isNaN(questionNum) || questionNum < 1 || questionNum > 10) {
                 alert('Please enter a number between 1 and 10');
-                return;
+                return null;
             }
+            return questionNum;
+        }
+
+        function selectQuestionNumber() {
+            var questionNum = readQuestionNumber();
+            if (questionNum !== null) loadQuestion('get_question_by_number', questionNum);
+        }
+
+        // Set number typed by the student, or null for a new drill set
+        function readSetNumber() {
+            var value = document.getElementById('practice-set').value.trim();
+            return value === '' ? null : parseInt(value);
+        }
+
+        // Generated question from a drill set; the set number makes it reproducible
+        function practiceQuestion() {
+            var questionNum = readQuestionNumber();
+            if (questionNum !== null) loadQuestion('new_question', questionNum, readSetNumber());
+        }
+
+        // Every question of a drill set at once, to work through in order
+        function showDrillSet() {
+            var quizType = document.getElementById('quiz-type').value;
+            
+            fetch('drill_set', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({quiz_type: quizType, seed: readSetNumber()})
+            })
+            .then(function(r) { return r.json(); })
+            .then(function(data) {
+                if (data.error) {
+                    alert('Error: ' + data.error);
+                    return;
+                }
+                document.getElementById('practice-set').value = data.seed;
+                addMessage('bot', data.message);
+            })
+            .catch(function(err) { alert('Error: ' + err.message); });
+        }
+
+        function loadQuestion(url, questionNum, seed) {
+            var quizType = document.getElementById('quiz-type').value;
             
-            fetch('get_question_by_number', {
+            fetch(url, {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({quiz_type: quizType, question_number: questionNum})
+                body: JSON.stringify({quiz_type: quizType, question_number: questionNum, seed: seed})
             })
             .then(function(r) { return r.json(); })
             .then(function(data) {
                 currentQuestion = data.question;
                 currentAttempt = 0;
                 conversationHistory = [];
+                // Keep the set so the next practice question comes from it too
+                if (currentQuestion && currentQuestion.seed !== undefined) {
+                    document.getElementById('practice-set').value = currentQuestion.seed;
+                }
                 document.getElementById('chat-container').innerHTML = '';
                 document.getElementById('user-input').value = '';
                 updateAttemptIndicator();
@@ -359,21 +413,36 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 body: JSON.stringify({
                     message: message,
                     question: currentQuestion,
-                    attempt: currentAttempt
+                    attempt: currentAttempt,
+                    stream: true
                 })
             })
-            .then(function(r) { return r.json(); })
-            .then(function(data) {
-                currentAttempt = data.attempt;
-                addMessage('bot', data.response);
-                updateAttemptIndicator();
-                
-                if (data.is_correct || currentAttempt >= 5) {
-                    document.getElementById('submit-btn').textContent = 'New Question';
-                    setTimeout(function() {
-                        document.getElementById('submit-btn').textContent = 'Submit';
-                    }, 3000);
+            .then(function(r) {
+                var contentType = r.headers.get('Content-Type') || '';
+                if (contentType.indexOf('text/event-stream') === -1) {
+                    return r.json().then(function(data) {
+                        addMessage('bot', data.response);
+                        // busy: another message from this student is still being answered
+                        if (!data.busy) finishChat(data);
+                    });
                 }
+                
+                // Render the hint token by token as it streams in
+                var botDiv = null;
+                var text = '';
+                return readEventStream(r, function(event, data) {
+                    if (event === 'meta') {
+                        botDiv = startMessage('bot');
+                    } else if (event === 'delta') {
+                        document.getElementById('loading').style.display = 'none';
+                        text += data.text;
+                        renderMessage(botDiv, text);
+                    } else if (event === 'done' || event === 'error') {
+                        renderMessage(botDiv, data.response);
+                        conversationHistory.push({role: 'bot', content: data.response});
+                        finishChat(data);
+                    }
+                });
             })
             .catch(function(err) {
                 addMessage('bot', 'Error! Try again.');
@@ -386,14 +455,62 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             });
         }
 
-        function addMessage(sender, text) {
+        function finishChat(data) {
+            currentAttempt = data.attempt;
+            updateAttemptIndicator();
+            
+            if (data.is_correct || currentAttempt >= 5) {
+                document.getElementById('submit-btn').textContent = 'New Question';
+                setTimeout(function() {
+                    document.getElementById('submit-btn').textContent = 'Submit';
+                }, 3000);
+            }
+        }
+
+        function readEventStream(response, onEvent) {
+            var reader = response.body.getReader();
+            var decoder = new TextDecoder();
+            var buffer = '';
+            function pump() {
+                return reader.read().then(function(result) {
+                    if (result.done) return;
+                    buffer += decoder.decode(result.value, {stream: true});
+                    var events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    events.forEach(function(block) {
+                        var eventName = 'message';
+                        var dataLines = [];
+                        block.split('\\n').forEach(function(line) {
+                            if (line.indexOf('event: ') === 0) eventName = line.slice(7);
+                            else if (line.indexOf('data: ') === 0) dataLines.push(line.slice(6));
+                        });
+                        if (dataLines.length) onEvent(eventName, JSON.parse(dataLines.join('\\n')));
+                    });
+                    return pump();
+                });
+            }
+            return pump();
+        }
+
+        function startMessage(sender) {
             var chatContainer = document.getElementById('chat-container');
             var messageDiv = document.createElement('div');
             messageDiv.className = 'message ' + sender + '-message';
-            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.appendChild(messageDiv);
+            return messageDiv;
+        }
+
+        function renderMessage(messageDiv, text) {
+            var chatContainer = document.getElementById('chat-container');
+            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.scrollTop = chatContainer.scrollHeight;
+        }
+
+        function addMessage(sender, text) {
+            var messageDiv = startMessage(sender);
+            renderMessage(messageDiv, text);
             conversationHistory.push({role: sender, content: text});
+            return messageDiv;
         }
 
         function updateAttemptIndicator() {
@@ -456,6 +573,10 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             <label for="question-num" style="margin-left: 20px;">Question Number (1-10):</label>
             <input type="text" id="question-num" value="1" maxlength="2" style="width: 60px; padding: 10px; border-radius: 8px; border: 2px solid #667eea; text-align: center;">
             <button id="question-select-btn">Load Question</button>
+            <label for="practice-set" style="margin-left: 20px;">Set:</label>
+            <input type="text" id="practice-set" placeholder="new" maxlength="9" style="width: 110px; padding: 10px; border-radius: 8px; border: 2px solid #667eea; text-align: center;">
+            <button id="practice-btn">🎲 Practice Question</button>
+            <button id="drill-set-btn">📋 Drill Set</button>
             <button id="reset-btn">Reset</button>
         </div>
         
@@ -481,11 +602,11 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </body>
 </html>"""
 
-def get_random_question(quiz_type):
-    questions = QUIZ_BANK.get(quiz_type, [])
-    if questions:
-        return random.choice(questions)
-    return None
+def get_practice_question(quiz_type, seed, question_number):
+    """Generated question from a seeded drill set (the Canvas bank stays fixed)"""
+    if quiz_type not in problem_generator.QUIZ_GENERATORS or not 1 <= question_number <= 10:
+        return None
+    return problem_generator.agent1_question(quiz_type, seed, question_number)
 
 def get_question_by_number(quiz_type, question_number):
     questions = QUIZ_BANK.get(quiz_type, [])
@@ -495,9 +616,7 @@ def get_question_by_number(quiz_type, question_number):
     return None
 
 def check_answer(user_answer, correct_answer):
-    user_clean = user_answer.strip().upper().replace(" ", "").replace(".", "")
-    correct_clean = correct_answer.strip().upper().replace(" ", "").replace(".", "")
-    return user_clean == correct_clean
+    return answer_check.matches(user_answer, correct_answer)
 
 def get_hint_level_prompt(attempt, question, correct_answer):
     if attempt == 1:
@@ -522,17 +641,19 @@ def new_question():
     try:
         data = request.json
         quiz_type = data.get('quiz_type', 'binary_to_decimal')
+        seed = problem_generator.requested_seed(data.get('seed'))
+        question_number = int(data.get('question_number', 1))
         
-        print("[DEBUG] New question:", quiz_type)
+        log.debug("Practice question %s of set %s for %s", question_number, seed, quiz_type)
         
-        question_data = get_random_question(quiz_type)
+        question_data = get_practice_question(quiz_type, seed, question_number)
         if not question_data:
             return jsonify({'error': 'No questions available'}), 400
         
         session['current_question'] = question_data
         session['attempt_count'] = 0
         
-        msg = "Here is your question:\n\n"
+        msg = "Here is your practice question (set " + str(seed) + "):\n\n"
         msg += question_data['question']
         msg += "\n\nUse the Powers of 2 Matrix: 128 | 64 | 32 | 16 | 8 | 4 | 2 | 1"
         
@@ -542,7 +663,26 @@ def new_question():
         
         return jsonify({'question': question_data, 'message': msg})
     except Exception as e:
-        print("[ERROR]", str(e))
+        log.exception("Could not load question")
+        return jsonify({'error': str(e)}), 500
+
+@agent1_bp.route('/drill_set', methods=['POST'])
+def drill_set():
+    """All ten questions of a drill set (without answers), built in one call"""
+    try:
+        data = request.json
+        quiz_type = data.get('quiz_type', 'binary_to_decimal')
+        if quiz_type not in problem_generator.QUIZ_GENERATORS:
+            return jsonify({'error': 'No questions available'}), 400
+        seed = problem_generator.requested_seed(data.get('seed'))
+        
+        questions = problem_generator.agent1_batch(quiz_type, seed)
+        msg = "Drill set " + str(seed) + " - pick a number and click Practice Question to answer it:\n\n"
+        msg += "\n".join(q['question'] for q in questions)
+        
+        return jsonify({'seed': seed, 'message': msg})
+    except Exception as e:
+        log.exception("Could not build drill set")
         return jsonify({'error': str(e)}), 500
 
 @agent1_bp.route('/get_question_by_number', methods=['POST'])
@@ -552,7 +692,7 @@ def get_question_by_number_route():
         quiz_type = data.get('quiz_type', 'binary_to_decimal')
         question_number = data.get('question_number', 1)
         
-        print("[DEBUG] Question", question_number, "for", quiz_type)
+        log.debug("Question %s for %s", question_number, quiz_type)
         
         question_data = get_question_by_number(quiz_type, question_number)
         if not question_data:
@@ -571,13 +711,14 @@ def get_question_by_number_route():
         
         return jsonify({'question': question_data, 'message': msg})
     except Exception as e:
-        print("[ERROR]", str(e))
+        log.exception("Could not load question")
         return jsonify({'error': str(e)}), 500
 
 @agent1_bp.route('/chat', methods=['POST'])
+@one_chat_at_a_time
 def chat():
     data = request.json
-    user_message = data.get('message', '')
+    user_message = clip_student_message(data.get('message', ''))
     question_data = data.get('question')
     current_attempt = data.get('attempt', 0)
     
@@ -604,6 +745,15 @@ def chat():
             'attempt': current_attempt
         })
     
+    # Pregenerated hints cover the common wrong-answer path without an API call
+    bank_hint = hint_bank.lookup('agent1', question_data['question'], current_attempt)
+    if bank_hint is not None:
+        return jsonify({
+            'response': bank_hint,
+            'is_correct': False,
+            'attempt': current_attempt
+        })
+    
     hint_prompt = get_hint_level_prompt(current_attempt, question_data['question'], correct_answer)
     
     messages = [{
@@ -611,16 +761,33 @@ def chat():
         "content": "Question: " + question_data['question'] + "\nCorrect Answer: " + correct_answer + "\nStudent Answer: " + user_message + "\nAttempt: " + str(current_attempt) + " of 5\n\n" + hint_prompt
     }]
     
+    # Same question, hint level and answer always produce the same prompt
+    cache_key = hint_cache.make_key('agent1', question_data['question'] + '|' + correct_answer, current_attempt, user_message)
+    
+    # Served instead of an error when Claude is down or the breaker is open
+    fallback = fallback_hints.agent1_hint(question_data['question'], correct_answer, current_attempt)
+    
+    if wants_stream(data):
+        return sse_response(
+            {'is_correct': False, 'attempt': current_attempt},
+            fallback_hints.stream_with_fallback(
+                hint_cache.stream(cache_key, system=SYSTEM_PROMPT, messages=messages, max_tokens=1024, agent='agent1',
+                                  level=min(current_attempt, 5), tools=subnet_tools),
+                fallback),
+            on_error=lambda e: fallback
+        )
+    
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=1024,
+        bot_response = hint_cache.complete(
+            cache_key,
             system=SYSTEM_PROMPT,
-            messages=messages
+            messages=messages,
+            max_tokens=1024,
+            agent='agent1',
+            level=min(current_attempt, 5),
+            tools=subnet_tools
         )
         
-        bot_response = response.content[0].text
-        
         return jsonify({
             'response': bot_response,
             'is_correct': False,
@@ -628,8 +795,9 @@ def chat():
         })
         
     except Exception as e:
+        log.warning("LLM unavailable, serving fallback hint: %s", e)
         return jsonify({
-            'response': "Sorry, error: " + str(e),
+            'response': fallback,
             'is_correct': False,
             'attempt': current_attempt
         })
@@ -5,132 +5,43 @@ Helps students work through 6 custom subnet mask problems with 10 parts each
 
 from flask import Blueprint, Flask, render_template_string, request, jsonify, session, redirect, url_for
 from functools import wraps
-from anthropic import Anthropic
-import os
 import secrets
+import logging
+import hint_bank
+import hint_cache
+import fallback_hints
+from single_flight import one_chat_at_a_time
+from streaming import wants_stream, sse_response
+from structured_logging import log_payload
+from prompt_builder import clip_student_message
+from subnet_calc import TOOL_PROMPT, subnet_tools
+import problem_generator
+import answer_check
 
 agent2_bp = Blueprint("agent2", __name__)
+log = logging.getLogger(__name__)
 
 
-# Initialize Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-
 # Powers of 2 Matrix Reference
 POWERS_OF_2 = {
     "binary_values": [128, 64, 32, 16, 8, 4, 2, 1],
     "powers": [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072]
 }
 
-# The 6 Custom Subnet Mask Problems
+# The 6 Custom Subnet Mask Problems: (network address, subnets needed, hosts needed).
+# The ten answers of each are computed by problem_generator / subnet_calc.
+PROBLEM_REQUIREMENTS = {
+    1: ("222.25.12.0", 15, 14),
+    2: ("222.125.52.0", 4, 58),
+    3: ("132.112.0.0", 120, 500),
+    4: ("168.254.0.0", 1000, 60),
+    5: ("111.0.0.0", 1000, 16000),
+    6: ("10.0.0.0", 120, 131000)
+}
+
 PROBLEMS = {
-    1: {
-        "name": "Problem 1",
-        "subnets_needed": 15,
-        "hosts_needed": 14,
-        "network_address": "222.25.12.0",
-        "answers": {
-            "part1": "C",
-            "part2": "255.255.255.0",
-            "part3": "4",
-            "part4": "4",
-            "part5": "16",
-            "part6": "16",
-            "part7": "14",
-            "part8": "255.255.255.240",
-            "part9": "28",
-            "part10": "N.N.N.sssshhhh"
-        }
-    },
-    2: {
-        "name": "Problem 2",
-        "subnets_needed": 4,
-        "hosts_needed": 58,
-        "network_address": "222.125.52.0",
-        "answers": {
-            "part1": "C",
-            "part2": "255.255.255.0",
-            "part3": "2",
-            "part4": "6",
-            "part5": "4",
-            "part6": "64",
-            "part7": "62",
-            "part8": "255.255.255.192",
-            "part9": "26",
-            "part10": "N.N.N.sshhhhhh"
-        }
-    },
-    3: {
-        "name": "Problem 3",
-        "subnets_needed": 120,
-        "hosts_needed": 500,
-        "network_address": "132.112.0.0",
-        "answers": {
-            "part1": "B",
-            "part2": "255.255.0.0",
-            "part3": "7",
-            "part4": "9",
-            "part5": "128",
-            "part6": "512",
-            "part7": "510",
-            "part8": "255.255.254.0",
-            "part9": "23",
-            "part10": "N.N.sssssssh.H"
-        }
-    },
-    4: {
-        "name": "Problem 4",
-        "subnets_needed": 1000,
-        "hosts_needed": 60,
-        "network_address": "168.254.0.0",
-        "answers": {
-            "part1": "B",
-            "part2": "255.255.0.0",
-            "part3": "10",
-            "part4": "6",
-            "part5": "1024",
-            "part6": "64",
-            "part7": "62",
-            "part8": "255.255.255.192",
-            "part9": "26",
-            "part10": "N.N.ssssssss.sshhhhhh"
-        }
-    },
-    5: {
-        "name": "Problem 5",
-        "subnets_needed": 1000,
-        "hosts_needed": 16000,
-        "network_address": "111.0.0.0",
-        "answers": {
-            "part1": "A",
-            "part2": "255.0.0.0",
-            "part3": "10",
-            "part4": "14",
-            "part5": "1024",
-            "part6": "16384",
-            "part7": "16382",
-            "part8": "255.255.192.0",
-            "part9": "18",
-            "part10": "N.ssssssss.sshhhhhh.H"
-        }
-    },
-    6: {
-        "name": "Problem 6",
-        "subnets_needed": 120,
-        "hosts_needed": 131000,
-        "network_address": "10.0.0.0",
-        "answers": {
-            "part1": "A",
-            "part2": "255.0.0.0",
-            "part3": "7",
-            "part4": "17",
-            "part5": "128",
-            "part6": "131072",
-            "part7": "131070",
-            "part8": "255.254.0.0",
-            "part9": "15",
-            "part10": "N.sssssssh.H.H"
-        }
-    }
+    number: problem_generator.agent2_problem(f"Problem {number}", network, subnets, hosts)
+    for number, (network, subnets, hosts) in PROBLEM_REQUIREMENTS.items()
 }
 
 PART_DESCRIPTIONS = {
@@ -219,7 +130,7 @@ IMPORTANT TEACHING PHRASES:
 - "Look at the matrix - what row gives you both what you need?"
 - "Okay, all right, you got this!"
 
-Be encouraging! Use Professor Bodden's casual, supportive tone. Celebrate learning from mistakes, and always guide students back to the matrix."""
+Be encouraging! Use Professor Bodden's casual, supportive tone. Celebrate learning from mistakes, and always guide students back to the matrix.""" + "\n\n" + TOOL_PROMPT
 
 # HTML Template with improved UI
 HTML_TEMPLATE = """<!DOCTYPE html>
@@ -390,13 +301,14 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         </div>
         
         <div class="problem-selector">
-            <h3>📚 Select a Problem (6 Total)</h3>
+            <h3>📚 Select a Problem (6 Total) or Generate a Practice Problem</h3>
             <button class="problem-btn" data-problem="1">Problem 1</button>
             <button class="problem-btn" data-problem="2">Problem 2</button>
             <button class="problem-btn" data-problem="3">Problem 3</button>
             <button class="problem-btn" data-problem="4">Problem 4</button>
             <button class="problem-btn" data-problem="5">Problem 5</button>
             <button class="problem-btn" data-problem="6">Problem 6</button>
+            <button class="problem-btn" id="practice-btn">🎲 Practice Problem</button>
             <button class="problem-btn" id="reset-btn" style="margin-left: auto; background: #dc3545;">Reset All</button>
         </div>
         
@@ -447,6 +359,10 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 });
             });
             
+            document.getElementById('practice-btn').addEventListener('click', function() {
+                loadProblem('practice');
+            });
+            
             // Reset button listener
             document.getElementById('reset-btn').addEventListener('click', resetSession);
             
@@ -467,14 +383,17 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             })
             .then(r => r.json())
             .then(data => {
-                currentProblem = problemNum;
+                // Practice problems come back with their own p<seed> id
+                currentProblem = data.problem_number;
                 currentPart = null;
                 currentAttempt = 0;
                 completedParts.clear();
                 
                 // Update UI
-                document.querySelectorAll('.problem-btn[data-problem]').forEach(btn => btn.classList.remove('active'));
-                document.querySelector(`[data-problem="${problemNum}"]`).classList.add('active');
+                document.querySelectorAll('.problem-btn').forEach(btn => btn.classList.remove('active'));
+                const activeBtn = problemNum === 'practice' ?
+                    document.getElementById('practice-btn') : document.querySelector(`[data-problem="${problemNum}"]`);
+                activeBtn.classList.add('active');
                 
                 document.getElementById('problem-info').style.display = 'block';
                 document.getElementById('problem-name').textContent = data.problem.name;
@@ -572,36 +491,35 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                     problem_number: currentProblem,
                     part: currentPart,
                     answer: message,
-                    attempt: currentAttempt
+                    attempt: currentAttempt,
+                    stream: true
                 })
             })
-            .then(r => r.json())
-            .then(data => {
-                console.log('Response data:', data);
-                console.log('Current part:', currentPart);
-                console.log('Is correct:', data.is_correct);
-                console.log('Address class:', data.address_class);
-                
-                currentAttempt = data.attempt;
-                addMessage('bot', data.response);
-                
-                if (data.is_correct) {
-                    completedParts.add(currentPart);
-                    renderParts();
-                    
-                    // Matrix popup feature disabled - routes don't exist yet
-                    // To enable: create /matrix/A, /matrix/B, /matrix/C routes with PDF/image resources
-                    /*
-                    if (currentPart === 'part2' && data.address_class) {
-                        console.log('Opening matrix for class:', data.address_class);
-                        const matrixUrl = '/matrix/' + data.address_class;
-                        console.log('Matrix URL:', matrixUrl);
-                        window.open(matrixUrl, '_blank');
-                    }
-                    */
+            .then(r => {
+                const contentType = r.headers.get('Content-Type') || '';
+                if (!contentType.includes('text/event-stream')) {
+                    return r.json().then(data => {
+                        addMessage('bot', data.response);
+                        // busy: another message from this student is still being answered
+                        if (!data.busy) finishChat(data);
+                    });
                 }
                 
-                updateAttemptIndicator();
+                // Render the hint token by token as it streams in
+                let botDiv = null;
+                let text = '';
+                return readEventStream(r, (event, data) => {
+                    if (event === 'meta') {
+                        botDiv = startMessage('bot');
+                    } else if (event === 'delta') {
+                        document.getElementById('loading').style.display = 'none';
+                        text += data.text;
+                        renderMessage(botDiv, text);
+                    } else if (event === 'done' || event === 'error') {
+                        renderMessage(botDiv, data.response);
+                        finishChat(data);
+                    }
+                });
             })
             .catch(error => {
                 console.error('Error:', error);
@@ -615,15 +533,76 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             });
         }
 
-        function addMessage(sender, text) {
+        function finishChat(data) {
+            console.log('Response data:', data);
+            console.log('Current part:', currentPart);
+            console.log('Is correct:', data.is_correct);
+            console.log('Address class:', data.address_class);
+            
+            currentAttempt = data.attempt;
+            
+            if (data.is_correct) {
+                completedParts.add(currentPart);
+                renderParts();
+                
+                // Matrix popup feature disabled - routes don't exist yet
+                // To enable: create /matrix/A, /matrix/B, /matrix/C routes with PDF/image resources
+                /*
+                if (currentPart === 'part2' && data.address_class) {
+                    console.log('Opening matrix for class:', data.address_class);
+                    const matrixUrl = '/matrix/' + data.address_class;
+                    console.log('Matrix URL:', matrixUrl);
+                    window.open(matrixUrl, '_blank');
+                }
+                */
+            }
+            
+            updateAttemptIndicator();
+        }
+
+        function readEventStream(response, onEvent) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            const pump = () => reader.read().then(result => {
+                if (result.done) return;
+                buffer += decoder.decode(result.value, {stream: true});
+                const events = buffer.split('\\n\\n');
+                buffer = events.pop();
+                events.forEach(block => {
+                    let eventName = 'message';
+                    const dataLines = [];
+                    block.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) dataLines.push(line.slice(6));
+                    });
+                    if (dataLines.length) onEvent(eventName, JSON.parse(dataLines.join('\\n')));
+                });
+                return pump();
+            });
+            return pump();
+        }
+
+        function startMessage(sender) {
             const chatContainer = document.getElementById('chat-container');
             const messageDiv = document.createElement('div');
             messageDiv.className = 'message ' + sender + '-message';
-            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.appendChild(messageDiv);
+            return messageDiv;
+        }
+
+        function renderMessage(messageDiv, text) {
+            const chatContainer = document.getElementById('chat-container');
+            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.scrollTop = chatContainer.scrollHeight;
         }
 
+        function addMessage(sender, text) {
+            const messageDiv = startMessage(sender);
+            renderMessage(messageDiv, text);
+            return messageDiv;
+        }
+
         function updateAttemptIndicator() {
             const indicator = document.getElementById('attempt-indicator');
             if (!currentPart) {
@@ -651,13 +630,9 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </body>
 </html>"""
 
-def normalize_answer(answer):
-    """Normalize answers for comparison"""
-    return str(answer).strip().upper().replace(" ", "").replace(".", "")
-
 def check_answer(user_answer, correct_answer):
-    """Check if student answer matches correct answer"""
-    return normalize_answer(user_answer) == normalize_answer(correct_answer)
+    """Check if student answer matches correct answer (by value, see answer_check)"""
+    return answer_check.matches(user_answer, correct_answer)
 
 def get_hint_prompt(attempt, part, problem_data):
     """Generate progressive hints based on attempt number"""
@@ -687,6 +662,13 @@ Problem Context:
     else:
         return context + f"\nGive the complete answer '{correct}' with full explanation. Show all work using the Powers of 2 Matrix and formulas. Be very encouraging about their effort!"
 
+def get_problem(problem_num):
+    """One of the 6 problems by number, or a practice problem by its p<seed> id"""
+    if problem_num in PROBLEMS:
+        return PROBLEMS[problem_num]
+    seed = problem_generator.practice_seed(problem_num)
+    return problem_generator.agent2_practice(seed) if seed is not None else None
+
 @agent2_bp.route('/')
 def home():
     return render_template_string(HTML_TEMPLATE)
@@ -696,10 +678,17 @@ def load_problem():
     data = request.json
     problem_num = data.get('problem_number')
     
-    if problem_num not in PROBLEMS:
+    # A new practice problem gets a fresh seed unless the client asks for one
+    if problem_num == 'practice':
+        try:
+            problem_num = problem_generator.practice_id(problem_generator.requested_seed(data.get('seed')))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid problem number'}), 400
+    
+    problem = get_problem(problem_num)
+    if problem is None:
         return jsonify({'error': 'Invalid problem number'}), 400
     
-    problem = PROBLEMS[problem_num]
     session['current_problem'] = problem_num
     session['completed_parts'] = []
     
@@ -711,7 +700,7 @@ This problem has 10 parts. Click on any part to begin working on it!<br><br>
 <em>Tip: Start by identifying the address class and default subnet mask, then use the matrix!</em><br>
 Remember: <strong>NEVER forget the minus 2</strong> for host calculations! 🎯"""
     
-    return jsonify({'problem': problem, 'message': message})
+    return jsonify({'problem': problem, 'problem_number': problem_num, 'message': message})
 
 @agent2_bp.route('/select_part', methods=['POST'])
 def select_part():
@@ -722,7 +711,9 @@ def select_part():
     if not problem_num or not part:
         return jsonify({'error': 'Missing data'}), 400
     
-    problem = PROBLEMS[problem_num]
+    problem = get_problem(problem_num)
+    if problem is None or part not in problem['answers']:
+        return jsonify({'error': 'Invalid problem or part'}), 400
     part_desc = PART_DESCRIPTIONS.get(part, "Unknown part")
     
     session['current_part'] = part
@@ -735,17 +726,20 @@ What is your answer?<br><br>
     return jsonify({'message': message})
 
 @agent2_bp.route('/chat', methods=['POST'])
+@one_chat_at_a_time
 def chat():
     data = request.json
     problem_num = data.get('problem_number')
     part = data.get('part')
-    user_answer = data.get('answer', '')
+    user_answer = clip_student_message(data.get('answer', ''))
     current_attempt = data.get('attempt', 0)
     
     if not problem_num or not part:
         return jsonify({'error': 'No active problem/part'}), 400
     
-    problem = PROBLEMS[problem_num]
+    problem = get_problem(problem_num)
+    if problem is None or part not in problem['answers']:
+        return jsonify({'error': 'Invalid problem or part'}), 400
     correct_answer = problem['answers'][part]
     current_attempt += 1
     
@@ -765,7 +759,7 @@ def chat():
         if part == 'part2':
             address_class = problem['answers']['part1']  # A, B, or C
             response_text += f"<br><br>📊 <strong>Opening the Class {address_class} Subnetting Matrix in a new tab...</strong><br>You can switch between tabs to reference the matrix while working!"
-            print(f"[DEBUG] Part 2 correct! Opening matrix for Class {address_class}")
+            log.debug("Part 2 correct, opening matrix for Class %s", address_class)
         
         response_data = {
             'response': response_text,
@@ -776,9 +770,18 @@ def chat():
         if address_class:
             response_data['address_class'] = address_class
         
-        print(f"[DEBUG] Returning response: {response_data}")
+        log_payload(log, "Returning response", response_data)
         return jsonify(response_data)
     
+    # Pregenerated hints cover the common wrong-answer path without an API call
+    bank_hint = hint_bank.lookup('agent2', f"{problem_num}:{part}", current_attempt)
+    if bank_hint is not None:
+        return jsonify({
+            'response': bank_hint,
+            'is_correct': False,
+            'attempt': current_attempt
+        })
+    
     # Generate hint using Claude
     hint_prompt = get_hint_prompt(current_attempt, part, problem)
     
@@ -787,16 +790,33 @@ def chat():
         "content": f"Student's answer: {user_answer}\nAttempt: {current_attempt} of 5\n\n{hint_prompt}"
     }]
     
+    # Same part, hint level and answer always produce the same prompt
+    cache_key = hint_cache.make_key('agent2', f"{problem_num}:{part}", current_attempt, user_answer)
+    
+    # Served instead of an error when Claude is down or the breaker is open
+    fallback = fallback_hints.subnet_part_hint(problem, part, current_attempt)
+    
+    if wants_stream(data):
+        return sse_response(
+            {'is_correct': False, 'attempt': current_attempt},
+            fallback_hints.stream_with_fallback(
+                hint_cache.stream(cache_key, system=SYSTEM_PROMPT, messages=messages, max_tokens=1500, agent='agent2',
+                                  level=min(current_attempt, 5), tools=subnet_tools),
+                fallback),
+            on_error=lambda e: fallback
+        )
+    
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=1500,
+        bot_response = hint_cache.complete(
+            cache_key,
             system=SYSTEM_PROMPT,
-            messages=messages
+            messages=messages,
+            max_tokens=1500,
+            agent='agent2',
+            level=min(current_attempt, 5),
+            tools=subnet_tools
         )
         
-        bot_response = response.content[0].text
-        
         return jsonify({
             'response': bot_response,
             'is_correct': False,
@@ -804,8 +824,9 @@ def chat():
         })
         
     except Exception as e:
+        log.warning("LLM unavailable, serving fallback hint: %s", e)
         return jsonify({
-            'response': f"Sorry, I encountered an error: {str(e)}",
+            'response': fallback,
             'is_correct': False,
             'attempt': current_attempt
         })
@@ -5,173 +5,39 @@ Subnet Range Tutor Agent - Mentoring students through subnet range calculations
 
 from flask import Blueprint, Flask, render_template_string, request, jsonify, session, redirect, url_for
 from functools import wraps
-from anthropic import Anthropic
-import os
 import secrets
+import logging
+import hint_bank
+from conversation import ConversationMemory
+from session_store import persist_session
+import llm_gateway
+import fallback_hints
+from single_flight import one_chat_at_a_time
+from streaming import wants_stream, sse_response
+from structured_logging import log_payload
+from prompt_builder import clip_student_message, level_guidance
+from subnet_calc import TOOL_PROMPT, subnet_tools
+import problem_generator
+import answer_check
 
 agent3_bp = Blueprint("agent3", __name__)
+log = logging.getLogger(__name__)
 
-# Initialize Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# The 6 Subnet Range Problems: (network address, subnets needed, hosts needed,
+# subnets asked about in parts 9-12). Questions and all 12 answers are
+# computed by problem_generator / subnet_calc.
+PROBLEM_REQUIREMENTS = {
+    1: ("210.220.3.0", 3, 57, (1, 2, 3, 4)),
+    2: ("196.23.45.0", 28, 6, (5, 2, 9, 11)),
+    3: ("172.33.0.0", 900, 60, (4, 9, 11, 14)),
+    4: ("188.16.0.0", 16, 4000, (3, 7, 10, 13)),
+    5: ("112.0.0.0", 130000, 126, (7, 4, 11, 13)),
+    6: ("10.0.0.0", 30, 500000, (6, 3, 10, 14))
+}
 
-# The 6 Subnet Range Problems with all 12 parts
 PROBLEMS = {
-    1: {
-        "name": "Problem 1",
-        "subnets_needed": 3,
-        "hosts_needed": 57,
-        "network_address": "210.220.3.0",
-        "questions": {
-            "q9": "What is the 1st subnet range?",
-            "q10": "What is the subnet ID/Number for the 2nd subnet?",
-            "q11": "What is the broadcast address for the 3rd subnet?",
-            "q12": "What is the assignable addresses for the 4th subnet?"
-        },
-        "answers": {
-            "part1": "C",
-            "part2": "255.255.255.0",
-            "part3": "2",
-            "part4": "6",
-            "part5": "4",
-            "part6": "64",
-            "part7": "62",
-            "part8": "255.255.255.192",
-            "part9": "210.220.3.0 to 210.220.3.63",
-            "part10": "210.220.3.64",
-            "part11": "210.220.3.191",
-            "part12": "210.220.3.193 to 210.220.3.254"
-        }
-    },
-    2: {
-        "name": "Problem 2",
-        "subnets_needed": 28,
-        "hosts_needed": 6,
-        "network_address": "196.23.45.0",
-        "questions": {
-            "q9": "What is the 5th subnet range?",
-            "q10": "What is the subnet ID/Number for the 2nd subnet?",
-            "q11": "What is the broadcast address for the 9th subnet?",
-            "q12": "What is the assignable addresses for the 11th subnet?"
-        },
-        "answers": {
-            "part1": "C",
-            "part2": "255.255.255.0",
-            "part3": "5",
-            "part4": "3",
-            "part5": "32",
-            "part6": "8",
-            "part7": "6",
-            "part8": "255.255.255.248",
-            "part9": "196.23.45.32 to 196.23.45.39",
-            "part10": "196.23.45.8",
-            "part11": "196.23.45.71",
-            "part12": "196.23.45.81 to 196.23.45.86"
-        }
-    },
-    3: {
-        "name": "Problem 3",
-        "subnets_needed": 900,
-        "hosts_needed": 60,
-        "network_address": "172.33.0.0",
-        "questions": {
-            "q9": "What is the 4th subnet range?",
-            "q10": "What is the subnet ID/Number for the 9th subnet?",
-            "q11": "What is the broadcast address for the 11th subnet?",
-            "q12": "What is the assignable addresses for the 14th subnet?"
-        },
-        "answers": {
-            "part1": "B",
-            "part2": "255.255.0.0",
-            "part3": "10",
-            "part4": "6",
-            "part5": "1024",
-            "part6": "64",
-            "part7": "62",
-            "part8": "255.255.255.192",
-            "part9": "172.33.0.192 to 172.33.0.255",
-            "part10": "172.33.2.0",
-            "part11": "172.33.2.191",
-            "part12": "172.33.3.65 to 172.33.3.126"
-        }
-    },
-    4: {
-        "name": "Problem 4",
-        "subnets_needed": 16,
-        "hosts_needed": 4000,
-        "network_address": "188.16.0.0",
-        "questions": {
-            "q9": "What is the 3rd subnet range?",
-            "q10": "What is the subnet ID/Number for the 7th subnet?",
-            "q11": "What is the broadcast address for the 10th subnet?",
-            "q12": "What is the assignable addresses for the 13th subnet?"
-        },
-        "answers": {
-            "part1": "B",
-            "part2": "255.255.0.0",
-            "part3": "4",
-            "part4": "12",
-            "part5": "16",
-            "part6": "4096",
-            "part7": "4094",
-            "part8": "255.255.240.0",
-            "part9": "188.16.32.0 to 188.16.47.255",
-            "part10": "188.16.96.0",
-            "part11": "188.16.159.255",
-            "part12": "188.16.192.1 to 188.16.207.254"
-        }
-    },
-    5: {
-        "name": "Problem 5",
-        "subnets_needed": 130000,
-        "hosts_needed": 126,
-        "network_address": "112.0.0.0",
-        "questions": {
-            "q9": "What is the 7th subnet range?",
-            "q10": "What is the subnet ID/Number for the 4th subnet?",
-            "q11": "What is the broadcast address for the 11th subnet?",
-            "q12": "What is the assignable addresses for the 13th subnet?"
-        },
-        "answers": {
-            "part1": "A",
-            "part2": "255.0.0.0",
-            "part3": "17",
-            "part4": "7",
-            "part5": "131072",
-            "part6": "128",
-            "part7": "126",
-            "part8": "255.255.255.128",
-            "part9": "112.0.3.0 to 112.0.3.127",
-            "part10": "112.0.1.128",
-            "part11": "112.0.5.127",
-            "part12": "112.0.6.1 to 112.0.6.126"
-        }
-    },
-    6: {
-        "name": "Problem 6",
-        "subnets_needed": 30,
-        "hosts_needed": 500000,
-        "network_address": "10.0.0.0",
-        "questions": {
-            "q9": "What is the 6th subnet range?",
-            "q10": "What is the subnet ID/Number for the 3rd subnet?",
-            "q11": "What is the broadcast address for the 10th subnet?",
-            "q12": "What is the assignable addresses for the 14th subnet?"
-        },
-        "answers": {
-            "part1": "A",
-            "part2": "255.0.0.0",
-            "part3": "5",
-            "part4": "19",
-            "part5": "32",
-            "part6": "524288",
-            "part7": "524286",
-            "part8": "255.248.0.0",
-            "part9": "10.40.0.0 to 10.47.255.255",
-            "part10": "10.16.0.0",
-            "part11": "10.79.255.255",
-            "part12": "10.104.0.1 to 10.111.255.254"
-        }
-    }
+    number: problem_generator.agent3_problem(f"Problem {number}", network, subnets, hosts, subnet_numbers)
+    for number, (network, subnets, hosts, subnet_numbers) in PROBLEM_REQUIREMENTS.items()
 }
 
 PART_DESCRIPTIONS = {
@@ -253,30 +119,89 @@ FORMULA REMINDERS:
 - Usable Addresses: 2^h - 2 (minus 2 for network and broadcast)
 - Block Size: 256 - (value in the subnet mask octet that's changing)
 
-Be enthusiastic, patient, and remember: the goal is understanding, not just correct answers!"""
+Be enthusiastic, patient, and remember: the goal is understanding, not just correct answers!""" + "\n\n" + TOOL_PROMPT
+
+def get_part_question(problem_data, part):
+    """Question text for a part (parts 9-12 vary by problem)"""
+    if part in ['part9', 'part10', 'part11', 'part12']:
+        return problem_data['questions'].get(part.replace('part', 'q'), '')
+    return PART_DESCRIPTIONS.get(part, '')
 
-def call_claude(messages):
-    """Call Claude API with conversation history"""
+def problem_context(problem_data):
+    """Facts about the problem that stay the same for every turn"""
+    return f"""CURRENT PROBLEM: {problem_data['name']}
+Subnets Needed: {problem_data['subnets_needed']}
+Hosts Needed: {problem_data['hosts_needed']}
+Network Address: {problem_data['network_address']}"""
+
+def get_level_prompt(problem_data, part, level):
+    """Standalone prompt asking for one mentoring level on one part"""
+    return f"""
+{problem_context(problem_data)}
+
+CURRENT PART: {part.upper().replace('PART', 'Part ')} - {get_part_question(problem_data, part)}
+CORRECT ANSWER (for your reference): {problem_data['answers'][part]}
+
+The student has given an INCORRECT answer {level} time(s) for this part.
+Provide Level {level} mentoring.
+"""
+
+def call_claude(messages, fallback, context=None, level=None):
+    """Call Claude API with conversation history; returns fallback if it fails"""
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=2000,
+        return llm_gateway.complete(
             system=SYSTEM_PROMPT,
-            messages=messages
+            messages=messages,
+            max_tokens=2000,
+            agent='agent3',
+            context=context,
+            level=level,
+            tools=subnet_tools
         )
-        return response.content[0].text
     except Exception as e:
-        return f"Error calling Claude API: {str(e)}"
+        log.warning("LLM unavailable, serving fallback hint: %s", e)
+        return fallback
+
+def fallback_reply(problem_data, part, level, is_correct):
+    """Local reply used when Claude is unavailable"""
+    if is_correct:
+        return fallback_hints.correct_reply(problem_data['answers'][part]) + ' Say "next" when you\'re ready for the next part.'
+    if part in ['part9', 'part10', 'part11', 'part12']:
+        return fallback_hints.subnet_range_hint(problem_data, part, get_part_question(problem_data, part), level)
+    return fallback_hints.subnet_part_hint(problem_data, part, level)
+
+def get_problem(problem_id):
+    """One of the 6 problems by number, or a practice problem by its p<seed> id"""
+    if problem_id in PROBLEMS:
+        return PROBLEMS[problem_id]
+    seed = problem_generator.practice_seed(problem_id)
+    return problem_generator.agent3_practice(seed) if seed is not None else None
+
+def conversation_memory():
+    """Bounded per-part conversation memory kept in the session"""
+    session.modified = True
+    return ConversationMemory(session.setdefault('memory', {}))
 
 @agent3_bp.route('/')
 def home():
     """Main page - problem selection"""
     return render_template_string(INDEX_TEMPLATE)
 
+@agent3_bp.route('/practice')
+def practice():
+    """Start a freshly generated practice problem"""
+    return redirect(url_for('agent3.practice_problem', seed=problem_generator.new_seed()))
+
+@agent3_bp.route('/problem/p<int:seed>')
+def practice_problem(seed):
+    """A generated practice problem; the seed in the URL rebuilds it"""
+    return problem(problem_generator.practice_id(seed))
+
 @agent3_bp.route('/problem/<int:problem_id>')
 def problem(problem_id):
     """Individual problem page with chat interface"""
-    if problem_id not in PROBLEMS:
+    problem_data = get_problem(problem_id)
+    if problem_data is None:
         return "Problem not found", 404
     
     # Initialize session for this problem
@@ -284,47 +209,36 @@ def problem(problem_id):
     session['problem_id'] = problem_id
     session['current_part'] = 'part1'
     session['attempts'] = {}
-    session['conversation'] = []
+    session['memory'] = {}
     session.modified = True
     
-    print(f"Session initialized for problem {problem_id}")
-    print(f"Session data: {dict(session)}")
+    log.debug("Session initialized for problem %s", problem_id)
     
-    problem_data = PROBLEMS[problem_id]
     return render_template_string(PROBLEM_TEMPLATE, 
                                  problem=problem_data, 
                                  problem_id=problem_id)
 
 @agent3_bp.route('/chat', methods=['POST'])
+@one_chat_at_a_time
 def chat():
     """Handle chat messages"""
-    print("=" * 50)
-    print("CHAT ENDPOINT CALLED")
-    print("=" * 50)
-    
     try:
         data = request.json
-        print(f"Request data: {data}")
+        log_payload(log, "Chat request", data)
         
-        user_message = data.get('message', '').strip()
-        print(f"User message: {user_message}")
+        user_message = clip_student_message(data.get('message', '').strip())
         
         if not user_message:
-            print("Empty message received")
             return jsonify({'error': 'Empty message'}), 400
         
         problem_id = session.get('problem_id')
-        print(f"Problem ID from session: {problem_id}")
-        
         current_part = session.get('current_part', 'part1')
-        print(f"Current part: {current_part}")
         
-        if problem_id not in PROBLEMS:
-            print(f"Invalid problem ID: {problem_id}")
+        problem_data = get_problem(problem_id)
+        if problem_data is None:
+            log.warning("Chat without a valid problem in the session: %s", problem_id)
             return jsonify({'error': 'Invalid problem'}), 400
         
-        problem_data = PROBLEMS[problem_id]
-        
         # Initialize attempts for current part if not exists
         if 'attempts' not in session:
             session['attempts'] = {}
@@ -333,70 +247,17 @@ def chat():
         
         # Get correct answer for current part
         correct_answer = problem_data['answers'][current_part]
-        print(f"Correct answer: {correct_answer}")
-        
-        # Normalize answers for comparison (remove spaces, commas, make lowercase)
-        def normalize_answer(ans):
-            return ans.lower().strip().replace(' ', '').replace(',', '').replace('-', '')
-        
-        user_answer_normalized = normalize_answer(user_message)
-        correct_answer_normalized = normalize_answer(correct_answer)
-        
-        print(f"User answer normalized: {user_answer_normalized}")
-        print(f"Correct answer normalized: {correct_answer_normalized}")
         
-        # Determine if it's an answer attempt
-        is_answer_attempt = False
-        is_correct = False
+        # Compare by value: "a - b" ranges, /N masks, leading zeros (see answer_check)
+        is_correct = answer_check.matches(user_message, correct_answer)
         
-        # Check various matching scenarios
-        # 1. Exact match after normalization
-        if user_answer_normalized == correct_answer_normalized:
-            is_answer_attempt = True
-            is_correct = True
-            print("Match: Exact normalized match")
-        # 2. Correct answer is contained in user's answer
-        elif correct_answer_normalized in user_answer_normalized:
-            is_answer_attempt = True
-            is_correct = True
-            print("Match: Correct answer contained in user answer")
-        # 3. User answer is contained in correct answer (for single letters/numbers)
-        elif len(correct_answer_normalized) <= 3 and user_answer_normalized == correct_answer_normalized:
-            is_answer_attempt = True
-            is_correct = True
-            print("Match: Short answer exact match")
-        # 4. For ranges, check if both endpoints match
-        elif 'to' in correct_answer.lower():
-            # Extract the two IPs/numbers from both answers
-            correct_parts = [p.strip() for p in correct_answer.lower().split('to')]
-            if 'to' in user_message.lower():
-                user_parts = [p.strip() for p in user_message.lower().split('to')]
-                # Normalize and compare both parts
-                if len(correct_parts) == 2 and len(user_parts) == 2:
-                    part1_match = normalize_answer(user_parts[0]) == normalize_answer(correct_parts[0])
-                    part2_match = normalize_answer(user_parts[1]) == normalize_answer(correct_parts[1])
-                    if part1_match and part2_match:
-                        is_answer_attempt = True
-                        is_correct = True
-                        print("Match: Range answer match")
-                    else:
-                        is_answer_attempt = True
-                        print(f"No match: Range mismatch - part1:{part1_match}, part2:{part2_match}")
-            else:
-                # User didn't provide range format
-                is_answer_attempt = len(user_message.split()) <= 10  # Assume it's an attempt if reasonably short
-        # 5. Check if message looks like an answer (short, no question words)
-        elif len(user_message.split()) <= 8 and '?' not in user_message and not any(q in user_message.lower() for q in ['what', 'how', 'why', 'when', 'where', 'can', 'could', 'help']):
-            is_answer_attempt = True
-            print("Detected as answer attempt (short message, no question words)")
-        
-        print(f"Is answer attempt: {is_answer_attempt}")
-        print(f"Is correct: {is_correct}")
+        # An attempt is anything answer_check can read as this part's kind of
+        # answer; questions and negations ("is it ...?", "not ...") are questions
+        is_answer_attempt = is_correct or answer_check.parse(
+            user_message, answer_check.answer_kind(correct_answer)) is not None
         
         # Build context for Claude
-        part_description = PART_DESCRIPTIONS.get(current_part, '')
-        if current_part in ['part9', 'part10', 'part11', 'part12']:
-            part_description = problem_data['questions'].get(current_part.replace('part', 'q'), '')
+        part_description = get_part_question(problem_data, current_part)
         
         # Increment attempts if wrong answer
         if is_answer_attempt and not is_correct:
@@ -404,18 +265,15 @@ def chat():
             session.modified = True
         
         current_attempts = session['attempts'][current_part]
-        print(f"Current attempts: {current_attempts}")
+        log.debug("Problem %s %s: answer attempt=%s, correct=%s, attempts=%s",
+                  problem_id, current_part, is_answer_attempt, is_correct, current_attempts)
         
-        # Build context message for Claude
+        # Problem facts ride along as a cached context block; this turn only
+        # carries the part, the student's message and the level that applies
         if is_correct:
             context_message = f"""
 GREAT NEWS! The student answered correctly!
 
-CURRENT PROBLEM: {problem_data['name']}
-Subnets Needed: {problem_data['subnets_needed']}
-Hosts Needed: {problem_data['hosts_needed']}
-Network Address: {problem_data['network_address']}
-
 CURRENT PART: {current_part.upper().replace('PART', 'Part ')} - {part_description}
 STUDENT'S ANSWER: {user_message}
 CORRECT ANSWER: {correct_answer}
@@ -427,13 +285,7 @@ The student got it RIGHT! Please:
 """
         else:
             context_message = f"""
-CURRENT PROBLEM: {problem_data['name']}
-Subnets Needed: {problem_data['subnets_needed']}
-Hosts Needed: {problem_data['hosts_needed']}
-Network Address: {problem_data['network_address']}
-
 CURRENT PART: {current_part.upper().replace('PART', 'Part ')} - {part_description}
-{f"Specific Question: {problem_data['questions'].get(current_part.replace('part', 'q'), '')}" if current_part in ['part9', 'part10', 'part11', 'part12'] else ''}
 
 STUDENT'S ATTEMPT COUNT FOR THIS PART: {current_attempts}
 CORRECT ANSWER (for your reference): {correct_answer}
@@ -441,39 +293,52 @@ CORRECT ANSWER (for your reference): {correct_answer}
 The student says: {user_message}
 
 IMPORTANT INSTRUCTIONS:
-{"- This appears to be an INCORRECT answer attempt. Provide Level " + str(min(current_attempts, 5)) + " mentoring." if is_answer_attempt else "- This appears to be a QUESTION (not an answer attempt). Provide helpful guidance without revealing the answer."}
-
-Remember the 5-LEVEL MENTORING SYSTEM:
-- Level 1: Gentle nudge with a clarifying question
-- Level 2: Conceptual guidance and methodology  
-- Level 3: Formula with context for their specific problem
-- Level 4: Worked example with blanks to fill
-- Level 5: Complete answer with full step-by-step explanation
-
-{"Current mentoring level: " + str(min(current_attempts, 5)) if is_answer_attempt else "Answer their question helpfully"}
+{"- This appears to be an INCORRECT answer attempt. Mentor at " + level_guidance(current_attempts) if is_answer_attempt else "- This appears to be a QUESTION (not an answer attempt). Provide helpful guidance without revealing the answer."}
 """
         
-        # Add to conversation history
-        if 'conversation' not in session:
-            session['conversation'] = []
+        # Only this turn carries the full context; earlier turns are kept as
+        # raw exchanges in a bounded window for the current part
+        memory = conversation_memory()
+        messages = memory.build_messages(context_message)
         
-        session['conversation'].append({
-            'role': 'user',
-            'content': context_message
-        })
+        # Pregenerated hints cover wrong answers; Claude handles free-form questions
+        bank_hint = None
+        if is_answer_attempt and not is_correct:
+            bank_hint = hint_bank.lookup('agent3', f"{problem_id}:{current_part}", current_attempts)
+        if bank_hint is not None:
+            memory.add_exchange(user_message, bank_hint)
+            return jsonify({
+                'response': bank_hint,
+                'current_part': current_part,
+                'attempts': current_attempts,
+                'is_correct': is_correct
+            })
         
-        print("Calling Claude API...")
-        # Get Claude's response
-        claude_response = call_claude(session['conversation'])
-        print(f"Claude response: {claude_response[:100]}...")
+        fallback = fallback_reply(problem_data, current_part, current_attempts, is_correct)
+        level = min(current_attempts, 5) if is_answer_attempt and not is_correct else None
         
-        # Add Claude's response to history
-        session['conversation'].append({
-            'role': 'assistant',
-            'content': claude_response
-        })
+        if wants_stream(data):
+            # The reply finishes after Flask has saved the session, so store it explicitly
+            def on_complete(text):
+                memory.add_exchange(user_message, text)
+                persist_session()
+            
+            return sse_response(
+                {'current_part': current_part, 'attempts': current_attempts, 'is_correct': is_correct},
+                fallback_hints.stream_with_fallback(
+                    llm_gateway.stream(system=SYSTEM_PROMPT, messages=messages, max_tokens=2000,
+                                       agent='agent3', context=problem_context(problem_data),
+                                       level=level, tools=subnet_tools),
+                    fallback),
+                on_complete=on_complete,
+                on_error=lambda e: fallback
+            )
         
-        session.modified = True
+        # Get Claude's response
+        claude_response = call_claude(messages, fallback, problem_context(problem_data), level)
+        
+        # Add the exchange to the current part's window
+        memory.add_exchange(user_message, claude_response)
         
         response_data = {
             'response': claude_response,
@@ -482,15 +347,12 @@ Remember the 5-LEVEL MENTORING SYSTEM:
             'is_correct': is_correct
         }
         
-        print(f"Sending response: {response_data}")
-        print("=" * 50)
+        log_payload(log, "Chat response", response_data)
         
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"ERROR in chat endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Chat endpoint failed")
         return jsonify({'error': str(e)}), 500
 
 @agent3_bp.route('/next_part', methods=['POST'])
@@ -499,6 +361,15 @@ def next_part():
     current_part = session.get('current_part', 'part1')
     part_num = int(current_part.replace('part', ''))
     
+    # Collapse the finished part's exchanges into a one-line summary
+    problem_data = get_problem(session.get('problem_id'))
+    if problem_data:
+        attempts = session.get('attempts', {}).get(current_part, 0)
+        conversation_memory().close_part(
+            f"Part {part_num} ({get_part_question(problem_data, current_part)}): "
+            f"completed after {attempts} incorrect attempt(s)"
+        )
+    
     if part_num < 12:
         next_part_num = part_num + 1
         session['current_part'] = f'part{next_part_num}'
@@ -676,6 +547,16 @@ INDEX_TEMPLATE = """<!DOCTYPE html>
                 </div>
                 <button class="start-button">Start Problem 6</button>
             </div>
+
+            <div class="problem-card" onclick="location.href='practice'">
+                <div class="problem-number">🎲 Practice Problem</div>
+                <div class="problem-details">
+                    <div><strong>Network:</strong> Generated for you</div>
+                    <div><strong>Subnets Needed:</strong> Random</div>
+                    <div><strong>Hosts Needed:</strong> Random</div>
+                </div>
+                <button class="start-button">Start a New Problem</button>
+            </div>
         </div>
     </div>
 </body>
@@ -965,26 +846,36 @@ PROBLEM_TEMPLATE = """<!DOCTYPE html>
                 headers: { 
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ message: message })
+                body: JSON.stringify({ message: message, stream: true })
             })
             .then(response => {
                 console.log('Response received:', response);
-                if (!response.ok) {
+                if (!response.ok && response.status !== 409) {
                     throw new Error('Network response was not ok: ' + response.status);
                 }
-                return response.json();
-            })
-            .then(data => {
-                console.log('Data:', data);
-                addMessage(data.response, 'assistant');
-                attemptCount = data.attempts;
-                updateAttemptCounter();
-                
-                // If answer is correct, prepare for next part
-                if (data.is_correct) {
-                    isWaitingForNext = true;
-                    addNextPartButton();
+                const contentType = response.headers.get('Content-Type') || '';
+                if (!contentType.includes('text/event-stream')) {
+                    return response.json().then(data => {
+                        addMessage(data.response, 'assistant');
+                        // busy: another message from this student is still being answered
+                        if (!data.busy) finishChat(data);
+                    });
                 }
+                
+                // Render the reply token by token as it streams in
+                let tutorDiv = null;
+                let text = '';
+                return readEventStream(response, (event, data) => {
+                    if (event === 'meta') {
+                        tutorDiv = startMessage('assistant');
+                    } else if (event === 'delta') {
+                        text += data.text;
+                        renderMessage(tutorDiv, text, 'assistant');
+                    } else if (event === 'done' || event === 'error') {
+                        renderMessage(tutorDiv, data.response, 'assistant');
+                        finishChat(data);
+                    }
+                });
             })
             .catch(error => {
                 console.error('Error:', error);
@@ -992,6 +883,41 @@ PROBLEM_TEMPLATE = """<!DOCTYPE html>
             });
         }
 
+        function finishChat(data) {
+            console.log('Data:', data);
+            attemptCount = data.attempts;
+            updateAttemptCounter();
+            
+            // If answer is correct, prepare for next part
+            if (data.is_correct) {
+                isWaitingForNext = true;
+                addNextPartButton();
+            }
+        }
+
+        function readEventStream(response, onEvent) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            const pump = () => reader.read().then(result => {
+                if (result.done) return;
+                buffer += decoder.decode(result.value, {stream: true});
+                const events = buffer.split('\\n\\n');
+                buffer = events.pop();
+                events.forEach(block => {
+                    let eventName = 'message';
+                    const dataLines = [];
+                    block.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) dataLines.push(line.slice(6));
+                    });
+                    if (dataLines.length) onEvent(eventName, JSON.parse(dataLines.join('\\n')));
+                });
+                return pump();
+            });
+            return pump();
+        }
+
         function addNextPartButton() {
             const messagesDiv = document.getElementById('chatMessages');
             const buttonDiv = document.createElement('div');
@@ -1034,21 +960,30 @@ PROBLEM_TEMPLATE = """<!DOCTYPE html>
             });
         }
 
-        function addMessage(text, sender) {
+        function startMessage(sender) {
             const messagesDiv = document.getElementById('chatMessages');
             const messageDiv = document.createElement('div');
             messageDiv.className = 'message ' + sender + '-message';
-            
+            messagesDiv.appendChild(messageDiv);
+            return messageDiv;
+        }
+
+        function renderMessage(messageDiv, text, sender) {
+            const messagesDiv = document.getElementById('chatMessages');
             if (sender === 'assistant') {
                 messageDiv.innerHTML = '<strong>🤖 AI Tutor:</strong><br><br>' + text;
             } else {
                 messageDiv.innerHTML = '<strong>You:</strong><br><br>' + text;
             }
-            
-            messagesDiv.appendChild(messageDiv);
             messagesDiv.scrollTop = messagesDiv.scrollHeight;
         }
 
+        function addMessage(text, sender) {
+            const messageDiv = startMessage(sender);
+            renderMessage(messageDiv, text, sender);
+            return messageDiv;
+        }
+
         function updateAttemptCounter() {
             document.getElementById('attemptCount').textContent = attemptCount;
         }
@@ -18,15 +18,30 @@ Setup in Spyder:
 
 from flask import Blueprint, Flask, render_template_string, request, jsonify, session, redirect, url_for
 from functools import wraps
-from anthropic import Anthropic
+from html import escape
 import os
+import re
 import secrets
+import logging
+import llm_gateway
+import fallback_hints
+from single_flight import one_chat_at_a_time
+from conversation import ConversationLog, new_conversation
+from session_store import persist_session
+from streaming import wants_stream, sse_response
+from prompt_builder import clip_student_message, level_hint
+from subnet_calc import TOOL_PROMPT, subnet_tools
+import problem_generator
+import answer_check
 
 agent4_bp = Blueprint("agent4", __name__)
+log = logging.getLogger(__name__)
 
+# Serve the handwritten hints below locally; Claude only answers free-form questions
+LOCAL_HINTS = os.environ.get('AGENT4_LOCAL_HINTS', '1') != '0'
 
-# Initialize Anthropic client
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# Conversations kept per student; the oldest is dropped beyond this
+MAX_CONVERSATIONS = 5
 
 # VLSM Problems with Visual Diagrams
 PROBLEMS = {
@@ -357,7 +372,7 @@ SYSTEM_PROMPT = """You are a patient Cisco networking tutor teaching VLSM throug
 CORE RULES:
 • Students complete parts IN ORDER (can't skip)
 • Check answers against correct CIDR notation EXACTLY
-• Use the 5 pre-written hints for each part
+• Use the pre-written hint given for the student's current level
 • If correct: Celebrate enthusiastically! Say "✅ Correct!" and explain why it's right. DO NOT mention moving to next part (a button will appear automatically)
 • If wrong: Explain mistake clearly, offer hint
 
@@ -383,7 +398,7 @@ FORMULAS:
 
 ANSWER FORMAT: Must be X.X.X.X/XX
 
-Be encouraging! When answer is correct, celebrate and briefly explain why it's correct. Keep it concise - the student will see a Continue button."""
+Be encouraging! When answer is correct, celebrate and briefly explain why it's correct. Keep it concise - the student will see a Continue button.""" + "\n\n" + TOOL_PROMPT
 
 # HTML Template
 HTML_TEMPLATE = """<!DOCTYPE html>
@@ -555,6 +570,9 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 <button class="problem-btn" onclick="selectProblem(3)">
                     Problem 3<br>Multi-City
                 </button>
+                <button class="problem-btn" id="practice-btn" onclick="startPractice()">
+                    🎲 Practice<br>New Scenario
+                </button>
             </div>
             
             <div id="problem-details"></div>
@@ -605,7 +623,10 @@ HTML_TEMPLATE = """<!DOCTYPE html>
     <script>
         let currentProblem = 1;
         let currentPart = 1;
-        let conversationHistory = [];
+        // The server holds the history; the client tracks its conversation
+        // and the last message sequence number it has displayed
+        let conversationId = null;
+        let lastSeq = 0;
 
         function selectProblem(problemNum) {
             currentProblem = problemNum;
@@ -614,16 +635,27 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             const buttons = document.querySelectorAll('.problem-btn');
             buttons.forEach(function(btn, idx) {
                 btn.classList.remove('active');
-                if (idx + 1 === problemNum) {
+                if (idx + 1 === problemNum || (btn.id === 'practice-btn' && typeof problemNum === 'string')) {
                     btn.classList.add('active');
                 }
             });
             
             loadProblemDetails(problemNum);
-            conversationHistory = [];
+            conversationId = null;
+            lastSeq = 0;
             loadPart(problemNum, 1);
         }
 
+        // Practice scenarios are generated from a seed; the server hands back its p<seed> id
+        function startPractice() {
+            fetch('practice', {method: 'POST'})
+                .then(function(response) { return response.json(); })
+                .then(function(data) { selectProblem(data.problem_num); })
+                .catch(function(error) {
+                    console.error('Error:', error);
+                });
+        }
+
         function loadProblemDetails(problemNum) {
             fetch('get_problem/' + problemNum)
                 .then(function(response) { return response.json(); })
@@ -668,48 +700,142 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                     message: message,
                     problem_num: currentProblem,
                     current_part: currentPart,
-                    history: conversationHistory
+                    conversation_id: conversationId,
+                    stream: true
                 })
             })
-            .then(function(response) { return response.json(); })
-            .then(function(data) {
-                addMessage(data.response, 'assistant');
-                conversationHistory = data.history;
-                
-                if (data.next_part) {
-                    var nextPartNum = data.next_part;
-                    
-                    var continueMsg = '<div style="background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); color: white; padding: 20px; border-radius: 10px; text-align: center; margin: 20px 0;">' +
-                        '<div style="font-size: 1.2em; font-weight: bold; margin-bottom: 15px;">✅ Correct! Great job!</div>' +
-                        '<button id="continueBtn" onclick="continueToNextPart(' + nextPartNum + ')" style="background: white; color: #11998e; border: none; padding: 12px 30px; border-radius: 8px; font-size: 1.1em; font-weight: bold; cursor: pointer; box-shadow: 0 4px 6px rgba(0,0,0,0.1); transition: transform 0.2s;">Continue to Part ' + nextPartNum + ' →</button>' +
-                        '</div>';
-                    addMessage(continueMsg, 'assistant');
-                    
-                    currentPart = nextPartNum;
+            .then(function(response) {
+                var contentType = response.headers.get('Content-Type') || '';
+                if (contentType.indexOf('text/event-stream') === -1) {
+                    return response.json().then(function(data) {
+                        addMessage(data.response, 'assistant');
+                        // busy: another message from this student is still being answered
+                        if (!data.busy) finishChat(data);
+                    });
                 }
                 
-                sendBtn.disabled = false;
-                sendBtn.innerHTML = 'Send';
+                // Render the reply token by token as it streams in
+                var replyDiv = null;
+                var text = '';
+                return readEventStream(response, function(event, data) {
+                    if (event === 'meta') {
+                        conversationId = data.conversation_id;
+                        replyDiv = startMessage('assistant');
+                    } else if (event === 'delta') {
+                        text += data.text;
+                        renderMessage(replyDiv, text);
+                    } else if (event === 'done' || event === 'error') {
+                        renderMessage(replyDiv, data.response);
+                        finishChat(data);
+                    }
+                });
             })
             .catch(function(error) {
                 console.error('Error:', error);
-                addMessage('Sorry, error occurred. Try again.', 'assistant');
-                sendBtn.disabled = false;
-                sendBtn.innerHTML = 'Send';
+                // The reply may have been recorded before the connection dropped
+                resyncConversation(function(recovered) {
+                    if (!recovered) {
+                        addMessage('Sorry, error occurred. Try again.', 'assistant');
+                    }
+                    sendBtn.disabled = false;
+                    sendBtn.innerHTML = 'Send';
+                });
             });
         }
 
-        function addMessage(text, sender) {
+        function resyncConversation(callback) {
+            if (!conversationId) {
+                callback(false);
+                return;
+            }
+            fetch('conversations/' + conversationId + '?since=' + lastSeq)
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    var replies = (data.messages || []).filter(function(msg) {
+                        return msg.role === 'assistant';
+                    });
+                    replies.forEach(function(msg) {
+                        addMessage(msg.content, 'assistant');
+                    });
+                    if (data.seq) lastSeq = data.seq;
+                    callback(replies.length > 0);
+                })
+                .catch(function() { callback(false); });
+        }
+
+        function finishChat(data) {
+            var sendBtn = document.getElementById('send-btn');
+            if (data.conversation_id) {
+                conversationId = data.conversation_id;
+            }
+            if (data.seq) {
+                lastSeq = data.seq;
+            }
+            
+            if (data.next_part) {
+                var nextPartNum = data.next_part;
+                
+                var continueMsg = '<div style="background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); color: white; padding: 20px; border-radius: 10px; text-align: center; margin: 20px 0;">' +
+                    '<div style="font-size: 1.2em; font-weight: bold; margin-bottom: 15px;">✅ Correct! Great job!</div>' +
+                    '<button id="continueBtn" onclick="continueToNextPart(' + nextPartNum + ')" style="background: white; color: #11998e; border: none; padding: 12px 30px; border-radius: 8px; font-size: 1.1em; font-weight: bold; cursor: pointer; box-shadow: 0 4px 6px rgba(0,0,0,0.1); transition: transform 0.2s;">Continue to Part ' + nextPartNum + ' →</button>' +
+                    '</div>';
+                addMessage(continueMsg, 'assistant');
+                
+                currentPart = nextPartNum;
+            }
+            
+            sendBtn.disabled = false;
+            sendBtn.innerHTML = 'Send';
+        }
+
+        function readEventStream(response, onEvent) {
+            var reader = response.body.getReader();
+            var decoder = new TextDecoder();
+            var buffer = '';
+            function pump() {
+                return reader.read().then(function(result) {
+                    if (result.done) return;
+                    buffer += decoder.decode(result.value, {stream: true});
+                    var events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    events.forEach(function(block) {
+                        var eventName = 'message';
+                        var dataLines = [];
+                        block.split('\\n').forEach(function(line) {
+                            if (line.indexOf('event: ') === 0) eventName = line.slice(7);
+                            else if (line.indexOf('data: ') === 0) dataLines.push(line.slice(6));
+                        });
+                        if (dataLines.length) onEvent(eventName, JSON.parse(dataLines.join('\\n')));
+                    });
+                    return pump();
+                });
+            }
+            return pump();
+        }
+
+        function startMessage(sender) {
             const chatContainer = document.getElementById('chat-container');
             const messageDiv = document.createElement('div');
             messageDiv.className = 'message ' + sender + '-message';
-            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.appendChild(messageDiv);
+            return messageDiv;
+        }
+
+        function renderMessage(messageDiv, text) {
+            const chatContainer = document.getElementById('chat-container');
+            messageDiv.innerHTML = text.replace(/\\n/g, '<br>');
             chatContainer.scrollTop = chatContainer.scrollHeight;
         }
 
+        function addMessage(text, sender) {
+            const messageDiv = startMessage(sender);
+            renderMessage(messageDiv, text);
+            return messageDiv;
+        }
+
         function continueToNextPart(partNum) {
-            conversationHistory = [];
+            conversationId = null;
+            lastSeq = 0;
             loadPart(currentProblem, partNum);
             loadProblemDetails(currentProblem);
             document.getElementById('chat-container').scrollTop = 0;
@@ -722,13 +848,33 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </body>
 </html>"""
 
+def find_problem(problem_num):
+    """One of the 3 problems by number, or a practice scenario by its p<seed> id.
+
+    Numbers may arrive as strings from a URL; they are returned as the key
+    the rest of the session uses (an int for fixed problems).
+    """
+    if isinstance(problem_num, str) and problem_num.isdigit():
+        problem_num = int(problem_num)
+    if problem_num in PROBLEMS:
+        return problem_num, PROBLEMS[problem_num]
+    seed = problem_generator.practice_seed(problem_num)
+    if seed is None:
+        return problem_num, None
+    return problem_num, problem_generator.agent4_practice(seed)
+
 @agent4_bp.route('/')
 def home():
     return render_template_string(HTML_TEMPLATE)
 
-@agent4_bp.route('/get_problem/<int:problem_num>')
+@agent4_bp.route('/practice', methods=['POST'])
+def new_practice():
+    """Pick a seed for a new generated scenario; the client loads it like a problem"""
+    return jsonify({"problem_num": problem_generator.practice_id(problem_generator.new_seed())})
+
+@agent4_bp.route('/get_problem/<problem_num>')
 def get_problem(problem_num):
-    problem = PROBLEMS.get(problem_num)
+    problem_num, problem = find_problem(problem_num)
     if not problem:
         return jsonify({"error": "Not found"}), 404
     
@@ -764,9 +910,9 @@ def get_problem(problem_num):
     
     return jsonify({"html": html})
 
-@agent4_bp.route('/get_part/<int:problem_num>/<int:part_num>')
+@agent4_bp.route('/get_part/<problem_num>/<int:part_num>')
 def get_part(problem_num, part_num):
-    problem = PROBLEMS.get(problem_num)
+    problem_num, problem = find_problem(problem_num)
     if not problem:
         return jsonify({"error": "Not found"}), 404
     
@@ -780,15 +926,116 @@ def get_part(problem_num, part_num):
     
     return jsonify({"message": message})
 
+def advance_part(problem, problem_num, current_part):
+    """Record progress past a correctly answered part and return the next part number"""
+    if current_part < len(problem['parts']):
+        next_part = current_part + 1
+        session[f'problem_{problem_num}_part'] = next_part
+        return next_part
+    return None
+
+# "hint" / "level 3" asks for a hint; an answer is whatever answer_check can read
+HINT_REQUEST_PATTERN = re.compile(r'\bhint\b|\blevel\s*([1-5])\b', re.IGNORECASE)
+
+def is_answer_attempt(part, user_message):
+    """True if the message holds an answer (questions and negations don't)"""
+    return answer_check.parse(user_message, answer_check.answer_kind(part['answer'])) is not None
+
+def current_hint_level(problem_num, part_num):
+    """Hint level the wrong attempts so far have earned (at least 1)"""
+    attempts = session.get('agent4_attempts', {}).get(f'{problem_num}:{part_num}', 0)
+    return min(max(attempts, 1), 5)
+
+def next_hint_level(problem_num, part_num):
+    """Bump the server-side attempt counter for a part and return the hint level"""
+    attempts = session.get('agent4_attempts', {})
+    key = f'{problem_num}:{part_num}'
+    attempts[key] = attempts.get(key, 0) + 1
+    session['agent4_attempts'] = attempts
+    return min(attempts[key], 5)
+
+def local_reply(problem, problem_num, current_part, user_message, is_correct):
+    """Reply from the part data when possible; returns (text, next_part) or None"""
+    part = problem['parts'][current_part]
+    
+    if is_correct:
+        next_part = advance_part(problem, problem_num, current_part)
+        explanation = part['hint_level_5'].split('\n\n', 1)[-1]
+        text = f"✅ Correct! <strong>{part['answer']}</strong> is exactly right!\n\n{explanation}"
+        if next_part is None:
+            text += "\n\n🎉 You finished every part of this problem!"
+        return text, next_part
+    
+    hint_request = HINT_REQUEST_PATTERN.search(user_message)
+    if hint_request:
+        # Asking again repeats the hint; a named level can step back to an
+        # easier one, never skip ahead of the attempts
+        level = current_hint_level(problem_num, current_part)
+        if hint_request.group(1):
+            level = min(level, int(hint_request.group(1)))
+        return f"💡 <strong>Hint level {level}:</strong>\n{part[f'hint_level_{level}']}", None
+    
+    if is_answer_attempt(part, user_message):
+        level = next_hint_level(problem_num, current_part)
+        return (f"❌ Not quite - {escape(user_message.strip())} isn't the answer for {part['subnet']}.\n\n"
+                f"💡 <strong>Hint level {level}:</strong>\n{part[f'hint_level_{level}']}"), None
+    
+    return None
+
+def start_conversation(problem_num, part_num):
+    """Create a server-held conversation for one part and return its log"""
+    conversations = session.get('agent4_conversations', {})
+    state = new_conversation(problem_num=problem_num, part_num=part_num)
+    conversations[state['id']] = state
+    while len(conversations) > MAX_CONVERSATIONS:
+        oldest = min(conversations, key=lambda cid: conversations[cid]['created_at'])
+        del conversations[oldest]
+    session['agent4_conversations'] = conversations
+    return ConversationLog(state)
+
+def get_conversation(conversation_id):
+    """The student's conversation with this ID, or None"""
+    state = session.get('agent4_conversations', {}).get(conversation_id)
+    return ConversationLog(state) if state is not None else None
+
+def record_exchange(conversation, user_message, assistant_response):
+    """Append one exchange to the conversation and return the reply's seq"""
+    conversation.append("user", user_message)
+    seq = conversation.append("assistant", assistant_response)
+    session.modified = True
+    return seq
+
+@agent4_bp.route('/conversations', methods=['POST'])
+def create_conversation():
+    data = request.json or {}
+    problem_num, problem = find_problem(data.get('problem_num', 1))
+    part_num = data.get('part_num', 1)
+    if part_num not in (problem or {}).get('parts', {}):
+        return jsonify({"error": "Not found"}), 404
+    conversation = start_conversation(problem_num, part_num)
+    return jsonify({"conversation_id": conversation.id, "seq": conversation.last_seq}), 201
+
+@agent4_bp.route('/conversations/<conversation_id>')
+def conversation_messages(conversation_id):
+    """Messages after ?since=N, so a reconnecting client can catch up"""
+    conversation = get_conversation(conversation_id)
+    if conversation is None:
+        return jsonify({"error": "Conversation not found"}), 404
+    since = request.args.get('since', 0, type=int)
+    return jsonify({
+        "conversation_id": conversation.id,
+        "messages": conversation.since(since),
+        "seq": conversation.last_seq
+    })
+
 @agent4_bp.route('/chat', methods=['POST'])
+@one_chat_at_a_time
 def chat():
     data = request.json
-    user_message = data.get('message', '')
-    problem_num = data.get('problem_num', 1)
+    user_message = clip_student_message(data.get('message', ''))
+    problem_num, problem = find_problem(data.get('problem_num', 1))
     current_part = data.get('current_part', 1)
-    history = data.get('history', [])
     
-    problem = PROBLEMS.get(problem_num)
     if not problem:
         return jsonify({"error": "Not found"}), 404
     
@@ -796,6 +1043,42 @@ def chat():
     if not part:
         return jsonify({"error": "Part not found"}), 404
     
+    # History lives on the server; the client only names its conversation
+    conversation = get_conversation(data.get('conversation_id'))
+    if conversation is None or (conversation.state['problem_num'], conversation.state['part_num']) != (problem_num, current_part):
+        conversation = start_conversation(problem_num, current_part)
+    
+    # Check the answer before deciding whether Claude is needed at all
+    is_correct = answer_check.matches(user_message, part['answer'])
+    
+    if LOCAL_HINTS:
+        local = local_reply(problem, problem_num, current_part, user_message, is_correct)
+        if local is not None:
+            response_text, next_part = local
+            seq = record_exchange(conversation, user_message, response_text)
+            return jsonify({
+                "response": response_text,
+                "conversation_id": conversation.id,
+                "seq": seq,
+                "next_part": next_part
+            })
+    
+    # Served instead of an error when Claude is down or the breaker is open
+    level = None
+    if is_correct:
+        hint_level = 5
+        fallback = fallback_hints.correct_reply(part['answer'])
+    else:
+        # Free-form questions stay on the full model; answer attempts move
+        # up a level (even when local hints are off) and route by it
+        if is_answer_attempt(part, user_message):
+            hint_level = level = next_hint_level(problem_num, current_part)
+        else:
+            hint_level = current_hint_level(problem_num, current_part)
+        fallback = fallback_hints.vlsm_hint(part, hint_level)
+    
+    # Only the hint for this attempt goes in (level 5 holds the worked
+    # solution a correct answer is explained with)
     part_context = f"""PROBLEM: {problem['name']} - Part {current_part}
 Network: {problem['network']} (Class {problem['network_class']})
 
@@ -804,57 +1087,59 @@ Question: {part['question']}
 Hosts: {part['hosts_needed']}
 Correct Answer: {part['answer']}
 
-HINTS:
-L1: {part['hint_level_1']}
-L2: {part['hint_level_2']}
-L3: {part['hint_level_3']}
-L4: {part['hint_level_4']}
-L5: {part['hint_level_5']}
+{level_hint(part, hint_level)}
 
-Check answer against: {part['answer']}
 If correct: celebrate, explain briefly
-If wrong: explain, offer hint
-Use specific hints above!"""
+If wrong: explain, offer the hint above"""
+    
+    messages = conversation.history()
     
-    messages = []
-    for msg in history:
-        messages.append({"role": msg["role"], "content": msg["content"]})
+    # part_context is identical for every student on this part and level, so
+    # it rides along as a cached system block instead of inside the user turn
+    messages.append({"role": "user", "content": f"Student: {user_message}"})
     
-    messages.append({"role": "user", "content": f"{part_context}\n\nStudent: {user_message}"})
+    if wants_stream(data):
+        # The session cookie goes out with the first event, so advance now
+        next_part = advance_part(problem, problem_num, current_part) if is_correct else None
+        
+        def on_complete(assistant_response):
+            # The session was already saved with the response headers
+            seq = record_exchange(conversation, user_message, assistant_response)
+            persist_session()
+            return {"seq": seq}
+        
+        return sse_response(
+            {"next_part": next_part, "conversation_id": conversation.id},
+            fallback_hints.stream_with_fallback(
+                llm_gateway.stream(system=SYSTEM_PROMPT, messages=messages, max_tokens=2000,
+                                   agent='agent4', context=part_context, level=level, tools=subnet_tools),
+                fallback),
+            on_complete=on_complete,
+            on_error=lambda e: fallback
+        )
     
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=2000,
+        assistant_response = llm_gateway.complete(
             system=SYSTEM_PROMPT,
-            messages=messages
+            messages=messages,
+            max_tokens=2000,
+            agent='agent4',
+            context=part_context,
+            level=level,
+            tools=subnet_tools
         )
-        
-        assistant_response = response.content[0].text
-        
-        next_part = None
-        user_answer = user_message.strip().lower().replace(" ", "")
-        correct_answer = part['answer'].lower().replace(" ", "")
-        
-        if correct_answer in user_answer or user_answer == correct_answer:
-            total_parts = len(problem['parts'])
-            if current_part < total_parts:
-                next_part = current_part + 1
-                session[f'problem_{problem_num}_part'] = next_part
-        
-        history.append({"role": "user", "content": user_message})
-        history.append({"role": "assistant", "content": assistant_response})
-        
-        return jsonify({
-            "response": assistant_response,
-            "history": history,
-            "next_part": next_part
-        })
-        
     except Exception as e:
-        print(f"Error: {e}")
-        return jsonify({
-            "response": "Error occurred. Try again.",
-            "history": history
-        }), 500
+        log.warning("LLM unavailable, serving fallback hint: %s", e)
+        assistant_response = fallback
+    
+    next_part = advance_part(problem, problem_num, current_part) if is_correct else None
+    
+    seq = record_exchange(conversation, user_message, assistant_response)
+    
+    return jsonify({
+        "response": assistant_response,
+        "conversation_id": conversation.id,
+        "seq": seq,
+        "next_part": next_part
+    })
 
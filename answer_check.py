@@ -0,0 +1,234 @@
+"""
+Answer Check - compare student answers with the correct answer by value
+
+The stored answer decides what kind of value is expected (class letter,
+number, 8-bit binary, address, mask, CIDR block, address range, list of
+octets). The student's text is parsed as that kind, and the two values are
+compared, so spelling differences no longer matter:
+
+  - "/26" and "255.255.255.192" are the same mask
+  - "10.0.0.0 - 10.0.0.63" and "10.0.0.0 to 10.0.0.63" are the same range
+  - "010.000.000.001" is 10.0.0.1, "0011" is 00000011, "1,024" is 1024
+  - "Class C", "1st and 2nd octets" and "The ID is 10.0.4.0." are understood
+
+A student answer only counts if it holds exactly the values the kind needs,
+wrapped in nothing but filler words ("it's", "the answer is", "class").
+"1.2.3.4" is not the answer "2", "16 - 2 = 14" is not "14", and questions
+or negations ("Is it class C?", "not 14") never count; answers like that go
+to the tutor instead.
+
+Outcomes per kind are counted in answer_checks_total on /metrics.
+"""
+
+from functools import lru_cache
+import re
+import metrics
+import subnet_calc
+
+ANSWER_CHECKS = metrics.Counter(
+    'answer_checks_total', "Student answers checked locally, per answer kind", ('kind', 'outcome'))
+
+QUAD = re.compile(r'(?<![\d.])(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})(?!\.?\d)')
+PREFIX = re.compile(r'/\s*(\d{1,2})(?!\d)')
+NUMBER = re.compile(r'\d{1,3}(?:,\d{3})+(?!\d)|\d+')
+BINARY = re.compile(r'[01]{1,8}')
+CLASS = re.compile(r'(?:class\s*)?([a-e])\.?', re.IGNORECASE)
+CLASS_IN_TEXT = re.compile(r'\bclass\s+([a-e])\b', re.IGNORECASE)
+ORDINALS = re.compile(r'\b(first|second|third|fourth|1st|2nd|3rd|4th)\b', re.IGNORECASE)
+OCTET_DIGITS = re.compile(r'\b([1-4])\b')
+RANGE = re.compile(r'\s+to\s+', re.IGNORECASE)
+CLASS_LETTER = re.compile(r'\b[a-e]\b', re.IGNORECASE)
+BINARY_TOKEN = re.compile(r'\b[01]{1,8}\b')
+NEGATION = re.compile(r"\b(?:not|no|nope|never|wrong|isn'?t|aren'?t|wasn'?t|don'?t|doesn'?t|didn'?t|can'?t|won'?t)\b")
+# Words, numbers and symbols left around a value; plain punctuation is ignored
+WORD = re.compile(r"[a-z']+|\d+|[^\s\w.,:;!()\"]")
+
+# Words a short answer may wrap its value in ("it's 14", "the answer is class C")
+FILLER = frozenset({'it', "it's", 'its', 'is', 'the', 'answer', 'my', 'i', 'think', 'that', "that's"})
+ADDRESS_WORDS = frozenset({'subnet', 'id', 'network', 'broadcast', 'address', 'mask', 'prefix', 'cidr',
+                           'block', 'host', 'usable', 'custom', 'default'})
+# Extra words that fit next to each kind of value
+CONTEXT_WORDS = {
+    'class': frozenset({'class'}),
+    'number': frozenset({'/', 'subnets', 'subnet', 'bits', 'bit', 'hosts', 'host', 'addresses', 'address',
+                         'usable', 'total', 'borrowed', 'network'}),
+    'binary': frozenset({'binary'}),
+    'address': ADDRESS_WORDS,
+    'mask': ADDRESS_WORDS,
+    'cidr': ADDRESS_WORDS,
+    'range': ADDRESS_WORDS | {'to', 'through', 'thru', 'from', 'and', '-', 'range'},
+    'octets': frozenset({'octet', 'octets', 'and', '&'}),
+}
+
+ORDINAL_INDEX = {'first': 0, 'second': 1, 'third': 2, 'fourth': 3, '1st': 0, '2nd': 1, '3rd': 2, '4th': 3}
+
+
+def _addresses(text):
+    """Dotted quads in the text (as integers), or None if one is out of range"""
+    values = []
+    for match in QUAD.finditer(text):
+        octets = [int(octet) for octet in match.groups()]
+        if max(octets) > 255:
+            return None
+        values.append(octets[0] << 24 | octets[1] << 16 | octets[2] << 8 | octets[3])
+    return values
+
+
+def _only_filler(text, kind, *patterns):
+    """True if nothing but filler words remain once the matched values are cut out"""
+    for pattern in patterns:
+        text = pattern.sub(' ', text)
+    allowed = FILLER | CONTEXT_WORDS[kind]
+    return all(word in allowed for word in WORD.findall(text.lower()))
+
+
+def _is_mask(value):
+    inverted = ~value & 0xFFFFFFFF
+    return value != 0 and inverted & (inverted + 1) == 0
+
+
+def _parse_number(text):
+    """The one number in the text ("/28" counts as 28)"""
+    values = {int(match.replace(',', '')) for match in NUMBER.findall(text)}
+    if len(values) != 1 or not _only_filler(text, 'number', NUMBER):
+        return None
+    return values.pop()
+
+
+def _parse_binary(text):
+    squeezed = re.sub(r'\s+', '', text)
+    if BINARY.fullmatch(squeezed):
+        return int(squeezed, 2)
+    tokens = BINARY_TOKEN.findall(text)
+    if len(tokens) != 1 or not _only_filler(text, 'binary', BINARY_TOKEN):
+        return None
+    return int(tokens[0], 2)
+
+
+def _parse_class(text):
+    """A class letter on its own, or "class X" when no other letter A-E appears"""
+    match = CLASS.fullmatch(text.strip())
+    if match:
+        return match.group(1).upper()
+    letters = CLASS_IN_TEXT.findall(text)
+    if len(letters) != 1 or len(CLASS_LETTER.findall(text)) != 1 or not _only_filler(text, 'class', CLASS_IN_TEXT):
+        return None
+    return letters[0].upper()
+
+
+def _parse_address(text):
+    values = _addresses(text)
+    if not values or len(set(values)) != 1 or not _only_filler(text, 'address', QUAD):
+        return None
+    return values[0]
+
+
+def _parse_mask(text):
+    """A mask written dotted or as /N (both must agree if both are given)"""
+    values = _addresses(text)
+    if values is None:
+        return None
+    values += [subnet_calc.prefix_mask(int(p)) for p in PREFIX.findall(text) if int(p) <= 32]
+    if len(set(values)) != 1 or not _is_mask(values[0]) or not _only_filler(text, 'mask', QUAD, PREFIX):
+        return None
+    return values[0]
+
+
+def _parse_cidr(text):
+    """(network, prefix) from "a.b.c.d/n" or "a.b.c.d mask" """
+    values = _addresses(text)
+    prefixes = [int(p) for p in PREFIX.findall(text)]
+    if not values or not _only_filler(text, 'cidr', QUAD, PREFIX):
+        return None
+    if len(values) == 1 and len(prefixes) == 1 and prefixes[0] <= 32:
+        return values[0], prefixes[0]
+    if len(values) == 2 and not prefixes and _is_mask(values[1]):
+        return values[0], bin(values[1]).count('1')
+    return None
+
+
+def _parse_range(text):
+    """(first, last) from "a to b", "a - b", "a through b", ..."""
+    values = _addresses(text)
+    if not values or len(values) != 2 or not _only_filler(text, 'range', QUAD):
+        return None
+    return values[0], values[1]
+
+
+def _parse_octets(text):
+    """Set of octet indexes (0-3) from "First and Second octets", "octets 1 and 2", ..."""
+    indexes = {ORDINAL_INDEX[word.lower()] for word in ORDINALS.findall(text)}
+    if not indexes and 'octet' in text.lower():
+        indexes = {int(digit) - 1 for digit in OCTET_DIGITS.findall(text)}
+    if not indexes or not _only_filler(text, 'octets', ORDINALS, OCTET_DIGITS):
+        return None
+    return frozenset(indexes)
+
+
+def _parse_text(text):
+    """Anything else (e.g. address maps) compares ignoring case, spaces and, without digits, dots"""
+    squeezed = re.sub(r'\s+', '', text).upper()
+    return squeezed if any(char.isdigit() for char in squeezed) else squeezed.replace('.', '')
+
+
+PARSERS = {
+    'class': _parse_class,
+    'number': _parse_number,
+    'binary': _parse_binary,
+    'address': _parse_address,
+    'mask': _parse_mask,
+    'cidr': _parse_cidr,
+    'range': _parse_range,
+    'octets': _parse_octets,
+    'text': _parse_text,
+}
+
+
+@lru_cache(maxsize=4096)
+def answer_kind(correct_answer):
+    """Kind of value a stored answer holds, from how it is written"""
+    answer = str(correct_answer).strip()
+    if re.fullmatch(r'[A-Ea-e]', answer):
+        return 'class'
+    if re.fullmatch(r'[01]{8}', answer):
+        return 'binary'
+    if re.fullmatch(r'\d+', answer):
+        return 'number'
+    if re.fullmatch(r'[\d.]+/\d{1,2}', answer):
+        return 'cidr'
+    if RANGE.search(answer) and len(_addresses(answer) or []) == 2:
+        return 'range'
+    if re.fullmatch(r'[\d.]+', answer) and _addresses(answer):
+        return 'mask' if _is_mask(_addresses(answer)[0]) and answer.startswith('255.') else 'address'
+    if re.fullmatch(r'[A-Za-z ,]+', answer) and ORDINALS.search(answer) and 'octet' in answer.lower():
+        return 'octets'
+    return 'text'
+
+
+def parse(text, kind):
+    """Typed value of an answer for a kind, or None if the text does not hold one
+
+    Questions and negations hold no answer, whatever values they mention.
+    """
+    text = str(text).replace('\u2019', "'")
+    if '?' in text or NEGATION.search(text.lower()):
+        return None
+    return PARSERS[kind](text)
+
+
+@lru_cache(maxsize=4096)
+def _expected(correct_answer):
+    kind = answer_kind(correct_answer)
+    return kind, parse(correct_answer, kind)
+
+
+def matches(user_answer, correct_answer):
+    """True if the student's answer has the same value as the correct answer"""
+    kind, expected = _expected(str(correct_answer).strip())
+    value = parse(user_answer, kind)
+    if value is None:
+        ANSWER_CHECKS.inc(kind, 'unparsed')
+        return False
+    correct = value == expected
+    ANSWER_CHECKS.inc(kind, 'correct' if correct else 'incorrect')
+    return correct
@@ -20,20 +20,25 @@ from flask import Flask, render_template_string, request, session, redirect, url
 from functools import wraps
 import os
 import secrets
+from session_store import create_session_interface
+from structured_logging import configure_logging
 
 # Import agent blueprints
 from agent1_blueprint import agent1_bp
 from agent2_blueprint import agent2_bp
 from agent3_blueprint import agent3_bp
 from agent4_blueprint import agent4_bp
+from metrics_blueprint import metrics_bp
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
 
-# Initialize Anthropic client (shared by all agents)
-from anthropic import Anthropic
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# JSON logs written by a background thread, tagged with request IDs
+configure_logging(app)
+
+# Keep session data server-side; only the session ID goes in the cookie
+app.session_interface = create_session_interface()
 
 # Authentication
 USERNAME = "Student12345"
@@ -53,6 +58,9 @@ app.register_blueprint(agent2_bp, url_prefix='/agent2')
 app.register_blueprint(agent3_bp, url_prefix='/agent3')
 app.register_blueprint(agent4_bp, url_prefix='/agent4')
 
+# Prometheus metrics at /metrics; also times every request
+app.register_blueprint(metrics_bp)
+
 #═══════════════════════════════════════════════════════════════════════
 # LOGIN & MENU
 #═══════════════════════════════════════════════════════════════════════
@@ -0,0 +1,117 @@
+"""
+LLM Circuit Breaker - stops sending calls to an upstream that is failing
+
+The gateway records the outcome and latency of every upstream attempt. When
+too many recent calls failed or were slow, the breaker opens and calls fail
+immediately with CircuitOpenError instead of queueing behind a struggling
+API. The blueprints catch that and serve a local fallback hint
+(fallback_hints.py). After a cool-down one probe call is let through; its
+result closes the breaker again or re-opens it.
+
+Configuration (environment variables):
+  LLM_BREAKER_WINDOW         Seconds of history considered (default 60)
+  LLM_BREAKER_MIN_CALLS      Calls in the window before it can trip (default 10)
+  LLM_BREAKER_FAILURE_RATIO  Failed-or-slow share that trips it (default 0.5)
+  LLM_BREAKER_SLOW_CALL      Seconds after which a call counts as slow (default 20)
+  LLM_BREAKER_OPEN_SECONDS   Cool-down before the half-open probe (default 30)
+"""
+
+from collections import deque
+import logging
+import os
+import threading
+import time
+from llm_limiter import LLMBusyError
+
+log = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(LLMBusyError):
+    """Raised instead of calling upstream while the breaker is open"""
+
+
+class CircuitBreaker:
+    """Rolling-window failure/latency breaker with a single half-open probe"""
+
+    def __init__(self, window, min_calls, failure_ratio, slow_call, open_seconds):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started = None
+        self.trips = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError()
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reports is replaced
+                if self._probe_started is not None and now - self._probe_started < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError()
+                self._probe_started = now
+
+    def record(self, ok, duration):
+        """Report one upstream attempt; slow successes count as failures"""
+        failed = not ok or duration > self.slow_call
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    log.info("Circuit breaker closed after a successful probe")
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((now, failed))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+            failures = sum(1 for _, f in self._calls if f)
+            if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_ratio:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.trips += 1
+        log.warning("Circuit breaker opened for %ss", self.open_seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'recent_calls': len(self._calls),
+                'recent_failures': sum(1 for _, f in self._calls if f),
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
+
+
+breaker = CircuitBreaker(
+    window=float(os.environ.get('LLM_BREAKER_WINDOW', 60)),
+    min_calls=int(os.environ.get('LLM_BREAKER_MIN_CALLS', 10)),
+    failure_ratio=float(os.environ.get('LLM_BREAKER_FAILURE_RATIO', 0.5)),
+    slow_call=float(os.environ.get('LLM_BREAKER_SLOW_CALL', 20)),
+    open_seconds=float(os.environ.get('LLM_BREAKER_OPEN_SECONDS', 30))
+)
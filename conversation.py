@@ -0,0 +1,107 @@
+"""
+Conversation Memory - server-held chat history for the tutors
+
+ConversationMemory (agent3): instead of re-sending every past context message
+and reply, a conversation keeps a short window of raw exchanges for the
+current part only. Finished parts collapse into one-line summaries. The prompt
+sent each turn is then summaries + window + the current part's context, which
+stays roughly constant in size over a 12-part problem.
+
+ConversationLog (agent4): a conversation resource with an ID whose messages
+carry sequence numbers. Clients send only the new message and ask for
+"everything after seq N" to resync after a reconnect.
+
+State is a plain JSON-serializable dict so it can live in the session.
+
+Configuration (environment variables):
+  CONVERSATION_MAX_TURNS      Messages kept in the current part's window (default 6)
+  CONVERSATION_TOKEN_BUDGET   Estimated tokens allowed for that window (default 1200)
+"""
+
+import os
+import secrets
+import time
+from prompt_builder import estimate_tokens
+
+MAX_TURNS = int(os.environ.get('CONVERSATION_MAX_TURNS', 6))
+TOKEN_BUDGET = int(os.environ.get('CONVERSATION_TOKEN_BUDGET', 1200))
+
+
+class ConversationMemory:
+    """Wraps a session dict holding part summaries and the current window"""
+
+    def __init__(self, state, max_turns=MAX_TURNS, token_budget=TOKEN_BUDGET):
+        self.state = state
+        self.state.setdefault('summaries', [])
+        self.state.setdefault('window', [])
+        self.state.setdefault('dropped', 0)
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+
+    def add_exchange(self, student_text, reply):
+        """Record one student message and the tutor's reply, then trim"""
+        self.state['window'].append({'role': 'user', 'content': student_text})
+        self.state['window'].append({'role': 'assistant', 'content': reply})
+        self._trim()
+
+    def close_part(self, summary):
+        """Collapse the current part's window into a one-line summary"""
+        self.state['summaries'].append(summary)
+        self.state['window'] = []
+        self.state['dropped'] = 0
+
+    def _trim(self):
+        # Drop whole exchanges (user + assistant) from the front of the window
+        window = self.state['window']
+        while len(window) > 2 and (
+                len(window) > self.max_turns or
+                sum(estimate_tokens(m['content']) for m in window) > self.token_budget):
+            del window[:2]
+            self.state['dropped'] += 1
+
+    def build_messages(self, context_message):
+        """Messages for the next call: window, then summaries + current context"""
+        preamble = ''
+        if self.state['summaries']:
+            preamble += "PROGRESS SO FAR:\n" + "\n".join(f"- {s}" for s in self.state['summaries']) + "\n"
+        if self.state['dropped']:
+            preamble += f"({self.state['dropped']} earlier exchange(s) on this part omitted)\n"
+        return list(self.state['window']) + [{
+            'role': 'user',
+            'content': preamble + context_message
+        }]
+
+
+def new_conversation(**fields):
+    """State dict for a new conversation with a random, unguessable ID"""
+    return dict(fields, id=secrets.token_urlsafe(12), created_at=time.time(), messages=[])
+
+
+class ConversationLog:
+    """Wraps a conversation state dict; every message gets a sequence number"""
+
+    def __init__(self, state):
+        self.state = state
+
+    @property
+    def id(self):
+        return self.state['id']
+
+    @property
+    def last_seq(self):
+        messages = self.state['messages']
+        return messages[-1]['seq'] if messages else 0
+
+    def append(self, role, content):
+        """Add a message and return its sequence number"""
+        seq = self.last_seq + 1
+        self.state['messages'].append({'seq': seq, 'role': role, 'content': content})
+        return seq
+
+    def since(self, seq):
+        """Messages a client that has seen up to seq is missing"""
+        return [m for m in self.state['messages'] if m['seq'] > seq]
+
+    def history(self):
+        """Messages in Messages API form"""
+        return [{'role': m['role'], 'content': m['content']} for m in self.state['messages']]
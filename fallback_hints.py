@@ -0,0 +1,274 @@
+"""
+Fallback Hints - deterministic local hints for when Claude is unavailable
+
+Used when an LLM call fails or the circuit breaker is open. Each builder
+turns the question or problem data into a list of worked steps. The hint
+level then decides how much of the worked solution to reveal, following the
+same 5-level progression the tutors ask Claude for:
+
+  1 - a gentle nudge (method only)
+  2 - the first step
+  3 - the first half of the steps
+  4 - every step except the last
+  5 - the complete worked answer
+"""
+
+import logging
+import re
+from problem_generator import OCTET_NAMES, ordinal
+from subnet_calc import SubnetRanges, address_class, format_address
+
+log = logging.getLogger(__name__)
+
+POWERS = [128, 64, 32, 16, 8, 4, 2, 1]
+CLASS_RANGES = "Class A: 1-127, Class B: 128-191, Class C: 192-223, Class D: 224-239, Class E: 240-255"
+DEFAULT_NETWORK_BITS = {'A': 8, 'B': 16, 'C': 24}
+
+NOTICE = "⚠️ The AI tutor is busy right now, so here is a hint from the lesson notes.\n\n"
+
+
+def reveal(tip, steps, answer, level):
+    """Text for one hint level, showing progressively more of the steps"""
+    level = max(1, min(level, 5))
+    if level == 1 or not steps:
+        shown = []
+    elif level == 2:
+        shown = steps[:1]
+    elif level == 3:
+        shown = steps[:(len(steps) + 1) // 2]
+    elif level == 4:
+        shown = steps[:-1] or steps[:1]
+    else:
+        shown = steps
+    text = NOTICE + f"💡 Hint level {level}: {tip}"
+    if shown:
+        text += "\n\n" + "\n".join(f"Step {i}: {step}" for i, step in enumerate(shown, 1))
+    if level == 5:
+        text += f"\n\n✅ Answer: {answer}"
+    elif level > 1:
+        text += "\n\nTry the next step yourself!"
+    return text
+
+
+# ── Agent 1: binary conversion and address classification quizzes ──
+
+def _binary_to_decimal(m, answer):
+    bits = m.group(1)
+    steps = ["Line up the bits under the Binary Value Line: " +
+             ", ".join(f"{value}:{bit}" for value, bit in zip(POWERS, bits))]
+    total = 0
+    for value, bit in zip(POWERS, bits):
+        if bit == '1':
+            total += value
+            steps.append(f"There is a 1 under {value}, so add {value} (running total {total})")
+    return "Write the bits under 128 | 64 | 32 | 16 | 8 | 4 | 2 | 1 and add the values that sit under a 1.", steps
+
+
+def _decimal_to_binary(m, answer):
+    remaining = int(m.group(1))
+    steps = []
+    for value in POWERS:
+        if remaining >= value:
+            steps.append(f"{value} fits into {remaining}: write 1, {remaining} - {value} = {remaining - value}")
+            remaining -= value
+        else:
+            steps.append(f"{value} does not fit into {remaining}: write 0")
+    return "Use the subtraction method: walk 128 | 64 | ... | 1 and subtract each value that fits.", steps
+
+
+def _classify(m, answer):
+    first = int(m.group(1))
+    return "Only the first octet decides the class. Compare it with the class ranges.", [
+        f"The first octet is {first}",
+        f"The ranges are {CLASS_RANGES}",
+        f"{first} falls in the Class {answer} range"
+    ]
+
+
+def _default_mask(m, answer):
+    first = int(m.group(1))
+    cls = address_class(first << 24)
+    return "Find the class from the first octet, then use that class's default mask.", [
+        f"The first octet is {first}, so this is a Class {cls} address ({CLASS_RANGES})",
+        "Default masks: Class A 255.0.0.0, Class B 255.255.0.0, Class C 255.255.255.0",
+        f"The default mask for Class {cls} is {answer}"
+    ]
+
+
+def _address_portion(m, answer, keep_network):
+    octets = m.group(1).split('.')
+    mask = m.group(2).split('.')
+    steps = []
+    for name, octet, mask_octet in zip(OCTET_NAMES, octets, mask):
+        in_network = mask_octet == '255'
+        kept = octet if in_network == keep_network else '0'
+        part = 'network' if in_network else 'host'
+        steps.append(f"{name} octet: mask {mask_octet} means {part} octet, so write {kept}")
+    portion = 'network' if keep_network else 'host'
+    return (f"Line the address up with the mask. Keep the {portion} octets and write 0 for the rest.", steps)
+
+
+def _octet_names(m, answer, network):
+    first = int(m.group(1))
+    cls = address_class(first << 24)
+    pattern = {'A': 'N.H.H.H', 'B': 'N.N.H.H', 'C': 'N.N.N.H'}[cls]
+    portion = 'network' if network else 'host'
+    return f"The class decides which octets are {portion} octets.", [
+        f"The first octet is {first}, so this is Class {cls}",
+        f"Class {cls} follows the pattern {pattern} (N = network, H = host)",
+        f"So the {portion} portion is the {answer}"
+    ]
+
+
+AGENT1_BUILDERS = [
+    (r'Binary to Decimal:\s*([01]{8})', _binary_to_decimal),
+    (r'Decimal to Binary:\s*(\d+)', _decimal_to_binary),
+    (r'class type:\s*(\d+)\.', _classify),
+    (r'Default Subnet Mask for:\s*(\d+)\.', _default_mask),
+    (r'network portion:\s*([\d.]+) with mask ([\d.]+)', lambda m, a: _address_portion(m, a, True)),
+    (r'host portion:\s*([\d.]+) with mask ([\d.]+)', lambda m, a: _address_portion(m, a, False)),
+    (r'network portion octet:\s*(\d+)\.', lambda m, a: _octet_names(m, a, True)),
+    (r'host portion octet:\s*(\d+)\.', lambda m, a: _octet_names(m, a, False)),
+]
+
+
+def agent1_hint(question, answer, attempt):
+    """Fallback hint for an agent1 quiz question"""
+    for pattern, builder in AGENT1_BUILDERS:
+        m = re.search(pattern, question)
+        if m:
+            tip, steps = builder(m, answer)
+            return reveal(tip, steps, answer, attempt)
+    return reveal("Use the Powers of 2 Matrix: 128 | 64 | 32 | 16 | 8 | 4 | 2 | 1.", [], answer, attempt)
+
+
+# ── Agents 2 and 3: custom subnet mask problems ──
+
+def _custom_mask_steps(default_bits, borrowed):
+    steps = []
+    remaining = borrowed
+    for index in range(default_bits // 8, 4):
+        taken = min(8, remaining)
+        remaining -= taken
+        if taken:
+            value = 256 - 2 ** (8 - taken)
+            steps.append(f"{OCTET_NAMES[index]} octet: turn on {taken} bit(s) = {value}")
+    return steps
+
+
+def _subnet_steps(problem, part):
+    """(tip, steps) for parts 1-8 shared by agent2 and agent3, and agent2 parts 9-10"""
+    a = problem['answers']
+    cls = a['part1']
+    first = problem['network_address'].split('.')[0]
+    default_bits = DEFAULT_NETWORK_BITS.get(cls, 24)
+    borrowed = int(a['part3'])
+    host_bits = int(a['part4'])
+
+    if part == 'part1':
+        return "Look only at the first octet of the network address.", [
+            f"The first octet of {problem['network_address']} is {first}",
+            f"The ranges are {CLASS_RANGES}",
+            f"{first} is in the Class {cls} range"]
+    if part == 'part2':
+        return "Each class has a fixed default mask.", [
+            f"The address is Class {cls} (Part 1)",
+            "Class A → 255.0.0.0, Class B → 255.255.0.0, Class C → 255.255.255.0",
+            f"So the default mask is {a['part2']}"]
+    if part == 'part3':
+        return "Borrow enough bits that 2^bits covers the subnets needed.", [
+            f"The problem needs {problem['subnets_needed']} subnets",
+            "Walk up the Powers of 2 until you reach at least that many",
+            f"2^{borrowed} = {a['part5']}, which covers {problem['subnets_needed']} subnets",
+            f"So you borrow {borrowed} bits"]
+    if part == 'part4':
+        return "Host bits are whatever is left after borrowing subnet bits.", [
+            f"Class {cls} has {32 - default_bits} host bits in the default mask",
+            f"You borrowed {borrowed} bits for subnets (Part 3)",
+            f"{32 - default_bits} - {borrowed} = {host_bits} host bits"]
+    if part == 'part5':
+        return "Total subnets = 2^(borrowed bits).", [
+            f"You borrowed {borrowed} bits (Part 3)",
+            f"2^{borrowed} = {a['part5']}"]
+    if part == 'part6':
+        return "Total addresses per subnet = 2^(host bits).", [
+            f"You have {host_bits} host bits (Part 4)",
+            f"2^{host_bits} = {a['part6']}"]
+    if part == 'part7':
+        return "Usable addresses = total addresses - 2. NEVER forget the minus 2!", [
+            f"Each subnet has {a['part6']} total addresses (Part 6)",
+            "Subtract the network ID and the broadcast address",
+            f"{a['part6']} - 2 = {a['part7']}"]
+    if part == 'part8':
+        return "Start from the default mask and turn on the borrowed bits from left to right.", [
+            f"The default mask is {a['part2']}",
+            f"Turn on {borrowed} borrowed bit(s) after the default network bits"
+        ] + _custom_mask_steps(default_bits, borrowed) + [f"The custom mask is {a['part8']}"]
+    if part == 'part9':
+        return "Network bits = default network bits + borrowed bits.", [
+            f"Class {cls} has {default_bits} default network bits",
+            f"Add the {borrowed} borrowed bits (Part 3)",
+            f"{default_bits} + {borrowed} = {a['part9']}"]
+    if part == 'part10':
+        return "Write N for network octets, s for each borrowed bit and h for each host bit.", [
+            f"Class {cls} keeps {default_bits // 8} network octet(s): write N for each",
+            f"Then write s {borrowed} time(s) for the borrowed bits",
+            f"Then write h {host_bits} time(s) for the host bits (a whole host octet is written H)",
+            f"Grouped by octet: {a['part10']}"]
+    return "Work through the problem with the Subnetting Matrix.", []
+
+
+def subnet_part_hint(problem, part, attempt):
+    """Fallback hint for one part of a custom subnet mask problem"""
+    tip, steps = _subnet_steps(problem, part)
+    return reveal(tip, steps, problem['answers'][part], attempt)
+
+
+def subnet_range_hint(problem, part, question, attempt):
+    """Fallback hint for an agent3 Nth-subnet question (parts 9-12)"""
+    answer = problem['answers'][part]
+    m = re.search(r'(\d+)(?:st|nd|rd|th)', question)
+    ranges = SubnetRanges(problem['network_address'], int(problem['answers']['part3']))
+    if not m or not 1 <= int(m.group(1)) <= ranges.count:
+        return reveal("Count subnets in steps of the block size, starting at subnet zero.", [], answer, attempt)
+    n = int(m.group(1))
+    subnet_id, broadcast = ranges.subnet_range(n)
+    first, last = ranges.usable_range(n)
+    steps = [
+        f"Each subnet has {ranges.size} addresses (Part 6) - that is the block size",
+        f"The 1st subnet is subnet zero and starts at {format_address(ranges.start)}",
+        f"The {ordinal(n)} subnet starts {n - 1} x {ranges.size} = {(n - 1) * ranges.size} addresses later, at {subnet_id}",
+    ]
+    lowered = question.lower()
+    if 'broadcast' in lowered or 'range' in lowered or 'assignable' in lowered:
+        steps.append(f"Its broadcast is one less than the next subnet ID: {broadcast}")
+    if 'assignable' in lowered or 'usable' in lowered:
+        steps.append(f"Usable hosts run from the ID + 1 to the broadcast - 1: {first} to {last}")
+    return reveal("Find the block size, then count subnets from subnet zero.", steps, answer, attempt)
+
+
+# ── Agent 4: VLSM parts already carry written hints ──
+
+def vlsm_hint(part, level):
+    """Fallback hint for an agent4 VLSM part from its written hint levels"""
+    level = max(1, min(level, 5))
+    return NOTICE + f"💡 Hint level {level}:\n{part[f'hint_level_{level}']}"
+
+
+def correct_reply(answer):
+    """Confirmation used when Claude would have celebrated a correct answer"""
+    return f"✅ Correct! {answer} is right!"
+
+
+def stream_with_fallback(chunks, fallback):
+    """Pass chunks through; if the call fails before any text, yield fallback instead"""
+    started = False
+    try:
+        for chunk in chunks:
+            started = True
+            yield chunk
+    except Exception as e:
+        if started:
+            raise
+        log.warning("LLM unavailable, serving fallback hint: %s", e)
+        yield fallback
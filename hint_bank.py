@@ -0,0 +1,81 @@
+"""
+Pregenerated Hint Bank - hints produced offline by pregenerate_hints.py
+
+The blueprints look up answer-attempt hints here before calling Claude, so
+the common path (a wrong answer at hint level N) is a dictionary lookup.
+Live LLM calls are left for free-form questions and for items not in the bank.
+
+Data file layout (JSON):
+  {
+    "format": 1,
+    "version": "20261018-153000",
+    "model": "claude-sonnet-4-6",
+    "hints": {"agent1": {"<item>": {"1": "...", ..., "5": "..."}}, ...}
+  }
+
+Configuration (environment variables):
+  HINT_BANK_PATH    Data file to load (default hint_bank.json next to this file)
+"""
+
+from datetime import datetime, timezone
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hint_bank.json')
+HINT_BANK_PATH = os.environ.get('HINT_BANK_PATH', DEFAULT_PATH)
+
+_hints = {}
+_version = None
+
+
+def load(path=HINT_BANK_PATH):
+    """Load a bank file, replacing whatever is currently loaded"""
+    global _hints, _version
+    if not os.path.exists(path):
+        _hints, _version = {}, None
+        return
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT_VERSION:
+            raise ValueError(f"unsupported format {data.get('format')}")
+        _hints, _version = data['hints'], data.get('version')
+    except (OSError, ValueError, KeyError) as e:
+        log.warning("Ignoring hint bank %s: %s", path, e)
+        _hints, _version = {}, None
+
+
+def save(hints, path=HINT_BANK_PATH, model=None):
+    """Write a bank file atomically and return its version string"""
+    version = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+    data = {
+        'format': FORMAT_VERSION,
+        'version': version,
+        'model': model,
+        'hints': hints
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+    return version
+
+
+def lookup(agent, item, attempt):
+    """Return the pregenerated hint for this item and hint level, or None"""
+    return _hints.get(agent, {}).get(str(item), {}).get(str(min(attempt, 5)))
+
+
+def info():
+    """Version and item counts of the loaded bank"""
+    return {
+        'version': _version,
+        'items': {agent: len(items) for agent, items in _hints.items()}
+    }
+
+
+load()
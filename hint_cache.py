@@ -0,0 +1,122 @@
+"""
+Hint Response Cache - in-process LRU + TTL cache in front of the LLM
+
+Agent1 and agent2 hint prompts are fully determined by the question/part,
+the attempt level and the student's answer. When a lab full of students types
+the same wrong answer, the reply is served from here instead of a new API call.
+
+Configuration (environment variables):
+  HINT_CACHE_SIZE   Max cached replies per worker (default 2048, 0 disables)
+  HINT_CACHE_TTL    Seconds a cached reply stays valid (default 3600)
+"""
+
+from collections import OrderedDict
+import os
+import re
+import threading
+import time
+import llm_gateway
+
+
+class HintCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached reply for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, text = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return text
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        """Store a reply, evicting the least recently used entries if full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for monitoring the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+
+hint_cache = HintCache(
+    max_size=int(os.environ.get('HINT_CACHE_SIZE', 2048)),
+    ttl=float(os.environ.get('HINT_CACHE_TTL', 3600))
+)
+
+
+def canonicalize_answer(answer):
+    """Normalize a student answer so trivially different spellings share a key"""
+    text = re.sub(r'\s+', ' ', str(answer).strip().lower())
+    text = re.sub(r'\s*([./:-])\s*', r'\1', text)
+    return text.rstrip('.!?')
+
+
+def make_key(agent, item, attempt, answer):
+    """Cache key: (agent, question/part, hint level, canonical answer)"""
+    return (agent, item, min(attempt, 5), canonicalize_answer(answer))
+
+
+def complete(key, **request):
+    """Return a cached reply or fetch one through the gateway and cache it"""
+    text = hint_cache.get(key)
+    if text is None:
+        text = llm_gateway.complete(**request)
+        hint_cache.put(key, text)
+    return text
+
+
+def stream(key, **request):
+    """Streaming counterpart of complete(); a hit is sent as a single chunk"""
+    text = hint_cache.get(key)
+    if text is not None:
+        yield text
+        return
+    parts = []
+    chunks = llm_gateway.stream(**request)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration as finished:
+            stop_reason = finished.value
+            break
+        parts.append(chunk)
+        yield chunk
+    # complete() trims a reply cut off by its budget; a streamed one was
+    # already sent as-is, so it is not replayed to later students
+    if stop_reason != 'max_tokens':
+        hint_cache.put(key, ''.join(parts))
@@ -0,0 +1,404 @@
+"""
+Shared LLM Gateway - one pooled Anthropic client for every agent
+
+All four blueprints send their Claude calls through this module, so each
+worker process holds a single HTTP connection pool (with keep-alive) instead
+of one client per agent. Timeouts and pool limits are configured here; every
+call also passes through the concurrency limiter and retry policy in
+llm_limiter.py and the circuit breaker in circuit_breaker.py. Identical
+requests already in flight are coalesced into one call (single_flight.py).
+Call durations, time to first token and token usage go to metrics.py.
+Unless a caller names a model, model_router.py picks one from the agent and
+hint level; reply_budget.py caps the reply length for that level, and
+prompt_builder.py keeps the input within LLM_INPUT_BUDGET. Callers can pass
+a ToolSet (subnet_calc.py); tool calls the model makes are run locally and
+their results sent back until it writes its reply.
+
+Configuration (environment variables):
+  ANTHROPIC_API_KEY       API key used by the shared client
+  LLM_BASE_URL            Send requests here instead of the Anthropic API,
+                          e.g. http://127.0.0.1:8085 for mock_anthropic.py
+  LLM_TIMEOUT             Read/write timeout in seconds (default 60)
+  LLM_CONNECT_TIMEOUT     Connect timeout in seconds (default 5)
+  LLM_MAX_CONNECTIONS     Max open connections in the pool (default 20)
+  LLM_MAX_KEEPALIVE       Idle keep-alive connections kept open (default 10)
+  LLM_KEEPALIVE_EXPIRY    Seconds an idle connection stays open (default 30)
+"""
+
+from anthropic import Anthropic, DefaultHttpxClient, Timeout, DEFAULT_CONNECTION_LIMITS
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from llm_limiter import LLMBusyError, limiter, backoff_delay, give_up, is_retryable
+from circuit_breaker import breaker
+from single_flight import in_flight
+from model_router import router, DEFAULT_TIERS, FULL
+import metrics
+import reply_budget
+import prompt_builder
+from subnet_calc import MAX_TOOL_ROUNDS
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MODEL = DEFAULT_TIERS[FULL]
+
+# Pool limits class of whichever httpx build the SDK ships with
+Limits = type(DEFAULT_CONNECTION_LIMITS)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _build_client():
+    """Build the Anthropic client on top of a bounded keep-alive pool"""
+    timeout = Timeout(
+        _env_float("LLM_TIMEOUT", 60),
+        connect=_env_float("LLM_CONNECT_TIMEOUT", 5)
+    )
+    limits = Limits(
+        max_connections=_env_int("LLM_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("LLM_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("LLM_KEEPALIVE_EXPIRY", 30)
+    )
+    http_client = DefaultHttpxClient(limits=limits, timeout=timeout)
+    return Anthropic(
+        api_key=os.environ.get("ANTHROPIC_API_KEY"),
+        base_url=os.environ.get("LLM_BASE_URL") or None,
+        http_client=http_client,
+        timeout=timeout,
+        # Retries happen in the gateway, outside the concurrency slot
+        max_retries=0
+    )
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use.
+
+    The client is rebuilt after a fork (e.g. gunicorn --preload) so worker
+    processes never share sockets with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = _build_client()
+                _client_pid = pid
+    return _client
+
+
+# Marks a block as the end of a cacheable prompt prefix
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+class PromptCacheStats:
+    """Per-agent prompt-cache counters taken from each response's usage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_agent = {}
+
+    def record(self, agent, usage):
+        read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        written = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        uncached = getattr(usage, 'input_tokens', 0) or 0
+        with self._lock:
+            stats = self._by_agent.setdefault(agent or 'unknown', {
+                'requests': 0,
+                'cache_hits': 0,
+                'cache_read_tokens': 0,
+                'cache_write_tokens': 0,
+                'uncached_input_tokens': 0
+            })
+            stats['requests'] += 1
+            stats['cache_hits'] += 1 if read else 0
+            stats['cache_read_tokens'] += read
+            stats['cache_write_tokens'] += written
+            stats['uncached_input_tokens'] += uncached
+
+    def snapshot(self):
+        """Copy of the counters plus the share of input tokens read from cache"""
+        with self._lock:
+            result = {}
+            for agent, stats in self._by_agent.items():
+                total = stats['cache_read_tokens'] + stats['cache_write_tokens'] + stats['uncached_input_tokens']
+                result[agent] = dict(stats, cached_token_ratio=stats['cache_read_tokens'] / total if total else 0.0)
+            return result
+
+
+prompt_cache_stats = PromptCacheStats()
+
+LLM_DURATION = metrics.Histogram(
+    'llm_request_duration_seconds', "Upstream Messages API call duration per attempt",
+    ('agent', 'tier', 'model', 'kind', 'outcome'))
+LLM_TTFT = metrics.Histogram(
+    'llm_time_to_first_token_seconds', "Seconds from sending a streamed request to its first text",
+    ('agent', 'tier', 'model'))
+LLM_TOKENS = metrics.Counter(
+    'llm_tokens_total', "Tokens per agent, model and hint level (input, output, cache_read, cache_write)",
+    ('agent', 'model', 'level', 'type'))
+LLM_REPLY_TOKENS = metrics.Histogram(
+    'llm_reply_tokens', "Output tokens per reply, for tuning the per-level budgets",
+    ('agent', 'level'), buckets=(25, 50, 100, 150, 200, 300, 450, 700, 1000, 1500, 2000))
+LLM_STOP_REASONS = metrics.Counter(
+    'llm_stop_reasons_total', "Why replies ended (end_turn, max_tokens, stop_sequence)",
+    ('agent', 'level', 'reason'))
+
+
+def _record_reply(agent, model, level, message):
+    """Cache stats, token counts, reply length and stop reason of one response"""
+    usage = message.usage
+    prompt_cache_stats.record(agent, usage)
+    agent = agent or 'unknown'
+    level = 'none' if level is None else str(level)
+    for kind, field in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                        ('cache_read', 'cache_read_input_tokens'), ('cache_write', 'cache_creation_input_tokens')):
+        LLM_TOKENS.inc(agent, model, level, kind, amount=getattr(usage, field, 0) or 0)
+    LLM_REPLY_TOKENS.observe(getattr(usage, 'output_tokens', 0) or 0, agent, level)
+    LLM_STOP_REASONS.inc(agent, level, message.stop_reason or 'unknown')
+
+
+def _system_blocks(system, context):
+    """Static system prompt, then optional per-problem context, both cacheable"""
+    blocks = [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+    if context:
+        blocks.append({"type": "text", "text": context, "cache_control": CACHE_CONTROL})
+    return blocks
+
+
+def _cache_last_turn(messages):
+    """Copy of messages with a cache breakpoint on the final turn.
+
+    Used for multi-turn conversations so the next turn can read everything
+    before it from the cache instead of reprocessing the whole history. Only
+    pays off when the caller sends every turn back unchanged on the next
+    call; agent3 rewrites its final turn (context, length instruction), so
+    it caches the system and context blocks only.
+    """
+    if not messages:
+        return messages
+    last = dict(messages[-1])
+    content = last['content']
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = [dict(block) for block in content]
+    content[-1]['cache_control'] = CACHE_CONTROL
+    last['content'] = content
+    return list(messages[:-1]) + [last]
+
+
+def _route(model, agent, level):
+    """(tier, model): an explicit model wins over the routing policy"""
+    if model is not None:
+        return 'custom', model
+    return router.route(agent, level)
+
+
+def _request_params(system, messages, max_tokens, model, context, cache_history, level, agent, tools):
+    """max_tokens is the caller's ceiling; the hint level's budget usually lowers it"""
+    budget, instruction = reply_budget.for_level(level)
+    messages = prompt_builder.fit_to_budget(system, context, messages, agent)
+    messages = reply_budget.with_length_instruction(messages, instruction)
+    params = {
+        'model': model,
+        'max_tokens': min(max_tokens, budget),
+        'stop_sequences': reply_budget.STOP_SEQUENCES,
+        'system': _system_blocks(system, context),
+        'messages': _cache_last_turn(messages) if cache_history else messages
+    }
+    if tools is not None:
+        # Tool definitions sit before the system prompt, inside its cached prefix
+        params['tools'] = tools.definitions
+    return params
+
+
+def _round_params(params):
+    """Params as sent for one round of the tool loop.
+
+    While the model may still call a tool, the round gets TOOL_ROUND_RESERVE
+    tokens on top of the reply budget so a tool_use block is not cut off at
+    max_tokens. The last round (tools off) and calls without tools get the
+    reply budget as-is.
+    """
+    if 'tools' not in params or 'tool_choice' in params:
+        return params
+    return dict(params, max_tokens=params['max_tokens'] + reply_budget.TOOL_ROUND_RESERVE)
+
+
+def _with_tool_results(params, response, tools, last_round):
+    """Params for the next round: the model's tool calls and their results appended.
+
+    On the last allowed round the model must answer without calling more tools.
+    """
+    calls = [block for block in response.content if block.type == 'tool_use']
+    params = dict(params, messages=params['messages'] + [
+        {"role": "assistant", "content": [block.model_dump(exclude_none=True) for block in response.content]},
+        {"role": "user", "content": [tools.run(block) for block in calls]}
+    ])
+    if last_round:
+        params['tool_choice'] = {"type": "none"}
+    return params
+
+
+def _flight_key(kind, params):
+    """Identical requests hash to the same key"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return kind, hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def create_message(system, messages, max_tokens, model=None, agent=None,
+                   context=None, cache_history=False, level=None, tools=None):
+    """Send one Messages API request through the shared client.
+
+    The system prompt and optional per-problem context are sent as cacheable
+    prefix blocks; cache_history also caches the conversation so far.
+    Without a model, the routing policy picks one for agent and level
+    (the hint level, None for free-form questions). With tools, tool calls
+    are answered locally (up to LLM_MAX_TOOL_ROUNDS) and the final response
+    is returned.
+    Raises LLMBusyError when the call is shed or stays rate limited, and
+    CircuitOpenError while the upstream is considered down.
+    """
+    tier, model = _route(model, agent, level)
+    params = _request_params(system, messages, max_tokens, model, context, cache_history, level, agent, tools)
+    for round_number in range(1, MAX_TOOL_ROUNDS + 2):
+        request = _round_params(params)
+        response = in_flight.do(_flight_key('create', request),
+                                lambda request=request: _create_upstream(request, agent, level, tier))
+        if tools is None or response.stop_reason != 'tool_use':
+            break
+        params = _with_tool_results(params, response, tools, round_number >= MAX_TOOL_ROUNDS)
+    return response
+
+
+def _create_upstream(params, agent, level, tier):
+    labels = (agent or 'unknown', tier, params['model'], 'create')
+    attempt = 0
+    while True:
+        try:
+            breaker.before_call()
+            with limiter.slot():
+                started_at = time.monotonic()
+                try:
+                    response = get_client().messages.create(**params)
+                except Exception as e:
+                    LLM_DURATION.observe(time.monotonic() - started_at, *labels, 'error')
+                    if is_retryable(e):
+                        breaker.record(False, time.monotonic() - started_at)
+                    raise
+                LLM_DURATION.observe(time.monotonic() - started_at, *labels, 'ok')
+                breaker.record(True, time.monotonic() - started_at)
+            break
+        except LLMBusyError:
+            raise
+        except Exception as e:
+            delay = backoff_delay(e, attempt)
+            if delay is None:
+                raise give_up(e) from e
+            log.info("Retrying %s call in %.2fs after %s", agent, delay, e)
+        # Back off without holding a slot
+        time.sleep(delay)
+        attempt += 1
+    _record_reply(agent, params['model'], level, response)
+    return response
+
+
+def complete(system, messages, max_tokens, model=None, agent=None,
+             context=None, cache_history=False, level=None, tools=None):
+    """Send a request and return the text of the final reply.
+
+    A reply cut off by its token budget is trimmed to its last full sentence.
+    """
+    response = create_message(system, messages, max_tokens, model=model, agent=agent,
+                              context=context, cache_history=cache_history, level=level, tools=tools)
+    text = ''.join(block.text for block in response.content if block.type == 'text')
+    if response.stop_reason == 'max_tokens':
+        text = reply_budget.trim_to_sentence(text)
+    return text
+
+
+def stream(system, messages, max_tokens, model=None, agent=None,
+           context=None, cache_history=False, level=None, tools=None):
+    """Yield text deltas as they arrive from the Messages API.
+
+    Nothing is sent upstream until the generator is first iterated, so a
+    blueprint can hand it straight to a streaming response. Failures are only
+    retried before the first delta has been yielded. The breaker judges
+    latency by time to the first delta. With tools, each tool round is
+    streamed in turn, so text the model writes before a tool call is sent
+    straight away. The generator returns the final stop reason (e.g.
+    'max_tokens' for a reply cut off by its budget).
+    """
+    tier, model = _route(model, agent, level)
+    params = _request_params(system, messages, max_tokens, model, context, cache_history, level, agent, tools)
+    wrote = False
+    for round_number in range(1, MAX_TOOL_ROUNDS + 2):
+        final = None
+        separate = wrote
+        request = _round_params(params)
+        for chunk in in_flight.stream(_flight_key('stream', request),
+                                      lambda request=request: _stream_upstream(request, agent, level, tier)):
+            if not isinstance(chunk, str):
+                final = chunk
+                continue
+            if separate:
+                chunk, separate = "\n\n" + chunk, False
+            wrote = True
+            yield chunk
+        if final is None or final.stop_reason != 'tool_use' or tools is None:
+            return final.stop_reason if final is not None else None
+        params = _with_tool_results(params, final, tools, round_number >= MAX_TOOL_ROUNDS)
+    return final.stop_reason
+
+
+def _stream_upstream(params, agent, level, tier):
+    labels = (agent or 'unknown', tier, params['model'])
+    attempt = 0
+    while True:
+        started = False
+        try:
+            breaker.before_call()
+            with limiter.slot():
+                started_at = time.monotonic()
+                try:
+                    with get_client().messages.stream(**params) as response:
+                        for text in response.text_stream:
+                            if not started:
+                                started = True
+                                LLM_TTFT.observe(time.monotonic() - started_at, *labels)
+                                breaker.record(True, time.monotonic() - started_at)
+                            yield text
+                        if not started:
+                            breaker.record(True, time.monotonic() - started_at)
+                        final = response.get_final_message()
+                        _record_reply(agent, params['model'], level, final)
+                    LLM_DURATION.observe(time.monotonic() - started_at, *labels, 'stream', 'ok')
+                except Exception as e:
+                    LLM_DURATION.observe(time.monotonic() - started_at, *labels, 'stream', 'error')
+                    if is_retryable(e):
+                        breaker.record(False, time.monotonic() - started_at)
+                    raise
+            # stream() needs the model's tool calls and the stop reason
+            yield final
+            return
+        except LLMBusyError:
+            raise
+        except Exception as e:
+            delay = None if started else backoff_delay(e, attempt)
+            if delay is None:
+                raise give_up(e) from e
+            log.info("Retrying %s call in %.2fs after %s", agent, delay, e)
+        time.sleep(delay)
+        attempt += 1
@@ -0,0 +1,161 @@
+"""
+LLM Concurrency Limiter - caps in-flight upstream calls per worker
+
+When a whole class submits at once, every request used to go straight to the
+API and the burst came back as 429 / overloaded errors. The gateway now takes
+a slot from a semaphore before each call. Callers beyond the limit wait in a
+bounded queue, and once the queue is full new calls are shed immediately with
+LLMBusyError. Retryable failures back off with jitter, honoring Retry-After.
+
+Configuration (environment variables):
+  LLM_MAX_CONCURRENT     Upstream calls in flight per worker (default 8)
+  LLM_MAX_QUEUE          Calls allowed to wait for a slot (default 32)
+  LLM_QUEUE_TIMEOUT      Seconds a call waits for a slot before giving up (default 15)
+  LLM_MAX_RETRIES        Retries on 408/409/429/5xx and connection errors (default 2)
+  LLM_RETRY_BASE_DELAY   First backoff in seconds, doubled per retry (default 0.5)
+  LLM_RETRY_MAX_DELAY    Longest wait between retries, incl. Retry-After (default 8)
+"""
+
+from anthropic import APIConnectionError, APIStatusError
+from contextlib import contextmanager
+import email.utils
+import os
+import random
+import threading
+import time
+
+
+class LLMBusyError(Exception):
+    """Raised when an upstream call is shed or keeps being rate limited.
+
+    The message is safe to show to students.
+    """
+
+    def __init__(self, message="The tutor is very busy right now. Please try again in a few seconds."):
+        super().__init__(message)
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.max_concurrent and not self.waiting:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                raise LLMBusyError()
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.active < self.max_concurrent, self.queue_timeout):
+                    self.shed += 1
+                    raise LLMBusyError()
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold one upstream slot for the duration of the block"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'shed': self.shed,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue
+            }
+
+
+limiter = ConcurrencyLimiter(
+    max_concurrent=int(os.environ.get('LLM_MAX_CONCURRENT', 8)),
+    max_queue=int(os.environ.get('LLM_MAX_QUEUE', 32)),
+    queue_timeout=float(os.environ.get('LLM_QUEUE_TIMEOUT', 15))
+)
+
+MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+RETRY_BASE_DELAY = float(os.environ.get('LLM_RETRY_BASE_DELAY', 0.5))
+RETRY_MAX_DELAY = float(os.environ.get('LLM_RETRY_MAX_DELAY', 8))
+
+
+def is_retryable(error):
+    """Same status codes the SDK itself retries, plus connection failures"""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        if error.response.headers.get('x-should-retry') == 'false':
+            return False
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def is_overload(error):
+    """429 rate limit or 529 overloaded - worth telling the student to wait"""
+    return isinstance(error, APIStatusError) and error.status_code in (429, 529)
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, or None"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        return float(headers.get('retry-after-ms')) / 1000
+    except (TypeError, ValueError):
+        pass
+    value = headers.get('retry-after')
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = email.utils.parsedate_tz(value) if value else None
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+
+def backoff_delay(error, attempt):
+    """Seconds to sleep before retry number attempt (0-based), or None to give up.
+
+    Full jitter on an exponential backoff; a Retry-After header sets the floor.
+    A Retry-After longer than RETRY_MAX_DELAY means the request is abandoned.
+    """
+    if attempt >= MAX_RETRIES or not is_retryable(error):
+        return None
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    requested = retry_after(error)
+    if requested is not None:
+        if requested > RETRY_MAX_DELAY:
+            return None
+        delay = max(delay, requested)
+    return delay
+
+
+def give_up(error):
+    """The exception to raise once retries are exhausted"""
+    if is_overload(error):
+        return LLMBusyError()
+    return error
@@ -0,0 +1,295 @@
+"""
+Classroom Load Test - simulates concurrent students across all four agents
+
+Each simulated student logs in through /login with its own cookie jar and
+then loops through realistic flows until the test ends:
+
+  - agent1: new_question -> chat (wrong answers, then the right one)
+  - agent2: load_problem -> select_part -> chat
+  - agent3: /problem/<id> -> chat (questions, wrong and right answers) -> next_part
+  - agent4: get_problem / get_part -> chat in one growing conversation per part
+
+Run it against a local app wired to mock_anthropic.py so no API credit is
+spent, then read off throughput, p50/p95/p99 latency per route and error
+rates to size a Render instance.
+
+Usage:
+  python mock_anthropic.py --port 8085 &
+  LLM_BASE_URL=http://127.0.0.1:8085 ANTHROPIC_API_KEY=mock python app.py &
+  python load_test.py --students 30 --duration 120
+  python load_test.py --students 60 --agents agent2 agent3 --stream --json results.json
+"""
+
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+import urllib.request
+import argparse
+import json
+import random
+import threading
+import time
+import agent1_blueprint
+import agent2_blueprint
+import agent3_blueprint
+import agent4_blueprint
+
+USERNAME = "Student12345"
+PASSWORD = "12345FTCC!@#$%"
+
+FREE_FORM_QUESTIONS = [
+    "Can you explain how the block size works?",
+    "Why do we subtract 2 for usable hosts?",
+    "How do I know how many bits to borrow?",
+    "What does the magic number mean here?"
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latencies and outcomes per route label, shared by every student thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, seconds, status, ok):
+        with self._lock:
+            entry = self.routes.setdefault(route, {'latencies': [], 'errors': 0, 'statuses': {}})
+            entry['latencies'].append(seconds)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            if not ok:
+                entry['errors'] += 1
+
+    def summary(self, elapsed):
+        with self._lock:
+            rows = []
+            for route, entry in sorted(self.routes.items()):
+                latencies = sorted(entry['latencies'])
+                count = len(latencies)
+                rows.append({
+                    'route': route,
+                    'count': count,
+                    'rps': count / elapsed if elapsed else 0.0,
+                    'p50': percentile(latencies, 50),
+                    'p95': percentile(latencies, 95),
+                    'p99': percentile(latencies, 99),
+                    'max': latencies[-1] if latencies else 0.0,
+                    'error_rate': entry['errors'] / count if count else 0.0,
+                    'statuses': {str(k): v for k, v in sorted(entry['statuses'].items(), key=str)}
+                })
+            return rows
+
+
+class StudentClient:
+    """One student's browser: cookie jar plus timed JSON / SSE requests"""
+
+    def __init__(self, base_url, recorder, timeout, stream):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.stream = stream
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def login(self):
+        body = urlencode({'username': USERNAME, 'password': PASSWORD}).encode('utf-8')
+        self._request('/login', body, 'application/x-www-form-urlencoded', 'POST /login')
+
+    def get(self, path, route):
+        return self._request(path, None, None, 'GET ' + route)
+
+    def post(self, path, payload, route):
+        if self.stream and route.endswith('/chat'):
+            payload = dict(payload, stream=True)
+        return self._request(path, json.dumps(payload).encode('utf-8'), 'application/json', 'POST ' + route)
+
+    def _request(self, path, body, content_type, route):
+        request = urllib.request.Request(self.base_url + path, data=body)
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        started = time.monotonic()
+        status, ok, data = 0, False, None
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status = response.status
+                if 'text/event-stream' in response.headers.get('Content-Type', ''):
+                    data, ok = self._read_events(response, route, started)
+                else:
+                    raw = response.read()
+                    ok = True
+                    if 'application/json' in response.headers.get('Content-Type', ''):
+                        data = json.loads(raw)
+        except HTTPError as e:
+            status = e.code
+            e.read()
+        except (URLError, OSError, ValueError) as e:
+            status = type(e).__name__
+        self.recorder.record(route, time.monotonic() - started, status, ok)
+        return data or {}
+
+    def _read_events(self, response, route, started):
+        """Read an SSE reply; records time to first delta and returns the final event"""
+        event, final, ok, first_delta = None, None, True, False
+        for line in response:
+            line = line.decode('utf-8').rstrip('\n')
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: '):
+                if event == 'delta' and not first_delta:
+                    first_delta = True
+                    self.recorder.record(route + ' (first token)', time.monotonic() - started, 200, True)
+                elif event in ('done', 'error'):
+                    final = json.loads(line[6:])
+                    ok = event == 'done'
+        return final, ok
+
+
+def think(rng, think_time):
+    time.sleep(rng.uniform(*think_time))
+
+
+def wrong_answers(rng, choices):
+    return rng.sample(choices, rng.randint(0, min(2, len(choices))))
+
+
+def agent1_flow(client, rng, think_time):
+    quiz_type = rng.choice(list(agent1_blueprint.QUIZ_BANK))
+    data = client.post('/agent1/new_question', {'quiz_type': quiz_type}, '/agent1/new_question')
+    question = data.get('question')
+    if not question:
+        return
+    attempt = 0
+    for answer in wrong_answers(rng, ['0', '1', '255', 'A', '10101010']) + [question['answer']]:
+        think(rng, think_time)
+        reply = client.post('/agent1/chat', {'message': answer, 'question': question, 'attempt': attempt},
+                            '/agent1/chat')
+        attempt = reply.get('attempt', attempt + 1)
+
+
+def agent2_flow(client, rng, think_time):
+    problem_num = rng.choice(list(agent2_blueprint.PROBLEMS))
+    data = client.post('/agent2/load_problem', {'problem_number': problem_num}, '/agent2/load_problem')
+    problem = data.get('problem')
+    if not problem:
+        return
+    for part in rng.sample(list(agent2_blueprint.PART_DESCRIPTIONS), 3):
+        client.post('/agent2/select_part', {'problem_number': problem_num, 'part': part}, '/agent2/select_part')
+        attempt = 0
+        for answer in wrong_answers(rng, ['1', '8', '255.255.255.0', 'B']) + [problem['answers'][part]]:
+            think(rng, think_time)
+            reply = client.post('/agent2/chat', {'problem_number': problem_num, 'part': part,
+                                                 'answer': answer, 'attempt': attempt}, '/agent2/chat')
+            attempt = reply.get('attempt', attempt + 1)
+
+
+def agent3_flow(client, rng, think_time):
+    problem_id = rng.choice(list(agent3_blueprint.PROBLEMS))
+    problem = agent3_blueprint.PROBLEMS[problem_id]
+    client.get(f'/agent3/problem/{problem_id}', '/agent3/problem/<id>')
+    for part_num in range(1, rng.randint(2, 5)):
+        messages = wrong_answers(rng, ['1', '4', '255.255.0.0'])
+        if rng.random() < 0.5:
+            messages.insert(0, rng.choice(FREE_FORM_QUESTIONS))
+        for message in messages + [problem['answers'][f'part{part_num}']]:
+            think(rng, think_time)
+            client.post('/agent3/chat', {'message': message}, '/agent3/chat')
+        client.post('/agent3/next_part', {}, '/agent3/next_part')
+
+
+def agent4_flow(client, rng, think_time):
+    problem_num = rng.choice(list(agent4_blueprint.PROBLEMS))
+    problem = agent4_blueprint.PROBLEMS[problem_num]
+    client.get(f'/agent4/get_problem/{problem_num}', '/agent4/get_problem/<n>')
+    for part_num in range(1, min(len(problem['parts']), rng.randint(2, 4)) + 1):
+        client.get(f'/agent4/get_part/{problem_num}/{part_num}', '/agent4/get_part/<n>/<part>')
+        conversation_id = None
+        messages = [rng.choice(FREE_FORM_QUESTIONS)] + wrong_answers(rng, ['10.0.0.0/8', '192.168.1.0/24'])
+        for message in messages + [problem['parts'][part_num]['answer']]:
+            think(rng, think_time)
+            reply = client.post('/agent4/chat', {'message': message, 'problem_num': problem_num,
+                                                 'current_part': part_num,
+                                                 'conversation_id': conversation_id}, '/agent4/chat')
+            conversation_id = reply.get('conversation_id', conversation_id)
+
+
+FLOWS = {
+    'agent1': agent1_flow,
+    'agent2': agent2_flow,
+    'agent3': agent3_flow,
+    'agent4': agent4_flow
+}
+
+
+def student(index, args, recorder, deadline):
+    rng = random.Random(args.seed * 1000 + index)
+    time.sleep(args.ramp_up * index / max(1, args.students))
+    client = StudentClient(args.base_url, recorder, args.timeout, args.stream)
+    client.login()
+    flows = [FLOWS[name] for name in args.agents]
+    turn = index
+    while time.monotonic() < deadline:
+        flows[turn % len(flows)](client, rng, args.think_time)
+        turn += 1
+
+
+def print_report(rows, elapsed, students):
+    total = sum(row['count'] for row in rows if not row['route'].endswith('(first token)'))
+    errors = sum(row['count'] * row['error_rate'] for row in rows)
+    print("\n" + "=" * 100)
+    print(f"{students} students, {elapsed:.0f}s: {total} requests, {total / elapsed:.1f} req/s, "
+          f"{errors / total if total else 0:.1%} errors")
+    print("=" * 100)
+    print(f"{'route':<42}{'count':>7}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'errors':>8}")
+    for row in rows:
+        print(f"{row['route']:<42}{row['count']:>7}{row['rps']:>8.2f}{row['p50']:>8.2f}{row['p95']:>8.2f}"
+              f"{row['p99']:>8.2f}{row['max']:>8.2f}{row['error_rate']:>8.1%}")
+    print("(latencies in seconds)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a classroom of students using the tutors")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--students', type=int, default=20, help="concurrent simulated students")
+    parser.add_argument('--duration', type=float, default=60, help="seconds to keep starting new flows")
+    parser.add_argument('--ramp-up', type=float, default=10, help="seconds over which students join")
+    parser.add_argument('--agents', nargs='+', choices=sorted(FLOWS), default=sorted(FLOWS))
+    parser.add_argument('--think-time', type=float, nargs=2, default=[1.0, 4.0], metavar=('MIN', 'MAX'),
+                        help="seconds a student pauses before each message")
+    parser.add_argument('--stream', action='store_true', help="request streamed /chat replies")
+    parser.add_argument('--timeout', type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"Load testing {args.base_url} with {args.students} students for {args.duration:.0f}s "
+          f"({', '.join(args.agents)})")
+    print("=" * 100)
+
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=student, args=(i, args, recorder, deadline), daemon=True)
+               for i in range(args.students)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    rows = recorder.summary(elapsed)
+    print_report(rows, elapsed, args.students)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'students': args.students, 'elapsed': elapsed, 'routes': rows}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Metrics - counters and histograms rendered in Prometheus text format
+
+Every recorded value lands in one of a few lock stripes picked by thread id,
+so request threads almost never wait on each other; a scrape merges the
+stripes. Point-in-time values (queue depth, cache sizes) are not stored at
+all - collectors registered with register_collector() read them from the
+owning module's stats() when /metrics is scraped.
+"""
+
+import math
+import threading
+
+# Seconds; covers fast local routes up to slow LLM replies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STRIPES = 8
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Striped:
+    """Per-label series split across lock stripes"""
+
+    def __init__(self, name, help, labelnames):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._stripes = [(threading.Lock(), {}) for _ in range(STRIPES)]
+        _metrics.append(self)
+
+    def _stripe(self):
+        return self._stripes[threading.get_ident() % STRIPES]
+
+    def _merged(self, merge):
+        series = {}
+        for lock, stripe in self._stripes:
+            with lock:
+                for key, value in stripe.items():
+                    series[key] = merge(series.get(key), value)
+        return series
+
+
+class Counter(_Striped):
+    """Monotonic total per label set"""
+
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        lock, stripe = self._stripe()
+        with lock:
+            stripe[labels] = stripe.get(labels, 0) + amount
+
+    def render(self):
+        lines = []
+        for labels, value in sorted(self._merged(lambda a, b: (a or 0) + b).items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+class Histogram(_Striped):
+    """Bucketed observations per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        lock, stripe = self._stripe()
+        with lock:
+            series = stripe.get(labels)
+            if series is None:
+                series = stripe[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @staticmethod
+    def _merge(total, series):
+        if total is None:
+            return [list(series[0]), series[1]]
+        return [[a + b for a, b in zip(total[0], series[0])], total[1] + series[1]]
+
+    def render(self):
+        lines = []
+        for labels, (counts, total) in sorted(self._merged(self._merge).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(float(bound))}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+def register_collector(fn):
+    """fn() returns [(name, type, help, labelnames, [(label_values, value), ...]), ...]"""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, type, help, labelnames, samples in collector():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {type}')
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(labelnames, labels)} {_number(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,105 @@
+"""
+Metrics Blueprint - /metrics endpoint for Prometheus
+
+Times every request in the app (streamed replies until their last byte) and
+exposes those histograms together with the LLM gateway's call metrics and
+the current limiter, breaker, coalescing and cache state.
+
+Configuration (environment variables):
+  METRICS_TOKEN   If set, scrapes must send "Authorization: Bearer <token>"
+"""
+
+from flask import Blueprint, Response, g, request
+import hmac
+import os
+import time
+import metrics
+from circuit_breaker import breaker, CLOSED
+from hint_cache import hint_cache
+from llm_gateway import prompt_cache_stats
+from llm_limiter import limiter
+from model_router import router
+from single_flight import in_flight, chat_guard
+from structured_logging import dropped_records
+
+metrics_bp = Blueprint("metrics", __name__)
+
+HTTP_DURATION = metrics.Histogram(
+    'http_request_duration_seconds', "Request duration per route, until the last byte of a streamed reply",
+    ('route', 'method', 'status'))
+
+
+@metrics_bp.before_app_request
+def start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def observe_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    labels = (request.url_rule.rule if request.url_rule else 'unmatched', request.method, str(response.status_code))
+    if response.is_streamed:
+        response.call_on_close(lambda: HTTP_DURATION.observe(time.perf_counter() - started, *labels))
+    else:
+        HTTP_DURATION.observe(time.perf_counter() - started, *labels)
+    return response
+
+
+@metrics.register_collector
+def llm_state():
+    queue = limiter.stats()
+    flights = in_flight.stats()
+    circuit = breaker.stats()
+    return [
+        ('llm_active_calls', 'gauge', "Upstream calls holding a limiter slot", (), [((), queue['active'])]),
+        ('llm_max_concurrent', 'gauge', "Limiter slots per worker", (), [((), queue['max_concurrent'])]),
+        ('llm_queue_depth', 'gauge', "Calls waiting for a limiter slot", (), [((), queue['waiting'])]),
+        ('llm_shed_total', 'counter', "Calls rejected with a full queue or queue timeout", (), [((), queue['shed'])]),
+        ('llm_in_flight', 'gauge', "Distinct upstream calls in flight after coalescing", (),
+         [((), flights['in_flight'])]),
+        ('llm_coalesced_total', 'counter', "Calls served by an identical call already in flight", (),
+         [((), flights['coalesced'])]),
+        ('llm_breaker_open', 'gauge', "1 while the circuit breaker is open or half-open", (),
+         [((), 0 if circuit['state'] == CLOSED else 1)]),
+        ('llm_breaker_trips_total', 'counter', "Times the circuit breaker opened", (), [((), circuit['trips'])]),
+        ('llm_breaker_rejected_total', 'counter', "Calls refused while the breaker was open", (),
+         [((), circuit['rejected'])]),
+        ('chat_busy_rejections_total', 'counter', "Second /chat requests refused with 409", (),
+         [((), chat_guard.rejected)]),
+        ('log_records_dropped_total', 'counter', "Log records dropped because the log queue was full", (),
+         [((), dropped_records())])
+    ]
+
+
+@metrics.register_collector
+def cache_state():
+    hints = hint_cache.stats()
+    prompt = prompt_cache_stats.snapshot()
+    return [
+        ('hint_cache_hits_total', 'counter', "Hint replies served from the cache", (), [((), hints['hits'])]),
+        ('hint_cache_misses_total', 'counter', "Hint cache lookups that went to the LLM", (), [((), hints['misses'])]),
+        ('hint_cache_hit_ratio', 'gauge', "Share of hint lookups served from the cache", (),
+         [((), hints['hit_ratio'])]),
+        ('hint_cache_size', 'gauge', "Replies currently cached", (), [((), hints['size'])]),
+        ('llm_prompt_cache_hit_ratio', 'gauge', "Share of input tokens read from the prompt cache", ('agent',),
+         [((agent,), stats['cached_token_ratio']) for agent, stats in sorted(prompt.items())])
+    ]
+
+
+@metrics.register_collector
+def model_policy():
+    current = router.snapshot()
+    return [
+        ('llm_model_tier_info', 'gauge', "Model serving each tier of the routing policy", ('tier', 'model'),
+         [((tier, model), 1) for tier, model in sorted(current['tiers'].items())])
+    ]
+
+
+@metrics_bp.route('/metrics')
+def scrape():
+    token = os.environ.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,393 @@
+"""
+Mock Anthropic Server - a local stand-in for the Messages API
+
+Speaks the subset of POST /v1/messages the tutors use (plain JSON and
+"stream": true Server-Sent Events). Latency, token rate, errors and replies
+are configurable, so every agent's /chat can be benchmarked offline without
+spending API credit.
+
+Usage:
+  python mock_anthropic.py --port 8085 --ttft lognormal:0.6,0.4 --tokens-per-sec 60
+  python mock_anthropic.py --rate-429 0.05 --rate-529 0.02 --rate-timeout 0.01
+
+  # then point the app at it
+  export LLM_BASE_URL=http://127.0.0.1:8085
+  export ANTHROPIC_API_KEY=mock
+
+Latency distributions (--ttft, seconds until the first token):
+  fixed:S   uniform:LO,HI   normal:MEAN,SD   lognormal:MEDIAN,SIGMA   exp:MEAN
+
+Canned responses (--responses FILE) are a JSON list of
+  {"match": "<substring of the last user message, optional>", "text": "..."}
+The first matching entry wins; entries without "match" are picked round-robin.
+An entry may also name a tool call, e.g.
+  {"match": "9th subnet", "tool": {"name": "nth_subnet", "input": {...}}, "text": "..."}
+When the request offers that tool, the mock first answers with the tool call
+and sends "text" once the tool result comes back.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+
+DEFAULT_RESPONSES = [
+    {"text": "Good effort! Let's look at this together. Start with the Powers of 2 Matrix: "
+             "128 | 64 | 32 | 16 | 8 | 4 | 2 | 1. Which of these values do you need here?"},
+    {"text": "Not quite yet. Remember: usable hosts = 2^host bits - 2. How many host bits "
+             "would give you enough addresses for this subnet?"},
+    {"text": "You're close! Find the block size first, then count subnets starting from "
+             "subnet zero. What is the block size for this mask?"},
+    {"text": "Great question. The subnet mask tells you which bits belong to the network. "
+             "Every 255 is a network octet and every 0 is a host octet. Try again!"},
+]
+
+
+def parse_distribution(spec):
+    """Return a function that samples seconds from a distribution spec"""
+    name, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',') if v]
+    if name == 'fixed':
+        return lambda: values[0]
+    if name == 'uniform':
+        return lambda: random.uniform(values[0], values[1])
+    if name == 'normal':
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if name == 'lognormal':
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    if name == 'exp':
+        return lambda: random.expovariate(1 / values[0])
+    raise ValueError(f"Unknown distribution: {spec}")
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def request_text(body):
+    """System and message text of a request, for token estimates"""
+    parts = []
+    system = body.get('system') or ''
+    blocks = system if isinstance(system, list) else [{'text': system}]
+    parts.extend(block.get('text', '') for block in blocks)
+    for message in body.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts.extend(block.get('text', '') for block in content or [] if isinstance(block, dict))
+    return '\n'.join(parts)
+
+
+def cacheable_prefix(body):
+    """Text up to the last cache_control breakpoint in system/messages"""
+    prefix = []
+    cached = ''
+    system = body.get('system')
+    blocks = list(system) if isinstance(system, list) else []
+    for message in body.get('messages', []):
+        if isinstance(message.get('content'), list):
+            blocks.extend(message['content'])
+    for block in blocks:
+        prefix.append(block.get('text', ''))
+        if block.get('cache_control'):
+            cached = '\n'.join(prefix)
+    return cached
+
+
+def last_user_text(body):
+    """Text of the latest user turn that has any (tool results have none)"""
+    for message in reversed(body.get('messages', [])):
+        if message.get('role') == 'user':
+            content = message.get('content')
+            if isinstance(content, str):
+                return content
+            text = ' '.join(b.get('text', '') for b in content if isinstance(b, dict) and b.get('type') == 'text')
+            if text:
+                return text
+    return ''
+
+
+def wants_tool_call(body, response):
+    """True if response names a tool this request offers and no result has come back yet"""
+    tool = response.get('tool')
+    if not tool or (body.get('tool_choice') or {}).get('type') == 'none':
+        return False
+    if tool['name'] not in {t.get('name') for t in body.get('tools') or []}:
+        return False
+    last = (body.get('messages') or [{}])[-1].get('content')
+    return not (isinstance(last, list) and any(b.get('type') == 'tool_result' for b in last))
+
+
+class MockConfig:
+    """Latency, error and reply settings shared by every handler thread"""
+
+    def __init__(self, ttft, tokens_per_sec, rate_429, rate_529, rate_timeout, timeout_seconds,
+                 retry_after, responses):
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.rate_429 = rate_429
+        self.rate_529 = rate_529
+        self.rate_timeout = rate_timeout
+        self.timeout_seconds = timeout_seconds
+        self.retry_after = retry_after
+        self.responses = responses
+        self._round_robin = itertools.cycle([r for r in responses if not r.get('match')] or responses)
+        self._lock = threading.Lock()
+        self._cached_prefixes = set()
+        self.counts = {'requests': 0, '429': 0, '529': 0, 'timeout': 0}
+
+    def pick_response(self, body):
+        text = last_user_text(body)
+        for response in self.responses:
+            if response.get('match') and response['match'] in text:
+                return response
+        with self._lock:
+            return next(self._round_robin)
+
+    def cache_usage(self, body):
+        """(cache_read, cache_write) tokens, as if the prompt cache were real"""
+        prefix = cacheable_prefix(body)
+        if not prefix:
+            return 0, 0
+        digest = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        with self._lock:
+            if digest in self._cached_prefixes:
+                return estimate_tokens(prefix), 0
+            self._cached_prefixes.add(digest)
+        return 0, estimate_tokens(prefix)
+
+    def roll_error(self):
+        """None, '429', '529' or 'timeout' for the next request"""
+        roll = random.random()
+        with self._lock:
+            self.counts['requests'] += 1
+            for kind, rate in (('429', self.rate_429), ('529', self.rate_529), ('timeout', self.rate_timeout)):
+                if roll < rate:
+                    self.counts[kind] += 1
+                    return kind
+                roll -= rate
+        return None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, error_type, message, headers=None):
+        self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': message}}, headers)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'counts': self.config.counts})
+        else:
+            self._send_error(404, 'not_found_error', 'Not found')
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/v1/messages':
+            self._send_error(404, 'not_found_error', 'Not found')
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_error(400, 'invalid_request_error', 'Body is not valid JSON')
+            return
+
+        config = self.config
+        error = config.roll_error()
+        if error == '429':
+            self._send_error(429, 'rate_limit_error', 'Mock rate limit',
+                             {'retry-after': str(config.retry_after)})
+            return
+        if error == '529':
+            self._send_error(529, 'overloaded_error', 'Mock overloaded')
+            return
+        if error == 'timeout':
+            time.sleep(config.timeout_seconds)
+            self._send_error(504, 'api_error', 'Mock timeout')
+            return
+
+        response = config.pick_response(body)
+        if wants_tool_call(body, response):
+            self._tool_call(body, response['tool'])
+            return
+        text = response['text']
+        stop_reason, stop_sequence = 'end_turn', None
+        for stop in body.get('stop_sequences') or []:
+            if stop in text:
+                text = text[:text.index(stop)]
+                stop_reason, stop_sequence = 'stop_sequence', stop
+                break
+        words = text.split(' ')
+        max_tokens = int(body.get('max_tokens', 1024))
+        if len(words) > max_tokens:
+            words = words[:max_tokens]
+            stop_reason, stop_sequence = 'max_tokens', None
+        cache_read, cache_write = config.cache_usage(body)
+        usage = {
+            'input_tokens': max(1, estimate_tokens(request_text(body)) - cache_read - cache_write),
+            'output_tokens': len(words),
+            'cache_read_input_tokens': cache_read,
+            'cache_creation_input_tokens': cache_write
+        }
+        message = {
+            'id': 'msg_mock_' + uuid.uuid4().hex[:24],
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'mock'),
+            'content': [],
+            'stop_reason': None,
+            'stop_sequence': None,
+            'usage': usage
+        }
+
+        time.sleep(config.ttft())
+        if body.get('stream'):
+            self._stream(message, words, stop_reason, stop_sequence)
+        else:
+            time.sleep(len(words) / config.tokens_per_sec)
+            message.update(content=[{'type': 'text', 'text': ' '.join(words)}], stop_reason=stop_reason,
+                           stop_sequence=stop_sequence)
+            self._send_json(200, message)
+
+    def _start_events(self):
+        """Send the SSE headers; returns a function that writes one event"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(name, data):
+            self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        return event
+
+    def _tool_call(self, body, tool):
+        """Answer with a single tool_use block"""
+        block = {'type': 'tool_use', 'id': 'toolu_mock_' + uuid.uuid4().hex[:20],
+                 'name': tool['name'], 'input': tool.get('input', {})}
+        arguments = json.dumps(block['input'])
+        message = {
+            'id': 'msg_mock_' + uuid.uuid4().hex[:24],
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'mock'),
+            'content': [],
+            'stop_reason': None,
+            'stop_sequence': None,
+            'usage': {'input_tokens': estimate_tokens(request_text(body)),
+                      'output_tokens': estimate_tokens(arguments) + 10,
+                      'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0}
+        }
+        time.sleep(self.config.ttft())
+        if not body.get('stream'):
+            message.update(content=[block], stop_reason='tool_use')
+            self._send_json(200, message)
+            return
+        event = self._start_events()
+        event('message_start', {'type': 'message_start', 'message': message})
+        event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': dict(block, input={})})
+        event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                      'delta': {'type': 'input_json_delta', 'partial_json': arguments}})
+        event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        event('message_delta', {'type': 'message_delta', 'delta': {'stop_reason': 'tool_use', 'stop_sequence': None},
+                                'usage': {'output_tokens': message['usage']['output_tokens']}})
+        event('message_stop', {'type': 'message_stop'})
+
+    def _stream(self, message, words, stop_reason, stop_sequence):
+        event = self._start_events()
+
+        output_tokens = message['usage']['output_tokens']
+        event('message_start', {'type': 'message_start',
+                                'message': dict(message, usage=dict(message['usage'], output_tokens=1))})
+        event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': {'type': 'text', 'text': ''}})
+        event('ping', {'type': 'ping'})
+        delay = 1 / self.config.tokens_per_sec
+        for i, word in enumerate(words):
+            event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                          'delta': {'type': 'text_delta', 'text': word if i == 0 else ' ' + word}})
+            time.sleep(delay)
+        event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        event('message_delta', {'type': 'message_delta',
+                                'delta': {'stop_reason': stop_reason, 'stop_sequence': stop_sequence},
+                                'usage': {'output_tokens': output_tokens}})
+        event('message_stop', {'type': 'message_stop'})
+
+
+def build_server(host, port, config):
+    handler = type('ConfiguredMockHandler', (MockHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Anthropic Messages API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--ttft', default='lognormal:0.6,0.4', help="time to first token distribution")
+    parser.add_argument('--tokens-per-sec', type=float, default=60.0, help="output token rate")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument('--rate-529', type=float, default=0.0, help="share of requests answered 529")
+    parser.add_argument('--rate-timeout', type=float, default=0.0, help="share of requests that hang")
+    parser.add_argument('--timeout-seconds', type=float, default=90.0, help="how long a hanging request hangs")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="retry-after header sent with 429s")
+    parser.add_argument('--responses', help="JSON file of canned responses")
+    args = parser.parse_args()
+
+    responses = DEFAULT_RESPONSES
+    if args.responses:
+        with open(args.responses, encoding='utf-8') as f:
+            responses = json.load(f)
+
+    config = MockConfig(
+        ttft=parse_distribution(args.ttft),
+        tokens_per_sec=args.tokens_per_sec,
+        rate_429=args.rate_429,
+        rate_529=args.rate_529,
+        rate_timeout=args.rate_timeout,
+        timeout_seconds=args.timeout_seconds,
+        retry_after=args.retry_after,
+        responses=responses
+    )
+    server = build_server(args.host, args.port, config)
+
+    print("=" * 70)
+    print(f"Mock Anthropic API on http://{args.host}:{args.port}/v1/messages")
+    print(f"TTFT {args.ttft}, {args.tokens_per_sec:g} tokens/s, errors: 429={args.rate_429:g} "
+          f"529={args.rate_529:g} timeout={args.rate_timeout:g}")
+    print("=" * 70)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Model Router - picks a model tier per agent and hint level
+
+Level 1-2 hints are a sentence or two of gentle nudging, so they go to a
+smaller, faster model. Full explanations (higher levels), free-form questions
+and anything the policy does not mention go to the full model.
+
+The policy can be changed without a restart: point LLM_MODEL_POLICY_PATH at
+a JSON file and it is re-read whenever the file changes, e.g.
+
+  {
+    "tiers": {"fast": "claude-haiku-4-5", "full": "claude-sonnet-4-6"},
+    "policy": {"agent1": {"1": "fast", "2": "fast", "3": "fast"},
+               "*": {"1": "fast", "2": "fast"}}
+  }
+
+"*" applies to agents without their own entry. Levels not listed, and calls
+without a level, use the default tier.
+
+Configuration (environment variables):
+  LLM_MODEL_FAST          Model for the fast tier (default claude-haiku-4-5)
+  LLM_MODEL_FULL          Model for the full tier (default claude-sonnet-4-6)
+  LLM_MODEL_POLICY_PATH   JSON policy file, reloaded when it changes (optional)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+FAST = 'fast'
+FULL = 'full'
+
+DEFAULT_TIERS = {
+    FAST: os.environ.get('LLM_MODEL_FAST', 'claude-haiku-4-5'),
+    FULL: os.environ.get('LLM_MODEL_FULL', 'claude-sonnet-4-6')
+}
+
+# (agent) -> {level: tier}; the agents' hint styles differ in how early the
+# explanation needs the larger model
+DEFAULT_POLICY = {
+    'agent1': {1: FAST, 2: FAST, 3: FAST},
+    'agent2': {1: FAST, 2: FAST},
+    'agent3': {1: FAST, 2: FAST},
+    'agent4': {1: FAST, 2: FAST}
+}
+
+DEFAULT_TIER = FULL
+
+# Seconds between checks of the policy file's modification time
+RELOAD_INTERVAL = 5
+
+
+class ModelRouter:
+    """Policy table from (agent, level) to a tier and its model"""
+
+    def __init__(self, tiers, policy, path=None):
+        self._lock = threading.Lock()
+        self.tiers = dict(tiers)
+        self.policy = {agent: dict(levels) for agent, levels in policy.items()}
+        self.path = path
+        self._mtime = -1
+        self._checked_at = 0.0
+
+    def route(self, agent, level):
+        """(tier, model) for a call from agent at hint level (None for free-form)"""
+        self._maybe_reload()
+        with self._lock:
+            levels = self.policy.get(agent, self.policy.get('*', {}))
+            tier = levels.get(level, DEFAULT_TIER) if level is not None else DEFAULT_TIER
+            return tier, self.tiers.get(tier, self.tiers[DEFAULT_TIER])
+
+    def set_policy(self, policy=None, tiers=None):
+        """Replace the policy table and/or tier models"""
+        with self._lock:
+            if policy is not None:
+                self.policy = {agent: {int(level): tier for level, tier in levels.items()}
+                               for agent, levels in policy.items()}
+            if tiers is not None:
+                self.tiers = dict(self.tiers, **tiers)
+
+    def _maybe_reload(self):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            log.warning("Model policy %s not found, keeping the current policy", self.path)
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.set_policy(data.get('policy'), data.get('tiers'))
+            log.info("Loaded model policy from %s", self.path)
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            log.warning("Ignoring model policy %s: %s", self.path, e)
+
+    def snapshot(self):
+        with self._lock:
+            return {'tiers': dict(self.tiers),
+                    'policy': {agent: dict(levels) for agent, levels in self.policy.items()}}
+
+
+router = ModelRouter(DEFAULT_TIERS, DEFAULT_POLICY, path=os.environ.get('LLM_MODEL_POLICY_PATH'))
@@ -0,0 +1,134 @@
+"""
+Offline Hint Pregeneration - builds the hint bank used by the blueprints
+
+Walks every static question bank and asks Claude for each hint level once,
+using a bounded worker pool, then writes a versioned data file that
+hint_bank.py loads at startup:
+
+  - agent1: every QUIZ_BANK question x levels 1-5
+  - agent2: every PROBLEMS entry x PART_DESCRIPTIONS x levels 1-5
+  - agent3: every PROBLEMS entry x 12 parts x levels 1-5
+
+Agent4 is skipped - its parts already carry handwritten hint_level_1..5.
+
+Usage:
+  export ANTHROPIC_API_KEY="your-key-here"
+  python pregenerate_hints.py                       # all agents, 4 workers
+  python pregenerate_hints.py --agents agent2 --workers 8 --output hint_bank.json
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import time
+import hint_bank
+import llm_gateway
+import agent1_blueprint
+import agent2_blueprint
+import agent3_blueprint
+from subnet_calc import subnet_tools
+
+LEVELS = range(1, 6)
+
+# Bank hints are served for any wrong answer, so they must not quote one
+GENERIC_NOTE = ("\n\nThis hint will be shown to every student who answers this incorrectly, "
+                "so do not refer to a specific wrong answer.")
+
+
+def agent1_jobs():
+    """(agent, item, level, request) for every agent1 quiz question"""
+    for questions in agent1_blueprint.QUIZ_BANK.values():
+        for q in questions:
+            for level in LEVELS:
+                hint_prompt = agent1_blueprint.get_hint_level_prompt(level, q['question'], q['answer'])
+                content = ("Question: " + q['question'] + "\nCorrect Answer: " + q['answer'] +
+                           "\nStudent Answer: (incorrect)\nAttempt: " + str(level) + " of 5\n\n" +
+                           hint_prompt + GENERIC_NOTE)
+                yield 'agent1', q['question'], level, {
+                    'system': agent1_blueprint.SYSTEM_PROMPT,
+                    'messages': [{"role": "user", "content": content}],
+                    'max_tokens': 1024
+                }
+
+
+def agent2_jobs():
+    """(agent, item, level, request) for every agent2 problem part"""
+    for problem_num, problem in agent2_blueprint.PROBLEMS.items():
+        for part in agent2_blueprint.PART_DESCRIPTIONS:
+            for level in LEVELS:
+                hint_prompt = agent2_blueprint.get_hint_prompt(level, part, problem)
+                content = f"Student's answer: (incorrect)\nAttempt: {level} of 5\n\n{hint_prompt}{GENERIC_NOTE}"
+                yield 'agent2', f"{problem_num}:{part}", level, {
+                    'system': agent2_blueprint.SYSTEM_PROMPT,
+                    'messages': [{"role": "user", "content": content}],
+                    'max_tokens': 1500
+                }
+
+
+def agent3_jobs():
+    """(agent, item, level, request) for every agent3 problem part"""
+    for problem_id, problem in agent3_blueprint.PROBLEMS.items():
+        for part in problem['answers']:
+            for level in LEVELS:
+                content = agent3_blueprint.get_level_prompt(problem, part, level) + GENERIC_NOTE
+                yield 'agent3', f"{problem_id}:{part}", level, {
+                    'system': agent3_blueprint.SYSTEM_PROMPT,
+                    'messages': [{"role": "user", "content": content}],
+                    'max_tokens': 2000
+                }
+
+
+JOB_SOURCES = {
+    'agent1': agent1_jobs,
+    'agent2': agent2_jobs,
+    'agent3': agent3_jobs
+}
+
+
+def pregenerate(agents, workers):
+    """Generate every hint concurrently; returns (hints, failures)"""
+    jobs = [job for agent in agents for job in JOB_SOURCES[agent]()]
+    hints = {agent: {} for agent in agents}
+    failures = []
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            # Bank hints are written once and served many times, so always use the full model
+            pool.submit(llm_gateway.complete, agent=agent, level=level, model=llm_gateway.DEFAULT_MODEL,
+                        tools=subnet_tools, **request): (agent, item, level)
+            for agent, item, level, request in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            agent, item, level = futures[future]
+            try:
+                hints[agent].setdefault(item, {})[str(level)] = future.result()
+            except Exception as e:
+                failures.append((agent, item, level, str(e)))
+            if done % 25 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} hints ({time.monotonic() - started:.0f}s)")
+
+    return hints, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pregenerate tutor hints into a hint bank file")
+    parser.add_argument('--agents', nargs='+', choices=sorted(JOB_SOURCES), default=sorted(JOB_SOURCES))
+    parser.add_argument('--workers', type=int, default=4, help="concurrent API calls (default 4)")
+    parser.add_argument('--output', default=hint_bank.HINT_BANK_PATH)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Pregenerating hints for {', '.join(args.agents)} with {args.workers} workers")
+    print("=" * 70)
+
+    hints, failures = pregenerate(args.agents, max(1, args.workers))
+    for agent, item, level, error in failures:
+        print(f"[ERROR] {agent} {item} level {level}: {error}")
+
+    version = hint_bank.save(hints, args.output, model=llm_gateway.DEFAULT_MODEL)
+    total = sum(len(levels) for items in hints.values() for levels in items.values())
+    print(f"\nWrote {total} hints to {args.output} (version {version}, {len(failures)} failed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+Problem Generator - practice problems and answers computed by subnet_calc
+
+The tutors' answers come from the subnet math instead of hand-typed tables,
+and the same engine builds new practice problems on demand. A generated
+problem is fully determined by its seed, so its id ("p<seed>") is all a
+worker needs to rebuild it - nothing is stored, and any worker can check an
+answer for a problem another worker handed out.
+
+Agent1 quiz questions work the same way per (quiz type, seed, question
+number): question 7 of drill set 1234 is always the same item.
+"""
+
+from functools import lru_cache
+from html import escape
+import random
+import subnet_calc
+
+# Share of generated problems per address class
+CLASS_WEIGHTS = (('A', 1), ('B', 2), ('C', 3))
+
+# First-octet ranges for generated networks (no 0.x, loopback or reserved classes)
+FIRST_OCTETS = {'A': (1, 126), 'B': (128, 191), 'C': (192, 223)}
+
+PRACTICE_PREFIX = 'p'
+
+
+def practice_id(seed):
+    return f"{PRACTICE_PREFIX}{seed}"
+
+
+def practice_seed(problem_id):
+    """Seed of a practice problem id, or None for anything else"""
+    if isinstance(problem_id, str) and problem_id.startswith(PRACTICE_PREFIX) and problem_id[1:].isdigit():
+        return int(problem_id[1:])
+    return None
+
+
+def new_seed():
+    return random.randrange(1, 10 ** 9)
+
+
+def requested_seed(value):
+    """The seed a client asked for (0 is a valid seed), or a new one"""
+    if value is None or value == '':
+        return new_seed()
+    return int(value)
+
+
+def _network(rng, address_class):
+    """Random classful network address with a zero host portion"""
+    low, high = FIRST_OCTETS[address_class]
+    octets = [rng.randint(low, high), 0, 0, 0]
+    for index in range({'A': 1, 'B': 2, 'C': 3}[address_class] - 1):
+        octets[index + 1] = rng.randint(0, 255)
+    return '.'.join(str(octet) for octet in octets)
+
+
+def _needed(rng, bits, offset=0):
+    """A requirement that needs exactly `bits` bits: (2^(bits-1) - offset, 2^bits - offset]"""
+    return rng.randint(max(1, (1 << (bits - 1)) - offset + 1), (1 << bits) - offset)
+
+
+# ---------------------------------------------------------------- agent1
+
+OCTET_NAMES = ('First', 'Second', 'Third', 'Fourth')
+
+# Class identification questions also cover the multicast and reserved classes
+QUIZ_FIRST_OCTETS = dict(FIRST_OCTETS, D=(224, 239), E=(240, 255))
+
+
+def octet_names(indexes):
+    """Octet indexes (0-3) in agent1's answer wording, e.g. Third and Fourth octets"""
+    names = [OCTET_NAMES[index] for index in indexes]
+    if len(names) == 1:
+        return f"{names[0]} octet"
+    if len(names) == 2:
+        return f"{names[0]} and {names[1]} octets"
+    return f"{', '.join(names[:-1])}, and {names[-1]} octets"
+
+
+def _address(rng, address_classes='ABC'):
+    """Random host address (as an integer) in one of the given classes"""
+    low, high = QUIZ_FIRST_OCTETS[rng.choice(address_classes)]
+    return (rng.randint(low, high) << 24 | rng.randint(0, 255) << 16
+            | rng.randint(0, 255) << 8 | rng.randint(1, 254))
+
+
+def _binary_to_decimal(rng):
+    value = rng.randint(1, 255)
+    return f"Convert Binary to Decimal: {value:08b}", str(value)
+
+
+def _decimal_to_binary(rng):
+    value = rng.randint(1, 255)
+    return f"Convert Decimal to Binary: {value}", f"{value:08b}"
+
+
+def _classify(rng):
+    address = _address(rng, 'ABCDE')
+    return (f"Identify the class type: {subnet_calc.format_address(address)}",
+            subnet_calc.address_class(address))
+
+
+def _default_mask(rng):
+    address = _address(rng)
+    mask = subnet_calc.prefix_mask(subnet_calc.default_prefix(address))
+    return (f"Default Subnet Mask for: {subnet_calc.format_address(address)}",
+            subnet_calc.format_address(mask))
+
+
+def _portion(rng, network):
+    address = _address(rng)
+    mask = subnet_calc.prefix_mask(rng.choice((8, 16, 24)))
+    portion = address & mask if network else address & ~mask & 0xFFFFFFFF
+    label = 'network' if network else 'host'
+    return (f"Identify {label} portion: {subnet_calc.format_address(address)} "
+            f"with mask {subnet_calc.format_address(mask)}", subnet_calc.format_address(portion))
+
+
+def _portion_octets(rng, network):
+    address = _address(rng)
+    network_octets = subnet_calc.default_prefix(address) // 8
+    indexes = range(network_octets) if network else range(network_octets, 4)
+    label = 'network' if network else 'host'
+    return (f"Identify {label} portion octet: {subnet_calc.format_address(address)}",
+            octet_names(indexes))
+
+
+# One generator per QUIZ_BANK type: rng -> (question text, answer)
+QUIZ_GENERATORS = {
+    "binary_to_decimal": _binary_to_decimal,
+    "decimal_to_binary": _decimal_to_binary,
+    "address_classification_identification": _classify,
+    "identify_default_subnet_mask": _default_mask,
+    "Identify_network_address_portion": lambda rng: _portion(rng, True),
+    "identify_host_address_portion": lambda rng: _portion(rng, False),
+    "ipv4_network_identification": lambda rng: _portion_octets(rng, True),
+    "ipv4_host_identification": lambda rng: _portion_octets(rng, False),
+}
+
+
+@lru_cache(maxsize=4096)
+def agent1_question(quiz_type, seed, number):
+    """Question `number` of a seeded drill set, in the same shape as QUIZ_BANK entries
+
+    Each (quiz type, seed, number) has its own random stream, so question 7
+    of a set is the same whether or not questions 1-6 were generated.
+    """
+    text, answer = QUIZ_GENERATORS[quiz_type](random.Random(f"{quiz_type}:{seed}:{number}"))
+    return {"question": f"Question {number}: {text}", "answer": answer, "number": number, "seed": seed}
+
+
+def agent1_batch(quiz_type, seed, count=10):
+    """A whole drill set: questions 1..count of one seed"""
+    return [agent1_question(quiz_type, seed, number) for number in range(1, count + 1)]
+
+
+# ---------------------------------------------------------------- agent2
+
+def agent2_answers(network, subnets_needed, hosts_needed):
+    """All ten custom-subnet-mask answers, as the strings agent2 checks against"""
+    plan = subnet_calc.subnet_plan(network, subnets_needed, hosts_needed)
+    if not plan['hosts_fit']:
+        raise ValueError(f"{hosts_needed} hosts do not fit once {subnets_needed} subnets are borrowed")
+    return {
+        "part1": plan['address_class'],
+        "part2": plan['default_mask'],
+        "part3": str(plan['subnet_bits']),
+        "part4": str(plan['host_bits']),
+        "part5": str(plan['total_subnets']),
+        "part6": str(plan['total_addresses_per_subnet']),
+        "part7": str(plan['usable_hosts_per_subnet']),
+        "part8": plan['custom_mask'],
+        "part9": str(plan['prefix']),
+        "part10": plan['address_map']
+    }
+
+
+def agent2_problem(name, network, subnets_needed, hosts_needed):
+    """An agent2 problem dict with its answers derived from the requirements"""
+    return {
+        "name": name,
+        "subnets_needed": subnets_needed,
+        "hosts_needed": hosts_needed,
+        "network_address": network,
+        "answers": agent2_answers(network, subnets_needed, hosts_needed)
+    }
+
+
+@lru_cache(maxsize=4096)
+def agent2_practice(seed):
+    """Seeded custom subnet mask problem whose hosts still fit after borrowing"""
+    rng = random.Random(seed)
+    address_class = rng.choices([c for c, _ in CLASS_WEIGHTS], [w for _, w in CLASS_WEIGHTS])[0]
+    available = {'A': 24, 'B': 16, 'C': 8}[address_class]
+    # At least one subnet bit, and at least two host bits for a usable subnet
+    subnet_bits = rng.randint(1, available - 2)
+    host_bits = available - subnet_bits
+    subnets_needed = _needed(rng, subnet_bits)
+    hosts_needed = _needed(rng, host_bits, offset=2)
+    return agent2_problem(f"Practice Problem {seed}", _network(rng, address_class),
+                          subnets_needed, hosts_needed)
+
+
+# ---------------------------------------------------------------- agent3
+
+def ordinal(n):
+    """1st, 2nd, 3rd, 4th, ... 11th, 12th, 13th, 21st"""
+    suffix = 'th' if 11 <= n % 100 <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+
+def agent3_questions(subnet_numbers):
+    """Question text for parts 9-12, asking about the given subnets (1 = subnet zero)"""
+    n9, n10, n11, n12 = subnet_numbers
+    return {
+        "q9": f"What is the {ordinal(n9)} subnet range?",
+        "q10": f"What is the subnet ID/Number for the {ordinal(n10)} subnet?",
+        "q11": f"What is the broadcast address for the {ordinal(n11)} subnet?",
+        "q12": f"What is the assignable addresses for the {ordinal(n12)} subnet?"
+    }
+
+
+def agent3_answers(network, subnets_needed, hosts_needed, subnet_numbers):
+    """All twelve subnet range answers; parts 1-8 are the same as agent2's"""
+    answers = {part: value for part, value in agent2_answers(network, subnets_needed, hosts_needed).items()
+               if part not in ('part9', 'part10')}
+    ranges = subnet_calc.SubnetRanges(network, int(answers['part3']))
+    n9, n10, n11, n12 = subnet_numbers
+    answers.update({
+        "part9": "{} to {}".format(*ranges.subnet_range(n9)),
+        "part10": ranges.subnet_range(n10)[0],
+        "part11": ranges.subnet_range(n11)[1],
+        "part12": "{} to {}".format(*ranges.usable_range(n12))
+    })
+    return answers
+
+
+def agent3_problem(name, network, subnets_needed, hosts_needed, subnet_numbers):
+    """An agent3 problem dict with questions and answers for the chosen subnets"""
+    return {
+        "name": name,
+        "subnets_needed": subnets_needed,
+        "hosts_needed": hosts_needed,
+        "network_address": network,
+        "questions": agent3_questions(subnet_numbers),
+        "answers": agent3_answers(network, subnets_needed, hosts_needed, subnet_numbers)
+    }
+
+
+@lru_cache(maxsize=4096)
+def agent3_practice(seed):
+    """Seeded subnet range problem asking about four subnets among the first 16"""
+    rng = random.Random(seed)
+    address_class = rng.choices([c for c, _ in CLASS_WEIGHTS], [w for _, w in CLASS_WEIGHTS])[0]
+    available = {'A': 24, 'B': 16, 'C': 8}[address_class]
+    # At least two subnet bits so the range questions have subnets to pick from
+    subnet_bits = rng.randint(2, available - 2)
+    host_bits = available - subnet_bits
+    last = min(1 << subnet_bits, 16)
+    subnet_numbers = tuple(rng.randint(1, last) for _ in range(4))
+    return agent3_problem(f"Practice Problem {seed}", _network(rng, address_class), _needed(rng, subnet_bits),
+                          _needed(rng, host_bits, offset=2), subnet_numbers)
+
+
+# ---------------------------------------------------------------- agent4
+
+# (background, border, text colour) for the diagram's subnet boxes
+DIAGRAM_COLORS = [
+    ("#e3f2fd", "#2196F3", "#1976D2"),
+    ("#f3e5f5", "#9c27b0", "#7b1fa2"),
+    ("#fff3e0", "#ff9800", "#f57c00"),
+    ("#e8f5e9", "#4caf50", "#2e7d32"),
+    ("#fce4ec", "#e91e63", "#c2185b"),
+    ("#ffebee", "#f44336", "#c62828")
+]
+
+# Names and icons for generated LANs; class B scenarios use sites, class C departments
+DEPARTMENTS = [("🔬", "R&D"), ("🖨️", "Printing"), ("💼", "Sales"), ("👥", "HR"), ("👔", "Management"),
+               ("💰", "Finance"), ("🎓", "Training"), ("📦", "Shipping"), ("🛠️", "IT Support"), ("📣", "Marketing")]
+SITES = [("🌆", "Los Angeles"), ("🏙️", "Atlanta"), ("🌇", "Dallas"), ("🌲", "Seattle"), ("⛰️", "Salt Lake City"),
+         ("🏢", "Chicago"), ("🌉", "San Francisco"), ("🗽", "New York"), ("🌴", "Miami"), ("🏔️", "Denver")]
+WAN = ("🌐", "WAN Link")
+
+
+def _vlsm_hints(part, previous, address_class):
+    """Five hint levels for one VLSM part, from nudge to full solution"""
+    hosts = part['hosts_needed']
+    total = hosts + 2
+    host_bits = 32 - part['prefix']
+    size = 1 << host_bits
+    base = subnet_calc.default_prefix(subnet_calc.parse_address(part['network']))
+    available = 32 - base
+    subnet_bits = available - host_bits
+    if previous is None:
+        where = f"Largest requirement first! This is Class {address_class}, so you have {available} bits to work with."
+    else:
+        where = f"Previous subnet ({previous['name']}) ended at {previous['broadcast']}. Where does {part['name']} start?"
+    smaller = f"2^{host_bits - 1} = {size // 2} (too small), " if host_bits > 2 else ""
+    return {
+        "hint_level_1": f"{where} How many TOTAL addresses do you need for {hosts} hosts? (Don't forget the +2!)",
+        "hint_level_2": f"{hosts} + 2 = {total} total. {smaller}2^{host_bits} = {size} (works!) → {host_bits} host bits",
+        "hint_level_3": f"{size} addresses → {host_bits} host bits → subnet bits = {available} - {host_bits} = "
+                        f"{subnet_bits} → CIDR = /{base} + {subnet_bits} = ?",
+        "hint_level_4": f"{host_bits} host bits → /{part['prefix']}. It starts at {part['network']} and uses "
+                        f"{part['network']} through {part['broadcast']}. What's your complete answer?",
+        "hint_level_5": f"Answer: {part['cidr']}\n\n• Need: {hosts} hosts\n• Total: {hosts} + 2 = {total} addresses\n"
+                        f"• Power of 2: 2^{host_bits} = {size} ({host_bits} host bits)\n"
+                        f"• Subnet bits: {available} - {host_bits} = {subnet_bits}\n"
+                        f"• CIDR: /{base} + {subnet_bits} = /{part['prefix']}\n"
+                        f"• Range: {part['network']} - {part['broadcast']}"
+    }
+
+
+def _vlsm_diagram(router, network, subnets):
+    """Router-and-switches diagram in the style of the hand-drawn problems"""
+    rows = []
+    for index, (icon, name, hosts) in enumerate(subnets):
+        background, border, color = DIAGRAM_COLORS[index % len(DIAGRAM_COLORS)]
+        rows.append(f"""
+                <div style="display: flex; align-items: center; gap: 10px;">
+                    <div style="flex: 0 0 40px; height: 2px; background: #667eea;"></div>
+                    <div style="flex: 1; padding: 12px; background: {background}; border: 2px solid {border}; border-radius: 8px; font-weight: bold;">
+                        <div style="color: {color};">{icon} {escape(name)}</div>
+                        <div style="font-size: 0.9em; color: #666; margin-top: 5px;">{hosts} hosts needed</div>
+                    </div>
+                </div>""")
+    return f"""<div style="background: white; padding: 20px; border: 2px solid #667eea; border-radius: 10px;">
+            <div style="text-align: center; margin-bottom: 20px;">
+                <div style="display: inline-block; padding: 15px 30px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 10px; font-weight: bold; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+                    {escape(router)}
+                </div>
+                <div style="font-size: 0.9em; color: #666; margin-top: 8px;">Network: {network}</div>
+            </div>
+            <div style="display: flex; flex-direction: column; gap: 15px;">{''.join(rows)}
+            </div>
+        </div>"""
+
+
+def agent4_scenario(spec):
+    """An agent4 problem (parts, five hint levels each, diagram) from a small spec:
+
+      {"name": "...", "network": "200.75.80.0", "router": "ROUTER",
+       "subnets": [["🖥️", "R&D LAN", 100], ["🌐", "WAN Link", 2], ...]}
+
+    Parts come out largest-first, the order students allocate them in.
+    """
+    value = subnet_calc.parse_address(spec['network'])
+    address_class = subnet_calc.address_class(value)
+    subnets = sorted(spec['subnets'], key=lambda subnet: -subnet[2])
+    plan = subnet_calc.vlsm_allocate(spec['network'], [{'name': name, 'hosts': hosts} for _, name, hosts in subnets])
+    parts = {}
+    previous = None
+    for number, allocation in enumerate(plan['allocations'], 1):
+        parts[number] = {
+            "subnet": allocation['name'],
+            "question": f"What is the network address with CIDR notation for {allocation['name']} "
+                        f"({allocation['hosts_needed']} hosts)?",
+            "hosts_needed": allocation['hosts_needed'],
+            "answer": allocation['cidr']
+        }
+        parts[number].update(_vlsm_hints(allocation, previous, address_class))
+        previous = allocation
+    return {
+        "name": spec['name'],
+        "network": subnet_calc.format_address(value),
+        "network_class": address_class,
+        "diagram": _vlsm_diagram(spec.get('router', 'ROUTER'), plan['network'], subnets),
+        "parts": parts
+    }
+
+
+@lru_cache(maxsize=1024)
+def agent4_practice(seed):
+    """Seeded VLSM scenario: 3-5 LANs plus a WAN link that all fit the network"""
+    rng = random.Random(seed)
+    address_class = rng.choice('BCC')
+    available = {'B': 16, 'C': 8}[address_class]
+    names = rng.sample(SITES if address_class == 'B' else DEPARTMENTS, rng.randint(3, 5))
+    # Redraw block sizes until the LANs and the /30 WAN link fit in the network
+    while True:
+        host_bits = [rng.randint(3, available - 1) for _ in names]
+        if sum(1 << bits for bits in host_bits) + 4 <= 1 << available:
+            break
+    subnets = [(icon, name, _needed(rng, bits, offset=2)) for (icon, name), bits in zip(names, host_bits)]
+    subnets.append(WAN + (2,))
+    return agent4_scenario({
+        "name": f"VLSM Practice Problem {seed}",
+        "network": _network(rng, address_class),
+        "router": "CORPORATE HQ ROUTER" if address_class == 'B' else "ROUTER",
+        "subnets": subnets
+    })
@@ -0,0 +1,99 @@
+"""
+Prompt Assembly - shared pieces for building tutor prompts within a budget
+
+Every tutor prompt is made of a cached system prompt, optional per-problem
+context, conversation history and the current turn. These helpers keep the
+parts that change per call small:
+
+  - level_guidance / level_hint: only the mentoring level or pre-written hint
+    for the current attempt, not all five
+  - clip_student_message: caps what a student can paste into a prompt
+  - fit_to_budget: drops the oldest history, then clips the last turn, until
+    the estimated input fits the per-call budget
+
+Token counts are a local estimate (~4 characters per token), no API call.
+
+Configuration (environment variables):
+  PROMPT_MAX_STUDENT_TOKENS   Longest student message kept, in tokens (default 300)
+  LLM_INPUT_BUDGET            Estimated input tokens allowed per call (default 6000)
+"""
+
+import logging
+import os
+import metrics
+
+log = logging.getLogger(__name__)
+
+MAX_STUDENT_TOKENS = int(os.environ.get('PROMPT_MAX_STUDENT_TOKENS', 300))
+INPUT_BUDGET = int(os.environ.get('LLM_INPUT_BUDGET', 6000))
+
+MENTORING_LEVELS = {
+    1: "Gentle nudge with a clarifying question - no formulas or numbers",
+    2: "Conceptual guidance and methodology - still no specific numbers",
+    3: "Formula with context for their specific problem - don't calculate the final answer",
+    4: "Worked example with blanks - leave one or two key values for them",
+    5: "Complete answer with a full step-by-step explanation"
+}
+
+PROMPT_TRIMMED = metrics.Counter(
+    'llm_prompt_trimmed_total', "Calls whose prompt was cut to fit LLM_INPUT_BUDGET", ('agent',))
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+def _content_text(content):
+    if isinstance(content, str):
+        return content
+    return ''.join(block.get('text', '') for block in content)
+
+
+def message_tokens(messages):
+    return sum(estimate_tokens(_content_text(m['content'])) for m in messages)
+
+
+def clip_student_message(text, max_tokens=MAX_STUDENT_TOKENS):
+    """Keep the start of an oversized student message and mark the cut"""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + " [...message shortened]"
+
+
+def level_guidance(level):
+    """The one mentoring level that applies to this attempt"""
+    level = max(1, min(level, 5))
+    return f"Level {level}: {MENTORING_LEVELS[level]}"
+
+
+def level_hint(part, level):
+    """A part's pre-written hint for this level (hint_level_1..5 keys)"""
+    level = max(1, min(level, 5))
+    return f"Hint level {level}: {part[f'hint_level_{level}']}"
+
+
+def fit_to_budget(system, context, messages, agent=None, budget=INPUT_BUDGET):
+    """Messages trimmed so system + context + messages fit the input budget.
+
+    Whole exchanges are dropped from the front of the history first (the
+    conversation must still start with a user turn); if that is not enough,
+    the final turn's text is clipped.
+    """
+    fixed = estimate_tokens(system) + (estimate_tokens(context) if context else 0)
+    if fixed + message_tokens(messages) <= budget:
+        return messages
+    PROMPT_TRIMMED.inc(agent or 'unknown')
+    messages = list(messages)
+    while len(messages) > 2 and fixed + message_tokens(messages) > budget:
+        del messages[:2]
+    over = fixed + message_tokens(messages) - budget
+    if over > 0:
+        last = dict(messages[-1])
+        text = _content_text(last['content'])
+        marker = " [...shortened]"
+        last['content'] = text[:max(0, len(text) - over * 4 - len(marker))] + marker
+        messages[-1] = last
+    log.warning("Prompt for %s trimmed to fit the %s-token input budget", agent, budget)
+    return messages
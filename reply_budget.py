@@ -0,0 +1,78 @@
+"""
+Reply Budgets - output length per hint level
+
+Generation time grows with reply length, and a level-1 nudge needs a
+sentence or two, not 2000 tokens of headroom. Each hint level gets a
+max_tokens budget plus a matching length instruction appended to the
+student's turn, so the model aims short instead of being cut off. Free-form
+questions and celebrations (no level) get a medium budget.
+
+A reply that still hits its budget is trimmed back to its last full sentence
+(non-streamed replies only). The gateway records reply lengths and stop
+reasons in /metrics so the budgets can be tuned from real traffic.
+
+A round in which the model may still call a tool gets TOOL_ROUND_RESERVE
+extra tokens, so a tool call is not cut off halfway by a small level budget.
+
+Configuration (environment variables):
+  LLM_OUTPUT_BUDGETS     Token budget overrides, e.g. "1=150,2=250,free=600"
+  LLM_TOOL_ROUND_TOKENS  Extra tokens for rounds that may call a tool (default 300)
+"""
+
+import os
+
+# level -> (max_tokens, length instruction); None is a reply without a hint level
+BUDGETS = {
+    1: (200, "Keep this reply to one or two short sentences that end with a guiding question."),
+    2: (300, "Keep this reply under 80 words."),
+    3: (450, "Keep this reply under 150 words."),
+    4: (700, "Keep this reply under 250 words."),
+    5: (1000, "Keep the full walkthrough under 400 words."),
+    None: (800, "Keep this reply under 300 words.")
+}
+
+TOOL_ROUND_RESERVE = int(os.environ.get('LLM_TOOL_ROUND_TOKENS', 300))
+
+# Tutors should never go on to write the student's next turn
+STOP_SEQUENCES = ["\nStudent:"]
+
+SENTENCE_ENDS = ('. ', '! ', '? ', '.\n', '!\n', '?\n')
+
+
+def _parse_overrides(spec):
+    overrides = {}
+    for item in spec.split(','):
+        level, _, tokens = item.partition('=')
+        if level.strip() and tokens.strip():
+            key = None if level.strip() == 'free' else int(level)
+            overrides[key] = int(tokens)
+    return overrides
+
+
+for _level, _tokens in _parse_overrides(os.environ.get('LLM_OUTPUT_BUDGETS', '')).items():
+    BUDGETS[_level] = (_tokens, BUDGETS[_level][1])
+
+
+def for_level(level):
+    """(max_tokens, instruction) for a hint level, or for free-form replies"""
+    return BUDGETS.get(level, BUDGETS[None])
+
+
+def with_length_instruction(messages, instruction):
+    """Copy of messages with the length instruction added to the final turn"""
+    if not messages:
+        return messages
+    last = dict(messages[-1])
+    if isinstance(last['content'], str):
+        last['content'] = last['content'] + "\n\n" + instruction
+    else:
+        last['content'] = list(last['content']) + [{"type": "text", "text": instruction}]
+    return list(messages[:-1]) + [last]
+
+
+def trim_to_sentence(text):
+    """Cut a reply that ran out of tokens back to its last complete sentence"""
+    cut = max(text.rfind(end) for end in SENTENCE_ENDS)
+    if cut < len(text) // 2:
+        return text
+    return text[:cut + 1]
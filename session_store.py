@@ -0,0 +1,197 @@
+"""
+Server-Side Session Store - replaces Flask's cookie-serialized sessions
+
+Session data (agent3 conversation memory, attempt counters, problem state)
+stays on the server and only a random session ID travels in the cookie.
+Requests no longer sign and serialize the whole history, and the ~4 KB
+cookie limit no longer applies.
+
+Backends:
+  memory  - in-process dict with LRU + TTL eviction (default; one process only)
+  sqlite  - SQLite file shared by every worker on the instance and kept across restarts
+
+Configuration (environment variables):
+  SESSION_BACKEND        memory | sqlite (default memory)
+  SESSION_SQLITE_PATH    Database file for the sqlite backend (default sessions.sqlite3)
+  SESSION_TTL            Seconds an idle session is kept (default 86400)
+  SESSION_MAX_ENTRIES    Max sessions held by the memory backend (default 10000)
+"""
+
+from collections import OrderedDict
+from flask import current_app, session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that only carries its ID to the browser"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class MemorySessionBackend:
+    """Serialized sessions in an LRU dict; idle entries expire after ttl"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[sid]
+                return None
+            # Sliding expiry: reading a session keeps it alive
+            self._entries[sid] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(sid)
+            return data
+
+    def set(self, sid, data):
+        with self._lock:
+            self._entries[sid] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SQLiteSessionBackend:
+    """Serialized sessions in a SQLite table, one connection per thread"""
+
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        # Short-lived connection so no handle is inherited by forked workers
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                     "sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)")
+        conn.commit()
+        conn.close()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, data):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+                     (sid, data, time.time() + self.ttl))
+        if random.random() < self.PURGE_PROBABILITY:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface backed by one of the backends above"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.backend.get(sid)
+            if data is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(data), sid=sid)
+                except ValueError:
+                    pass
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def persist(self, session):
+        """Write the session to the backend (deletes it once emptied)"""
+        if session:
+            self.backend.set(session.sid, self.serializer.dumps(dict(session)))
+        else:
+            self.backend.delete(session.sid)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        if session.modified:
+            self.persist(session)
+        if session.new or (session.permanent and self.should_set_cookie(app, session)):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path,
+                                secure=secure, samesite=samesite)
+
+
+def create_session_interface():
+    """Build the session interface selected by SESSION_BACKEND"""
+    ttl = float(os.environ.get('SESSION_TTL', 86400))
+    backend_name = os.environ.get('SESSION_BACKEND', 'memory')
+    if backend_name == 'sqlite':
+        backend = SQLiteSessionBackend(os.environ.get('SESSION_SQLITE_PATH', 'sessions.sqlite3'), ttl)
+    elif backend_name == 'memory':
+        backend = MemorySessionBackend(ttl, int(os.environ.get('SESSION_MAX_ENTRIES', 10000)))
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend_name}")
+    return ServerSideSessionInterface(backend)
+
+
+def persist_session():
+    """Save the current session immediately.
+
+    Needed for changes made while a streamed response is still being sent,
+    after Flask has already saved the session for that request.
+    """
+    interface = current_app.session_interface
+    if isinstance(interface, ServerSideSessionInterface):
+        interface.persist(session)
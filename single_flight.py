@@ -0,0 +1,174 @@
+"""
+Single-Flight Coalescing - one upstream call for identical concurrent requests
+
+When students double-click Submit, or several students send the same wrong
+answer for the same part at the same moment, the prompts are identical.
+SingleFlight lets the first caller make the API call and hands its result
+to everyone who asked for the same key while it was in flight. Streams are
+read once by a background thread and replayed to every waiting client.
+
+The per-session chat guard keeps one /chat per student and agent in flight
+at a time; a second one gets a 409 instead of a second LLM call. Both are
+per process, like the hint cache.
+"""
+
+from flask import jsonify, make_response, request, session
+from functools import wraps
+import threading
+
+
+class _Flight:
+    """State of one in-flight call shared by its waiters"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.done = False
+        self.result = None
+        self.error = None
+        self.chunks = []
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key):
+        """(flight, is_leader) for key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.calls += 1
+            return flight, True
+
+    def _finish(self, key, flight, result=None, error=None):
+        with self._lock:
+            self._flights.pop(key, None)
+        with flight.cond:
+            flight.result = result
+            flight.error = error
+            flight.done = True
+            flight.cond.notify_all()
+
+    def do(self, key, fn):
+        """Return fn(), or the result of an identical call already in flight"""
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except Exception as e:
+                self._finish(key, flight, error=e)
+                raise
+            self._finish(key, flight, result=result)
+            return result
+        with flight.cond:
+            flight.cond.wait_for(lambda: flight.done)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stream(self, key, factory):
+        """Yield the chunks of factory(), shared with identical concurrent streams.
+
+        The first caller starts a thread that drains the upstream generator,
+        so a client that disconnects does not cut off the others.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._drain, args=(key, flight, factory), daemon=True).start()
+        index = 0
+        while True:
+            with flight.cond:
+                flight.cond.wait_for(lambda: len(flight.chunks) > index or flight.done)
+                chunks = flight.chunks[index:]
+                done = flight.done
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if done and index >= len(flight.chunks):
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+    def _drain(self, key, flight, factory):
+        try:
+            for chunk in factory():
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except Exception as e:
+            self._finish(key, flight, error=e)
+            return
+        self._finish(key, flight)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'calls': self.calls,
+                'coalesced': self.coalesced
+            }
+
+
+in_flight = SingleFlight()
+
+
+class ChatGuard:
+    """Set of (agent, session) pairs with a /chat request in progress"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = set()
+        self.rejected = 0
+
+    def enter(self, key):
+        with self._lock:
+            if key in self._active:
+                self.rejected += 1
+                return False
+            self._active.add(key)
+            return True
+
+    def leave(self, key):
+        with self._lock:
+            self._active.discard(key)
+
+
+chat_guard = ChatGuard()
+
+
+def one_chat_at_a_time(view):
+    """Reject a second /chat from the same student while one is still running.
+
+    A streamed reply holds the guard until the server closes the response,
+    i.e. after the last event has been sent.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        sid = getattr(session, 'sid', None)
+        if sid is None:
+            return view(*args, **kwargs)
+        key = (request.blueprint, sid)
+        if not chat_guard.enter(key):
+            return jsonify({
+                'response': "Still working on your last message - please wait for the reply.",
+                'busy': True
+            }), 409
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            chat_guard.leave(key)
+            raise
+        if response.is_streamed:
+            response.call_on_close(lambda: chat_guard.leave(key))
+        else:
+            chat_guard.leave(key)
+        return response
+    return wrapper
@@ -0,0 +1,55 @@
+"""
+Server-Sent Events helpers shared by the agent /chat endpoints
+
+A streaming reply is sent as a sequence of SSE events:
+  meta   - fields known before generation starts (attempt, is_correct, ...)
+  delta  - {"text": ...} for each chunk of model output as it arrives
+  done   - meta fields plus the full "response" text (and any extras)
+  error  - {"response": ...} student-facing message if generation failed
+"""
+
+from flask import Response, request, stream_with_context
+import json
+
+
+def wants_stream(data):
+    """True when the client asked for an event stream instead of JSON"""
+    if data and data.get('stream'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def sse_event(event, data):
+    """Format one SSE event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(meta, chunks, on_complete=None, on_error=None):
+    """Stream text chunks to the browser as Server-Sent Events.
+
+    on_complete(full_text) may return a dict of extra fields for the done
+    event; on_error(exception) returns the message shown to the student.
+    """
+    def generate():
+        yield sse_event('meta', meta)
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield sse_event('delta', {'text': chunk})
+        except Exception as e:
+            message = on_error(e) if on_error else "Error occurred. Try again."
+            yield sse_event('error', dict(meta, response=message))
+            return
+
+        full_text = ''.join(parts)
+        done = dict(meta, response=full_text)
+        if on_complete:
+            done.update(on_complete(full_text) or {})
+        yield sse_event('done', done)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,153 @@
+"""
+Structured Logging - JSON log lines written by a background thread
+
+Request handlers only put a record on an in-memory queue; a QueueListener
+thread formats it and writes to stdout. When the queue is full, records are
+dropped and counted instead of making a request wait. Every line made inside
+a request carries its request ID, taken from an X-Request-ID header or generated
+(and echoed back in the response).
+
+Request and response bodies are only logged for a sampled share of requests
+(log_payload), so Render logs stay readable under load.
+
+Configuration (environment variables):
+  LOG_LEVEL               Root level (default INFO)
+  LOG_LEVELS              Per-module overrides, e.g. "agent3_blueprint=DEBUG,werkzeug=WARNING"
+  LOG_FORMAT              json (default) or text
+  LOG_QUEUE_SIZE          Records buffered for the writer thread (default 10000)
+  LOG_PAYLOAD_SAMPLE      Share of requests whose payloads are logged, 0-1 (default 0)
+  LOG_PAYLOAD_MAX_CHARS   Longest payload written per line (default 2000)
+"""
+
+from flask import g, has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+PAYLOAD_SAMPLE = float(os.environ.get('LOG_PAYLOAD_SAMPLE', 0))
+PAYLOAD_MAX_CHARS = int(os.environ.get('LOG_PAYLOAD_MAX_CHARS', 2000))
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_queue = None
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, request ID and any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request ID on records made inside a request"""
+
+    def filter(self, record):
+        if has_request_context() and 'request_id' in g:
+            record.request_id = g.request_id
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener():
+    global _listener
+    output = logging.StreamHandler(sys.stdout)
+    if os.environ.get('LOG_FORMAT', 'json') == 'text':
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s',
+                                              defaults={'request_id': '-'}))
+    else:
+        output.setFormatter(JsonFormatter())
+    _listener = QueueListener(_queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(app):
+    """Route all logging through the queue and tag records with request IDs"""
+    global _queue, _handler
+    if _handler is None:
+        _queue = queue.Queue(int(os.environ.get('LOG_QUEUE_SIZE', 10000)))
+        _handler = DroppingQueueHandler(_queue)
+        _handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        root.handlers[:] = [_handler]
+        root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+        for name, level in _parse_levels(os.environ.get('LOG_LEVELS', '')).items():
+            logging.getLogger(name).setLevel(level)
+
+        _start_listener()
+        atexit.register(_stop_listener)
+        # A forked worker (gunicorn --preload) needs its own writer thread
+        os.register_at_fork(after_in_child=_start_listener)
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        g.log_payload = random.random() < PAYLOAD_SAMPLE
+
+    @app.after_request
+    def echo_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+
+def dropped_records():
+    """Records discarded because the writer thread fell behind"""
+    return _handler.dropped if _handler is not None else 0
+
+
+def log_payload(log, message, payload):
+    """Log a request/response body, but only for sampled requests"""
+    if not (has_request_context() and g.get('log_payload')):
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    if len(text) > PAYLOAD_MAX_CHARS:
+        text = text[:PAYLOAD_MAX_CHARS] + f'... ({len(text)} chars)'
+    log.info(message, extra={'payload': text})
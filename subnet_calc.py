@@ -0,0 +1,455 @@
+"""
+Subnet Calculator - exact subnet math for the tutors, exposed as Claude tools
+
+Working out block sizes, broadcast addresses and VLSM allocations in prose is
+slow (long output) and sometimes wrong. These functions do the math on
+32-bit integers, and subnet_tools offers them to Claude through tool use, so
+a reply can fetch exact values in one call and spend its words on the
+explanation instead.
+
+Addresses are dotted-quad strings; "1st subnet" means subnet zero, as in the
+problem sets. Bad input raises ValueError, which a tool call returns to the
+model as an error result.
+
+Configuration (environment variables):
+  LLM_MAX_TOOL_ROUNDS   Tool calls the model may chain in one reply (default 3)
+"""
+
+import heapq
+import json
+import logging
+import os
+from operator import itemgetter
+import metrics
+
+log = logging.getLogger(__name__)
+
+MAX_TOOL_ROUNDS = int(os.environ.get('LLM_MAX_TOOL_ROUNDS', 3))
+
+TOOL_CALLS = metrics.Counter(
+    'llm_tool_calls_total', "Subnet calculator calls made by the model", ('tool', 'outcome'))
+
+# Appended to the system prompts of agents that get the tools
+TOOL_PROMPT = """SUBNET CALCULATOR TOOLS:
+Use the subnet calculator tools for exact values (masks, block sizes, subnet IDs, broadcast addresses, ranges, VLSM allocations) instead of working the arithmetic out in your reply. Then explain the method briefly around those values.
+Only show the student values their current hint level allows."""
+
+_FULL = 0xFFFFFFFF
+
+
+def parse_address(text):
+    """Dotted quad -> 32-bit integer"""
+    octets = str(text).strip().split('.')
+    if len(octets) != 4 or not all(o.isdigit() and int(o) <= 255 for o in octets):
+        raise ValueError(f"Not an IPv4 address: {text!r}")
+    a, b, c, d = (int(o) for o in octets)
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+_OCTET_TEXT = [str(octet) for octet in range(256)]
+
+
+def format_address(value):
+    """32-bit integer -> dotted quad"""
+    text = _OCTET_TEXT
+    return f"{text[value >> 24 & 255]}.{text[value >> 16 & 255]}.{text[value >> 8 & 255]}.{text[value & 255]}"
+
+
+def prefix_mask(prefix):
+    """Mask integer for a prefix length"""
+    if not 0 <= prefix <= 32:
+        raise ValueError(f"Prefix must be 0-32, got {prefix}")
+    return (_FULL << (32 - prefix)) & _FULL
+
+
+# Dotted mask for every prefix length, so allocations need not format one each
+_MASK_TEXT = [format_address(prefix_mask(prefix)) for prefix in range(33)]
+
+
+def mask_prefix(mask):
+    """Prefix length of a dotted-quad mask (must be contiguous ones)"""
+    value = parse_address(mask)
+    prefix = bin(value).count('1')
+    if prefix_mask(prefix) != value:
+        raise ValueError(f"Not a valid subnet mask: {mask!r}")
+    return prefix
+
+
+def address_class(value):
+    """Classful letter from the first octet"""
+    first = value >> 24
+    if first < 128:
+        return 'A'
+    if first < 192:
+        return 'B'
+    if first < 224:
+        return 'C'
+    return 'D' if first < 240 else 'E'
+
+
+def default_prefix(value):
+    """Classful default prefix (8/16/24) for a class A/B/C address"""
+    cls = address_class(value)
+    if cls not in 'ABC':
+        raise ValueError(f"Class {cls} addresses have no default mask")
+    return {'A': 8, 'B': 16, 'C': 24}[cls]
+
+
+def bits_for(count):
+    """Smallest n with 2^n >= count"""
+    if count < 1:
+        raise ValueError("Count must be at least 1")
+    return (count - 1).bit_length()
+
+
+def _describe(network, prefix):
+    """Every value a tutor might quote about network/prefix"""
+    mask = prefix_mask(prefix)
+    size = 1 << (32 - prefix)
+    broadcast = network + size - 1
+    octet = (prefix - 1) // 8 if prefix else 0
+    return {
+        'network': format_address(network),
+        'prefix': prefix,
+        'cidr': f"{format_address(network)}/{prefix}",
+        'mask': format_address(mask),
+        'wildcard': format_address(~mask & _FULL),
+        'broadcast': format_address(broadcast),
+        'first_host': format_address(network + 1) if size > 2 else format_address(network),
+        'last_host': format_address(broadcast - 1) if size > 2 else format_address(broadcast),
+        'total_addresses': size,
+        'usable_hosts': size - 2 if size > 2 else 0,
+        'block_size': 256 - (mask >> (8 * (3 - octet)) & 255) if prefix else 256,
+        'changing_octet': octet + 1
+    }
+
+
+def subnet_info(address, prefix=None, mask=None):
+    """Network, broadcast, host range and mask for an address and prefix/mask.
+
+    Without a prefix or mask the classful default is used.
+    """
+    value = parse_address(address)
+    if mask is not None:
+        prefix = mask_prefix(mask)
+    elif prefix is None:
+        prefix = default_prefix(value)
+    info = _describe(value & prefix_mask(prefix), prefix)
+    info.update({
+        'address': format_address(value),
+        'address_class': address_class(value),
+        'address_binary': '.'.join(f"{value >> shift & 255:08b}" for shift in (24, 16, 8, 0))
+    })
+    return info
+
+
+def address_map(base_prefix, subnet_bits):
+    """Custom address map letters, e.g. N.N.N.sssshhhh for a /24 with 4 borrowed bits.
+
+    Default network octets are N and all-host octets H; the octets in
+    between are spelled out bit by bit as s (subnet) and h (host).
+    """
+    prefix = base_prefix + subnet_bits
+    octets = []
+    for start in range(0, 32, 8):
+        if start + 8 <= base_prefix:
+            octets.append('N')
+        elif start >= prefix:
+            octets.append('H')
+        else:
+            octets.append(''.join('s' if bit < prefix else 'h' for bit in range(start, start + 8)))
+    return '.'.join(octets)
+
+
+def subnet_plan(network, subnets=None, hosts=None):
+    """Subnet and host bits for a classful network's subnet or host requirement.
+
+    With both requirements, the subnet bits come from the subnet count and
+    the plan reports whether the remaining host bits still fit the hosts.
+    """
+    value = parse_address(network)
+    base = default_prefix(value)
+    available = 32 - base
+    if subnets is None and hosts is None:
+        raise ValueError("Give a subnet count, a host count, or both")
+    if subnets is not None:
+        subnet_bits = bits_for(subnets)
+        host_bits = available - subnet_bits
+    else:
+        host_bits = bits_for(hosts + 2)
+        subnet_bits = available - host_bits
+    if subnet_bits < 0 or host_bits < 2:
+        raise ValueError(f"Class {address_class(value)} has only {available} bits to divide")
+    prefix = base + subnet_bits
+    return {
+        'address_class': address_class(value),
+        'default_mask': format_address(prefix_mask(base)),
+        'available_bits': available,
+        'subnet_bits': subnet_bits,
+        'host_bits': host_bits,
+        'total_subnets': 1 << subnet_bits,
+        'total_addresses_per_subnet': 1 << host_bits,
+        'usable_hosts_per_subnet': (1 << host_bits) - 2,
+        'hosts_fit': hosts is None or (1 << host_bits) - 2 >= hosts,
+        'custom_mask': format_address(prefix_mask(prefix)),
+        'prefix': prefix,
+        'address_map': address_map(base, subnet_bits)
+    }
+
+
+class SubnetRanges:
+    """Equal-size subnets of a classful network, queried without listing them.
+
+    Every subnet is base + (n - 1) * block, so the nth subnet and the subnet
+    holding an address are a multiply or a shift away, even for the 2^22
+    subnets of a class A network.
+    """
+
+    def __init__(self, network, subnet_bits):
+        value = parse_address(network)
+        self.base_prefix = default_prefix(value)
+        self.prefix = self.base_prefix + subnet_bits
+        if subnet_bits < 0 or self.prefix > 30:
+            raise ValueError(f"Cannot borrow {subnet_bits} bits from a /{self.base_prefix} network")
+        self.start = value & prefix_mask(self.base_prefix)
+        self.size = 1 << (32 - self.prefix)
+        self.count = 1 << subnet_bits
+
+    def subnet_id(self, n):
+        """Integer ID of the nth subnet (1 = subnet zero)"""
+        if not 1 <= n <= self.count:
+            raise ValueError(f"There are only {self.count} subnets with {self.prefix - self.base_prefix} borrowed bits")
+        return self.start + (n - 1) * self.size
+
+    def broadcast(self, n):
+        return self.subnet_id(n) + self.size - 1
+
+    def subnet_range(self, n):
+        """(subnet ID, broadcast) of the nth subnet, as dotted quads"""
+        first = self.subnet_id(n)
+        return format_address(first), format_address(first + self.size - 1)
+
+    def usable_range(self, n):
+        """(first, last) assignable address of the nth subnet, as dotted quads"""
+        first = self.subnet_id(n)
+        return format_address(first + 1), format_address(first + self.size - 2)
+
+    def containing(self, address):
+        """Which subnet (1 = subnet zero) an address belongs to"""
+        value = parse_address(address)
+        if not self.start <= value < self.start + self.size * self.count:
+            raise ValueError(f"{address} is not inside {format_address(self.start)}/{self.base_prefix}")
+        return ((value - self.start) >> (32 - self.prefix)) + 1
+
+    def describe(self, n):
+        info = _describe(self.subnet_id(n), self.prefix)
+        info.update({'n': n, 'total_subnets': self.count})
+        return info
+
+
+def nth_subnet(network, subnet_bits, n):
+    """The nth subnet (1 = subnet zero) of a classful network with subnet_bits borrowed"""
+    return SubnetRanges(network, subnet_bits).describe(n)
+
+
+def containing_subnet(network, subnet_bits, address):
+    """The subnet of a classful network (subnet_bits borrowed) that holds address"""
+    ranges = SubnetRanges(network, subnet_bits)
+    return ranges.describe(ranges.containing(address))
+
+
+class VlsmAllocator:
+    """Buddy allocator over one network's address space.
+
+    Free space is kept as aligned power-of-two blocks, one min-heap of block
+    starts per prefix length. A request takes the lowest free block of the
+    smallest size that fits and splits it in halves down to the size needed,
+    so every subnet lands on its own boundary. Requests placed largest-first
+    come out contiguous from the start of the network, as taught.
+    """
+
+    def __init__(self, start, prefix):
+        self.start = start & prefix_mask(prefix)
+        self.prefix = prefix
+        self.total = 1 << (32 - prefix)
+        self.used = 0
+        # Index = prefix length
+        self._free = [[] for _ in range(33)]
+        self._free[prefix].append(self.start)
+
+    def allocate(self, prefix):
+        """Start address of a new /prefix block"""
+        free = self._free
+        size_prefix = prefix
+        while not free[size_prefix]:
+            size_prefix -= 1
+            if size_prefix < self.prefix:
+                raise ValueError(f"No free /{prefix} block left in {format_address(self.start)}/{self.prefix}")
+        block = heapq.heappop(free[size_prefix])
+        # Keep the lower half, free the upper half, until the block is /prefix
+        for split in range(size_prefix + 1, prefix + 1):
+            heapq.heappush(free[split], block + (1 << (32 - split)))
+        self.used += 1 << (32 - prefix)
+        return block
+
+    def free_blocks(self):
+        """(start, prefix) of every free block, in address order"""
+        return sorted((start, prefix) for prefix, starts in enumerate(self._free) for start in starts)
+
+    def utilization(self):
+        return self.used / self.total
+
+
+def host_prefix(hosts):
+    """Prefix of the smallest subnet with room for hosts (at least a /30)"""
+    return 32 - max(2, bits_for(hosts + 2))
+
+
+def vlsm_allocate(network, requirements):
+    """Largest-first VLSM allocation of requirements [{name, hosts}] inside network.
+
+    network may carry a /prefix; otherwise the classful default is used.
+    Reports each subnet (block, mask, broadcast; subnet_info has the rest),
+    the free blocks left over, and how much of the network (utilization) and
+    of the allocated space (host_efficiency) is used. Each subnet costs a
+    few heap operations, so time grows as n log n: a few hundred subnets
+    take about a millisecond.
+    """
+    address, _, prefix = str(network).partition('/')
+    value = parse_address(address)
+    allocator = VlsmAllocator(value, int(prefix) if prefix else default_prefix(value))
+    # sorted() is stable, so equal requirements keep their given order
+    order = sorted(requirements, key=itemgetter('hosts'), reverse=True)
+    prefixes = {hosts: host_prefix(hosts) for hosts in {requirement['hosts'] for requirement in order}}
+    allocations = []
+    for requirement in order:
+        subnet_prefix = prefixes[requirement['hosts']]
+        try:
+            block = allocator.allocate(subnet_prefix)
+        except ValueError:
+            raise ValueError(f"{requirement.get('name', 'Subnet')} does not fit in {network}") from None
+        size = 1 << (32 - subnet_prefix)
+        subnet = format_address(block)
+        allocations.append({
+            'name': requirement.get('name', ''),
+            'hosts_needed': requirement['hosts'],
+            'network': subnet,
+            'prefix': subnet_prefix,
+            'cidr': f"{subnet}/{subnet_prefix}",
+            'mask': _MASK_TEXT[subnet_prefix],
+            'broadcast': format_address(block + size - 1),
+            'usable_hosts': size - 2
+        })
+    return {
+        'network': f"{format_address(allocator.start)}/{allocator.prefix}",
+        'allocations': allocations,
+        'free_blocks': [f"{format_address(start)}/{prefix}" for start, prefix in allocator.free_blocks()],
+        'addresses_used': allocator.used,
+        'addresses_free': allocator.total - allocator.used,
+        'utilization': round(allocator.utilization(), 4),
+        'host_efficiency': round(sum(r['hosts'] for r in requirements) / allocator.used, 4) if allocator.used else 0.0
+    }
+
+
+class ToolSet:
+    """Tool definitions for the Messages API and the functions behind them"""
+
+    def __init__(self, tools):
+        self._functions = {tool['name']: function for tool, function in tools}
+        self.definitions = [tool for tool, _ in tools]
+
+    def run(self, block):
+        """tool_result content block for one tool_use block"""
+        function = self._functions.get(block.name)
+        try:
+            if function is None:
+                raise ValueError(f"Unknown tool {block.name}")
+            content, is_error = json.dumps(function(**block.input)), False
+        except (ValueError, TypeError, KeyError) as e:
+            log.info("Tool %s rejected %s: %s", block.name, block.input, e)
+            content, is_error = str(e), True
+        TOOL_CALLS.inc(block.name, 'error' if is_error else 'ok')
+        return {"type": "tool_result", "tool_use_id": block.id, "content": content, "is_error": is_error}
+
+
+_ADDRESS = {"type": "string", "description": "Dotted-quad IPv4 address, e.g. 196.23.45.0"}
+
+subnet_tools = ToolSet([
+    ({
+        "name": "subnet_info",
+        "description": "Network, broadcast, first/last usable host, mask, block size, class and "
+                       "binary form for an IPv4 address with a prefix or mask (classful default if neither).",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "address": _ADDRESS,
+                "prefix": {"type": "integer", "description": "Prefix length, e.g. 27"},
+                "mask": {"type": "string", "description": "Subnet mask, e.g. 255.255.255.224"}
+            },
+            "required": ["address"]
+        }
+    }, subnet_info),
+    ({
+        "name": "subnet_plan",
+        "description": "Subnet bits, host bits, totals, custom mask and custom address map for dividing a "
+                       "classful network into at least `subnets` subnets and/or subnets of at least "
+                       "`hosts` usable hosts.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "network": _ADDRESS,
+                "subnets": {"type": "integer", "description": "Subnets needed"},
+                "hosts": {"type": "integer", "description": "Usable hosts needed per subnet"}
+            },
+            "required": ["network"]
+        }
+    }, subnet_plan),
+    ({
+        "name": "nth_subnet",
+        "description": "Subnet ID, broadcast and usable range of the nth subnet (n=1 is subnet zero) "
+                       "of a classful network with the given number of borrowed subnet bits.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "network": _ADDRESS,
+                "subnet_bits": {"type": "integer", "description": "Bits borrowed for subnetting"},
+                "n": {"type": "integer", "description": "Which subnet, counting subnet zero as 1"}
+            },
+            "required": ["network", "subnet_bits", "n"]
+        }
+    }, nth_subnet),
+    ({
+        "name": "containing_subnet",
+        "description": "Which subnet (n, counting subnet zero as 1) of a classful network with the given "
+                       "borrowed bits holds an address, with that subnet's ID, broadcast and usable range.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "network": _ADDRESS,
+                "subnet_bits": {"type": "integer", "description": "Bits borrowed for subnetting"},
+                "address": _ADDRESS
+            },
+            "required": ["network", "subnet_bits", "address"]
+        }
+    }, containing_subnet),
+    ({
+        "name": "vlsm_allocate",
+        "description": "Largest-first VLSM allocation: the CIDR block, mask and range each "
+                       "requirement gets inside a network, plus the free blocks left and utilization.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "network": {"type": "string", "description": "Network to divide, e.g. 200.75.80.0/24"},
+                "requirements": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"name": {"type": "string"}, "hosts": {"type": "integer"}},
+                        "required": ["hosts"]
+                    }
+                }
+            },
+            "required": ["network", "requirements"]
+        }
+    }, vlsm_allocate)
+])
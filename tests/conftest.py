@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+import pytest
+
+# The app is a set of flat modules in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import circuit_breaker
+import llm_gateway
+import llm_limiter
+import mock_anthropic
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """Starts mock_anthropic.py and points the gateway at it.
+
+    Call the fixture with the canned responses (and any error rates) to use;
+    it returns the mock's MockConfig, whose counts show what it received.
+    The gateway gets its own client, limiter and breaker for each test.
+    """
+    servers = []
+
+    def start(responses=({'text': "Mock reply."},), **options):
+        settings = dict(ttft=lambda: 0, tokens_per_sec=1e6, rate_429=0, rate_529=0, rate_timeout=0,
+                        timeout_seconds=0, retry_after=0)
+        settings.update(options)
+        config = mock_anthropic.MockConfig(responses=list(responses), **settings)
+        server = mock_anthropic.build_server('127.0.0.1', 0, config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv('LLM_BASE_URL', f"http://127.0.0.1:{server.server_port}")
+        monkeypatch.setenv('ANTHROPIC_API_KEY', 'mock')
+        monkeypatch.setattr(llm_gateway, '_client', None)
+        return config
+
+    monkeypatch.setattr(llm_gateway, 'limiter', llm_limiter.ConcurrencyLimiter(4, 4, 5))
+    monkeypatch.setattr(llm_gateway, 'breaker', circuit_breaker.CircuitBreaker(60, 10, 0.5, 20, 30))
+    monkeypatch.setattr(llm_limiter, 'RETRY_BASE_DELAY', 0.01)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,53 @@
+from flask import Flask
+import pytest
+import agent1_blueprint
+import problem_generator
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent1_blueprint.agent1_bp, url_prefix='/agent1')
+    return app.test_client()
+
+
+def practice(client, number, seed=None):
+    return client.post('/agent1/new_question', json={
+        'quiz_type': 'binary_to_decimal', 'question_number': number, 'seed': seed}).get_json()
+
+
+def test_practice_question_is_reproducible_from_its_set(client):
+    first = practice(client, 7)['question']
+    again = practice(client, 7, first['seed'])['question']
+    assert again == first
+    assert again['question'].startswith("Question 7: Convert Binary to Decimal:")
+
+
+def test_seed_zero_is_a_set_of_its_own(client):
+    reply = practice(client, 3, 0)
+    assert reply['question']['seed'] == 0
+    assert reply['question'] == problem_generator.agent1_question('binary_to_decimal', 0, 3)
+    assert "(set 0)" in reply['message']
+
+
+def test_drill_set_lists_the_questions_practice_serves(client):
+    reply = client.post('/agent1/drill_set', json={'quiz_type': 'decimal_to_binary', 'seed': 0}).get_json()
+    assert reply['seed'] == 0
+    questions = problem_generator.agent1_batch('decimal_to_binary', 0)
+    assert len(questions) == 10
+    for question in questions:
+        assert question['question'] in reply['message']
+
+
+def test_drill_set_rejects_unknown_quiz_types(client):
+    reply = client.post('/agent1/drill_set', json={'quiz_type': 'nope'})
+    assert reply.status_code == 400
+
+
+@pytest.mark.parametrize("quiz_type", sorted(problem_generator.QUIZ_GENERATORS))
+def test_generated_answers_are_accepted_by_chat(client, quiz_type):
+    question = client.post('/agent1/new_question', json={'quiz_type': quiz_type, 'question_number': 4,
+                                                         'seed': 11}).get_json()['question']
+    reply = client.post('/agent1/chat', json={'message': question['answer'], 'question': question, 'attempt': 0})
+    assert reply.get_json()['is_correct']
@@ -0,0 +1,34 @@
+from flask import Flask
+import pytest
+import agent2_blueprint
+import problem_generator
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent2_blueprint.agent2_bp, url_prefix='/agent2')
+    return app.test_client()
+
+
+def test_practice_problem_keeps_a_seed_of_zero(client):
+    reply = client.post('/agent2/load_problem', json={'problem_number': 'practice', 'seed': 0}).get_json()
+    assert reply['problem_number'] == 'p0'
+    assert reply['problem'] == problem_generator.agent2_practice(0)
+
+
+def test_practice_problem_gets_a_new_seed_by_default(client):
+    reply = client.post('/agent2/load_problem', json={'problem_number': 'practice'}).get_json()
+    assert problem_generator.practice_seed(reply['problem_number']) is not None
+
+
+def test_practice_problem_rejects_a_bad_seed(client):
+    reply = client.post('/agent2/load_problem', json={'problem_number': 'practice', 'seed': 'abc'})
+    assert reply.status_code == 400
+
+
+def test_chat_checks_practice_answers(client):
+    mask = problem_generator.agent2_practice(42)['answers']['part8']
+    reply = client.post('/agent2/chat', json={'problem_number': 'p42', 'part': 'part8', 'answer': mask}).get_json()
+    assert reply['is_correct']
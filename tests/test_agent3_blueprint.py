@@ -0,0 +1,64 @@
+from flask import Flask
+import pytest
+import agent3_blueprint
+import hint_bank
+import llm_gateway
+import problem_generator
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(llm_gateway, 'complete', lambda **kwargs: "Claude reply")
+    monkeypatch.setattr(hint_bank, 'lookup', lambda *args: None)
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent3_blueprint.agent3_bp, url_prefix='/agent3')
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['problem_id'] = 1
+        session['current_part'] = 'part9'
+    return client
+
+
+def chat(client, message):
+    return client.post('/agent3/chat', json={'message': message}).get_json()
+
+
+@pytest.mark.parametrize("message", [
+    "is it 210.220.3.0 to 210.220.3.63?",
+    "not 210.220.3.0 to 210.220.3.64",
+    "how do I find the range",
+    "I don't get the block size",
+])
+def test_questions_are_not_counted_as_attempts(client, message):
+    reply = chat(client, message)
+    assert reply['attempts'] == 0
+    assert not reply['is_correct']
+
+
+def test_wrong_and_right_ranges(client):
+    assert chat(client, "210.220.3.0 - 210.220.3.127")['attempts'] == 1
+    assert chat(client, "210.220.3.1 to 210.220.3.62")['attempts'] == 2
+    reply = chat(client, "210.220.3.0 through 210.220.3.63")
+    assert reply['is_correct']
+    assert reply['attempts'] == 2
+
+
+def test_finished_parts_collapse_into_a_summary(client):
+    chat(client, "how do I find the range")
+    chat(client, "210.220.3.0 - 210.220.3.127")
+    with client.session_transaction() as session:
+        assert len(session['memory']['window']) == 4
+    client.post('/agent3/next_part')
+    with client.session_transaction() as session:
+        assert session['current_part'] == 'part10'
+        assert session['memory']['window'] == []
+        summary, = session['memory']['summaries']
+        assert summary.startswith("Part 9 (") and summary.endswith("completed after 1 incorrect attempt(s)")
+
+
+def test_practice_problem_is_rebuilt_from_the_seed_in_its_url(client):
+    assert client.get('/agent3/problem/p7').status_code == 200
+    answer = problem_generator.agent3_practice(7)['answers']['part1']
+    assert chat(client, answer)['is_correct']
+    assert client.get('/agent3/practice').headers['Location'].startswith('/agent3/problem/p')
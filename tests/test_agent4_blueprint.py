@@ -0,0 +1,160 @@
+from flask import Flask
+import pytest
+import agent4_blueprint
+import llm_gateway
+import problem_generator
+import subnet_calc
+
+PART = agent4_blueprint.PROBLEMS[1]['parts'][1]
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Answers every Claude call with a canned reply and records its arguments"""
+    calls = []
+
+    def complete(**kwargs):
+        calls.append(kwargs)
+        return "Claude reply"
+
+    monkeypatch.setattr(llm_gateway, 'complete', complete)
+    return calls
+
+
+@pytest.fixture
+def client(llm_calls):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent4_blueprint.agent4_bp, url_prefix='/agent4')
+    return app.test_client()
+
+
+def chat(client, message, part=1):
+    return client.post('/agent4/chat', json={'message': message, 'problem_num': 1, 'current_part': part}).get_json()
+
+
+def attempts(client, part=1):
+    with client.session_transaction() as session:
+        return session.get('agent4_attempts', {}).get(f'1:{part}', 0)
+
+
+def test_correct_answer_is_served_locally_and_advances(client, llm_calls):
+    reply = chat(client, '200.75.80.0/25')
+    assert reply['response'].startswith('✅ Correct!')
+    assert reply['next_part'] == 2
+    assert not llm_calls
+
+
+def test_wrong_answer_counts_an_attempt_and_serves_the_next_hint(client, llm_calls):
+    first = chat(client, '200.75.80.0/24')
+    second = chat(client, '200.75.80.0/26')
+    assert first['response'].startswith('❌ Not quite')
+    assert PART['hint_level_1'] in first['response']
+    assert PART['hint_level_2'] in second['response']
+    assert attempts(client) == 2
+    assert not llm_calls
+
+
+@pytest.mark.parametrize("message", [
+    "Is it 200.75.80.0/25?",
+    "not 200.75.80.0/25",
+    "200.75.80.0/25 not sure",
+    "why does R&D start at 200.75.80.0?",
+])
+def test_questions_and_negations_go_to_claude_without_an_attempt(client, llm_calls, message):
+    reply = chat(client, message)
+    assert reply['response'] == "Claude reply"
+    assert attempts(client) == 0
+    assert len(llm_calls) == 1
+
+
+def test_asking_for_hints_never_skips_ahead_of_the_attempts(client, llm_calls):
+    for _ in range(5):
+        reply = chat(client, 'hint')
+        assert 'Hint level 1:' in reply['response']
+    assert attempts(client) == 0
+    chat(client, '200.75.80.0/24')
+    chat(client, '200.75.80.0/26')
+    assert 'Hint level 2:' in chat(client, 'hint please')['response']
+    assert 'Hint level 2:' in chat(client, 'level 5')['response']
+    assert 'Hint level 1:' in chat(client, 'level 1')['response']
+    assert attempts(client) == 2
+    assert not llm_calls
+
+
+def test_hint_level_is_capped_at_five(client):
+    for _ in range(7):
+        reply = chat(client, '10.0.0.0/8')
+    assert 'Hint level 5:' in reply['response']
+    assert attempts(client) == 7
+
+
+def test_without_local_hints_wrong_answers_still_raise_the_level(client, llm_calls, monkeypatch):
+    monkeypatch.setattr(agent4_blueprint, 'LOCAL_HINTS', False)
+    for level in range(1, 4):
+        assert chat(client, '200.75.80.0/24')['response'] == "Claude reply"
+        assert llm_calls[-1]['level'] == level
+        assert f"Hint level {level}" in llm_calls[-1]['context']
+    assert attempts(client) == 3
+    chat(client, 'why a /25?')
+    assert llm_calls[-1]['level'] is None
+    assert "Hint level 3" in llm_calls[-1]['context']
+    assert attempts(client) == 3
+
+
+def test_part_details_go_in_the_cached_context_not_the_student_turn(client, llm_calls):
+    chat(client, "why a /25?")
+    call = llm_calls[-1]
+    assert PART['question'] in call['context']
+    assert call['messages'][-1] == {"role": "user", "content": "Student: why a /25?"}
+
+
+def test_client_catches_up_on_its_conversation_after_a_seq(client, llm_calls):
+    first = chat(client, "why a /25?")
+    reply = client.post('/agent4/chat', json={'message': "and the mask?", 'problem_num': 1, 'current_part': 1,
+                                              'conversation_id': first['conversation_id']}).get_json()
+    assert reply['conversation_id'] == first['conversation_id']
+    assert (first['seq'], reply['seq']) == (2, 4)
+    assert llm_calls[-1]['messages'][:2] == [{'role': 'user', 'content': "why a /25?"},
+                                             {'role': 'assistant', 'content': "Claude reply"}]
+    missed = client.get(f"/agent4/conversations/{reply['conversation_id']}?since=2").get_json()
+    assert [m['content'] for m in missed['messages']] == ["and the mask?", "Claude reply"]
+    assert missed['seq'] == 4
+
+
+def test_new_part_starts_a_new_conversation(client):
+    created = client.post('/agent4/conversations', json={'problem_num': 1, 'part_num': 1})
+    assert created.status_code == 201
+    conversation_id = created.get_json()['conversation_id']
+    reply = client.post('/agent4/chat', json={'message': "hint", 'problem_num': 1, 'current_part': 2,
+                                              'conversation_id': conversation_id}).get_json()
+    assert reply['conversation_id'] != conversation_id
+    assert client.get('/agent4/conversations/unknown').status_code == 404
+    assert client.post('/agent4/conversations', json={'problem_num': 1, 'part_num': 99}).status_code == 404
+
+
+def test_only_the_newest_conversations_are_kept(client):
+    ids = [client.post('/agent4/conversations', json={'problem_num': 1, 'part_num': 1}).get_json()['conversation_id']
+           for _ in range(agent4_blueprint.MAX_CONVERSATIONS + 1)]
+    assert client.get(f'/agent4/conversations/{ids[0]}').status_code == 404
+    assert client.get(f'/agent4/conversations/{ids[-1]}').status_code == 200
+
+
+def test_pasted_walls_of_text_are_clipped_before_claude_sees_them(client, llm_calls):
+    chat(client, "why? " * 2000)
+    assert llm_calls[-1]['messages'][-1]['content'].endswith("[...message shortened]")
+    assert len(llm_calls[-1]['messages'][-1]['content']) < 2000
+
+
+def test_claude_gets_the_subnet_calculator(client, llm_calls):
+    chat(client, "why a /25?")
+    assert llm_calls[-1]['tools'] is subnet_calc.subnet_tools
+
+
+def test_practice_scenarios_are_served_by_seed(client, llm_calls):
+    problem_num = client.post('/agent4/practice').get_json()['problem_num']
+    assert client.get(f'/agent4/get_problem/{problem_num}').status_code == 200
+    answer = problem_generator.agent4_practice(problem_generator.practice_seed(problem_num))['parts'][1]['answer']
+    reply = client.post('/agent4/chat', json={'message': answer, 'problem_num': problem_num,
+                                              'current_part': 1}).get_json()
+    assert reply['next_part'] == 2
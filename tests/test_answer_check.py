@@ -0,0 +1,93 @@
+import pytest
+import answer_check
+
+
+@pytest.mark.parametrize("user, correct", [
+    ("/26", "255.255.255.192"),
+    ("255.255.255.192", "255.255.255.192"),
+    ("255.255.255.192 (/26)", "255.255.255.192"),
+    ("2", "2"),
+    ("it's 2", "2"),
+    ("2 subnets", "2"),
+    ("1,024", "1024"),
+    ("/28", "28"),
+    ("008", "8"),
+    ("10.0.0.0 - 10.0.0.63", "10.0.0.0 to 10.0.0.63"),
+    ("10.0.0.0-10.0.0.63", "10.0.0.0 to 10.0.0.63"),
+    ("from 10.0.0.0 to 10.0.0.63", "10.0.0.0 to 10.0.0.63"),
+    ("010.000.000.001", "10.0.0.1"),
+    ("The ID is 10.0.4.0.", "10.0.4.0"),
+    ("0011", "00000011"),
+    ("0000 0011", "00000011"),
+    ("180", "180"),
+    ("Class C", "C"),
+    ("c", "C"),
+    ("it is class c", "C"),
+    ("the answer is class C", "C"),
+    ("1st and 2nd octets", "First and Second octets"),
+    ("first, second", "First and Second octets"),
+    ("octets 1 and 2", "First and Second octets"),
+    ("200.75.80.0/25", "200.75.80.0/25"),
+    ("200.75.80.0 /25", "200.75.80.0/25"),
+    ("200.75.80.0 255.255.255.128", "200.75.80.0/25"),
+    ("my answer is 200.75.80.0/25", "200.75.80.0/25"),
+    ("N.N.N.ssss hhhh", "N.N.N.sssshhhh"),
+])
+def test_equivalent_answers_match(user, correct):
+    assert answer_check.matches(user, correct)
+
+
+@pytest.mark.parametrize("user, correct", [
+    # Wrong values
+    ("/25", "255.255.255.192"),
+    ("255.255.255.192 /25", "255.255.255.192"),
+    ("10.0.0.0 to 10.0.0.62", "10.0.0.0 to 10.0.0.63"),
+    ("10.0.0.63 to 10.0.0.0", "10.0.0.0 to 10.0.0.63"),
+    ("3", "00000011"),
+    ("10110100", "180"),
+    ("B", "C"),
+    ("first octet", "First and Second octets"),
+    ("200.75.80.0/26", "200.75.80.0/25"),
+    ("N.N.N.ssshhhhh", "N.N.N.sssshhhh"),
+    # Extra numbers or a different shape of value
+    ("1.2.3.4", "2"),
+    ("12.3.4", "1.2.3.4"),
+    ("1.2.3.4", "12.3.4"),
+    ("16 - 2 = 14", "14"),
+    ("10.0.0.0", "10.0.0.0 to 10.0.0.63"),
+    ("10.0.4.0/26", "10.0.4.0"),
+    ("10.0.4.0.5", "10.0.4.0"),
+    ("300.0.4.0", "10.0.4.0"),
+    ("200.75.80.0", "200.75.80.0/25"),
+    ("200.75.80.0/250", "200.75.80.0/25"),
+    # Questions and negations
+    ("Is it class C?", "C"),
+    ("class B or C", "B"),
+    ("why is the mask 255.255.255.192?", "255.255.255.192"),
+    ("How do I get 10.0.4.0?", "10.0.4.0"),
+    ("How do I get 10.0.4.0", "10.0.4.0"),
+    ("Why isnt it 200.75.80.0/25?", "200.75.80.0/25"),
+    ("Why isn't it 200.75.80.0/25", "200.75.80.0/25"),
+    ("not 14", "14"),
+    ("I do not think it is 14", "14"),
+    ("no, 14", "14"),
+    ("hint please", "C"),
+    ("what is it?", "28"),
+])
+def test_other_answers_do_not_match(user, correct):
+    assert not answer_check.matches(user, correct)
+
+
+@pytest.mark.parametrize("correct, kind", [
+    ("C", "class"),
+    ("01011000", "binary"),
+    ("88", "number"),
+    ("255.255.255.0", "mask"),
+    ("0.215.2.54", "address"),
+    ("200.75.80.0/25", "cidr"),
+    ("210.220.3.0 to 210.220.3.63", "range"),
+    ("Second, Third, and Fourth octets", "octets"),
+    ("N.N.N.sssshhhh", "text"),
+])
+def test_answer_kind(correct, kind):
+    assert answer_check.answer_kind(correct) == kind
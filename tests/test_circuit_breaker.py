@@ -0,0 +1,82 @@
+from flask import Flask
+import time
+import pytest
+import agent1_blueprint
+import fallback_hints
+import llm_gateway
+import llm_limiter
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from llm_limiter import LLMBusyError
+
+
+def _breaker(open_seconds=0.05):
+    return CircuitBreaker(window=60, min_calls=4, failure_ratio=0.5, slow_call=0.2, open_seconds=open_seconds)
+
+
+def test_breaker_stays_closed_below_min_calls():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_on_failures_and_slow_calls():
+    breaker = _breaker()
+    for ok, duration in [(True, 0.01), (False, 0.01), (True, 0.5), (True, 0.01)]:
+        breaker.before_call()
+        breaker.record(ok, duration)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()['trips'] == 1
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_breaker_lets_one_probe_through_and_closes_on_success():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False, 0.01)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_breaker_reopens_when_the_probe_fails():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(False, 0.01)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+
+def test_gateway_fails_fast_while_open_and_agents_serve_fallbacks(mock_api, monkeypatch):
+    config = mock_api(rate_529=1)
+    monkeypatch.setattr(llm_gateway, 'breaker', _breaker(open_seconds=60))
+    monkeypatch.setattr(llm_limiter, 'MAX_RETRIES', 2)
+    # Each call makes three attempts (two retries), so the second trips it
+    for _ in range(2):
+        with pytest.raises(LLMBusyError):
+            llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}],
+                                 max_tokens=500, agent='agent1')
+    assert llm_gateway.breaker.state == OPEN
+    sent = config.counts['requests']
+    with pytest.raises(CircuitOpenError):
+        llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}],
+                             max_tokens=500, agent='agent1')
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent1_blueprint.agent1_bp, url_prefix='/agent1')
+    question = {'question': "Convert 10000000 to decimal", 'answer': "128"}
+    reply = app.test_client().post('/agent1/chat', json={'message': "64", 'question': question, 'attempt': 0})
+    assert reply.get_json()['response'] == fallback_hints.agent1_hint(question['question'], "128", 1)
+    assert config.counts['requests'] == sent
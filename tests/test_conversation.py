@@ -0,0 +1,50 @@
+from conversation import ConversationLog, ConversationMemory, new_conversation
+
+
+def test_window_keeps_the_latest_whole_exchanges():
+    memory = ConversationMemory({}, max_turns=4, token_budget=1000)
+    for n in range(1, 4):
+        memory.add_exchange(f"question {n}", f"reply {n}")
+    assert [m['content'] for m in memory.state['window']] == ["question 2", "reply 2", "question 3", "reply 3"]
+    assert memory.state['dropped'] == 1
+
+
+def test_window_is_trimmed_to_the_token_budget_but_keeps_the_last_exchange():
+    memory = ConversationMemory({}, max_turns=20, token_budget=30)
+    memory.add_exchange("short", "short")
+    memory.add_exchange("long " * 100, "long " * 100)
+    assert [m['role'] for m in memory.state['window']] == ['user', 'assistant']
+    assert memory.state['window'][0]['content'].startswith("long")
+
+
+def test_closed_parts_become_summaries_before_the_current_context():
+    memory = ConversationMemory({}, max_turns=2, token_budget=1000)
+    memory.add_exchange("q1", "r1")
+    memory.close_part("Part 1: completed after 0 incorrect attempt(s)")
+    memory.add_exchange("q2", "r2")
+    memory.add_exchange("q3", "r3")
+    messages = memory.build_messages("CONTEXT")
+    assert messages[:2] == [{'role': 'user', 'content': "q3"}, {'role': 'assistant', 'content': "r3"}]
+    assert messages[2] == {'role': 'user', 'content': (
+        "PROGRESS SO FAR:\n- Part 1: completed after 0 incorrect attempt(s)\n"
+        "(1 earlier exchange(s) on this part omitted)\nCONTEXT")}
+
+
+def test_state_is_the_session_dict_itself():
+    state = {}
+    ConversationMemory(state).add_exchange("q", "r")
+    assert ConversationMemory(state).build_messages("CONTEXT")[0] == {'role': 'user', 'content': "q"}
+
+
+def test_log_numbers_messages_and_replays_after_a_seq():
+    log = ConversationLog(new_conversation(problem_num=1, part_num=1))
+    assert log.last_seq == 0
+    assert log.append('user', "hi") == 1
+    assert log.append('assistant', "hello") == 2
+    assert [m['content'] for m in log.since(1)] == ["hello"]
+    assert log.since(2) == []
+    assert log.history() == [{'role': 'user', 'content': "hi"}, {'role': 'assistant', 'content': "hello"}]
+
+
+def test_conversation_ids_are_unique():
+    assert new_conversation()['id'] != new_conversation()['id']
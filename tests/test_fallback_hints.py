@@ -0,0 +1,51 @@
+import pytest
+import agent3_blueprint
+import fallback_hints
+
+PROBLEM = agent3_blueprint.PROBLEMS[1]
+
+
+@pytest.mark.parametrize("level, shown", [(1, 0), (2, 1), (3, 2), (4, 2), (5, 3)])
+def test_reveal_shows_more_steps_per_level(level, shown):
+    text = fallback_hints.reveal("tip", ["a", "b", "c"], "42", level)
+    assert text.startswith(fallback_hints.NOTICE)
+    assert text.count("Step ") == shown
+    assert ("✅ Answer: 42" in text) == (level == 5)
+
+
+def test_agent1_hint_works_the_question_out():
+    text = fallback_hints.agent1_hint("Convert Binary to Decimal: 10100000", "160", 5)
+    assert "running total 160" in text
+    assert text.endswith("✅ Answer: 160")
+    assert "Class C address" in fallback_hints.agent1_hint(
+        "What is the Default Subnet Mask for: 200.1.2.3", "255.255.255.0", 2)
+
+
+def test_subnet_part_hint_builds_the_custom_mask():
+    text = fallback_hints.subnet_part_hint(PROBLEM, 'part8', 5)
+    assert "Fourth octet: turn on 2 bit(s) = 192" in text
+    assert text.endswith("✅ Answer: 255.255.255.192")
+
+
+def test_subnet_range_hint_counts_from_subnet_zero():
+    question = agent3_blueprint.get_part_question(PROBLEM, 'part12')
+    text = fallback_hints.subnet_range_hint(PROBLEM, 'part12', question, 5)
+    assert "The 4th subnet starts 3 x 64 = 192 addresses later, at 210.220.3.192" in text
+    assert "Its broadcast is one less than the next subnet ID: 210.220.3.255" in text
+    assert "210.220.3.193 to 210.220.3.254" in text
+
+
+def test_subnet_range_hint_without_a_usable_subnet_number():
+    text = fallback_hints.subnet_range_hint(PROBLEM, 'part9', "What is the 99th subnet?", 5)
+    assert "Step" not in text
+    assert text.endswith(f"✅ Answer: {PROBLEM['answers']['part9']}")
+
+
+def test_stream_with_fallback_only_replaces_a_failure_before_any_text():
+    def failing(after):
+        yield from after
+        raise RuntimeError("down")
+
+    assert list(fallback_hints.stream_with_fallback(failing([]), "fallback")) == ["fallback"]
+    with pytest.raises(RuntimeError):
+        list(fallback_hints.stream_with_fallback(failing(["partial"]), "fallback"))
@@ -0,0 +1,73 @@
+from flask import Flask
+import json
+import pytest
+import agent1_blueprint
+import hint_bank
+import llm_gateway
+import pregenerate_hints
+
+HINTS = {'agent1': {"What is 2+2?": {str(level): f"Hint {level}" for level in range(1, 6)}}}
+
+
+@pytest.fixture(autouse=True)
+def empty_bank(monkeypatch):
+    monkeypatch.setattr(hint_bank, '_hints', {})
+    monkeypatch.setattr(hint_bank, '_version', None)
+
+
+def test_saved_bank_loads_back(tmp_path):
+    path = str(tmp_path / 'bank.json')
+    version = hint_bank.save(HINTS, path, model='model')
+    hint_bank.load(path)
+    assert hint_bank.info() == {'version': version, 'items': {'agent1': 1}}
+    assert hint_bank.lookup('agent1', "What is 2+2?", 2) == "Hint 2"
+    assert not (tmp_path / 'bank.json.tmp').exists()
+
+
+def test_levels_past_five_get_the_last_hint(tmp_path):
+    path = str(tmp_path / 'bank.json')
+    hint_bank.save(HINTS, path)
+    hint_bank.load(path)
+    assert hint_bank.lookup('agent1', "What is 2+2?", 9) == "Hint 5"
+    assert hint_bank.lookup('agent1', "Unknown", 1) is None
+    assert hint_bank.lookup('agent2', "What is 2+2?", 1) is None
+
+
+def test_missing_or_unknown_format_leaves_the_bank_empty(tmp_path):
+    path = tmp_path / 'bank.json'
+    path.write_text(json.dumps({'format': 99, 'hints': HINTS}))
+    hint_bank.load(str(path))
+    assert hint_bank.info() == {'version': None, 'items': {}}
+    hint_bank.load(str(tmp_path / 'missing.json'))
+    assert hint_bank.lookup('agent1', "What is 2+2?", 1) is None
+
+
+def test_pregenerate_asks_once_per_item_and_level(monkeypatch):
+    requests = []
+    def complete(**request):
+        requests.append(request)
+        if request['level'] == 5:
+            raise RuntimeError("overloaded")
+        return f"Hint {request['level']}"
+    monkeypatch.setattr(llm_gateway, 'complete', complete)
+
+    hints, failures = pregenerate_hints.pregenerate(['agent1'], workers=2)
+    questions = [q['question'] for qs in agent1_blueprint.QUIZ_BANK.values() for q in qs]
+    assert len(requests) == 5 * len(questions)
+    assert len(failures) == len(questions)
+    assert all(r['model'] == llm_gateway.DEFAULT_MODEL for r in requests)
+    assert all("do not refer to a specific wrong answer" in r['messages'][0]['content'] for r in requests)
+    assert hints['agent1'][questions[0]] == {'1': "Hint 1", '2': "Hint 2", '3': "Hint 3", '4': "Hint 4"}
+
+
+def test_agent1_serves_bank_hints_without_calling_claude(tmp_path, monkeypatch):
+    question = agent1_blueprint.QUIZ_BANK['binary_to_decimal'][0]
+    path = str(tmp_path / 'bank.json')
+    hint_bank.save({'agent1': {question['question']: {'1': "Use the matrix."}}}, path)
+    hint_bank.load(path)
+    monkeypatch.setattr(llm_gateway, 'complete', lambda **request: pytest.fail("called Claude"))
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent1_blueprint.agent1_bp, url_prefix='/agent1')
+    reply = app.test_client().post('/agent1/chat', json={'message': "no idea", 'question': question, 'attempt': 0})
+    assert reply.get_json() == {'response': "Use the matrix.", 'is_correct': False, 'attempt': 1}
@@ -0,0 +1,70 @@
+import pytest
+import hint_cache
+import llm_gateway
+from hint_cache import HintCache, canonicalize_answer, make_key
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = HintCache(max_size=16, ttl=60)
+    monkeypatch.setattr(hint_cache, 'hint_cache', cache)
+    return cache
+
+
+@pytest.mark.parametrize("answer", ["255.255.255.0", " 255 . 255 . 255 . 0 ", "255.255.255.0.", "255.255.255.0!"])
+def test_trivially_different_answers_share_a_key(answer):
+    assert canonicalize_answer(answer) == "255.255.255.0"
+
+
+def test_key_levels_stop_at_five():
+    assert make_key('agent1', 'q', 7, 'C') == make_key('agent1', 'q', 5, ' c ')
+    assert make_key('agent1', 'q', 1, 'C') != make_key('agent1', 'q', 2, 'C')
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = HintCache(max_size=2, ttl=60)
+    cache.put('a', 'A')
+    cache.put('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('A', 'C')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_and_size_zero_disables():
+    expired = HintCache(max_size=2, ttl=0)
+    expired.put('a', 'A')
+    assert expired.get('a') is None
+    disabled = HintCache(max_size=0, ttl=60)
+    disabled.put('a', 'A')
+    assert disabled.stats()['size'] == 0
+
+
+def test_complete_calls_upstream_once_per_key(cache, monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_gateway, 'complete', lambda **request: calls.append(request) or "Hint")
+    key = make_key('agent1', 'q', 1, '89')
+    assert hint_cache.complete(key, agent='agent1') == "Hint"
+    assert hint_cache.complete(key, agent='agent1') == "Hint"
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def fake_stream(chunks, stop_reason):
+    def stream(**request):
+        yield from chunks
+        return stop_reason
+    return stream
+
+
+def test_stream_caches_a_finished_reply_and_replays_it_whole(cache, monkeypatch):
+    monkeypatch.setattr(llm_gateway, 'stream', fake_stream(["Try ", "128."], 'end_turn'))
+    assert list(hint_cache.stream('key')) == ["Try ", "128."]
+    assert list(hint_cache.stream('key')) == ["Try 128."]
+
+
+def test_stream_does_not_cache_a_reply_cut_off_at_max_tokens(cache, monkeypatch):
+    monkeypatch.setattr(llm_gateway, 'stream', fake_stream(["Try the", " matrix and"], 'max_tokens'))
+    assert list(hint_cache.stream('key')) == ["Try the", " matrix and"]
+    assert cache.get('key') is None
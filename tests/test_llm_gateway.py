@@ -0,0 +1,33 @@
+import llm_gateway
+
+
+def ask(text="What is a subnet mask?", **kwargs):
+    return llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": text}],
+                                max_tokens=500, **kwargs)
+
+
+def test_one_client_per_process(mock_api, monkeypatch):
+    mock_api()
+    client = llm_gateway.get_client()
+    assert llm_gateway.get_client() is client
+    assert client.max_retries == 0
+    # A forked worker builds its own client instead of sharing the parent's sockets
+    monkeypatch.setattr(llm_gateway.os, 'getpid', lambda: -1)
+    assert llm_gateway.get_client() is not client
+
+
+def test_every_agent_shares_the_pooled_client(mock_api):
+    config = mock_api()
+    assert ask(agent='agent1') == "Mock reply."
+    client = llm_gateway.get_client()
+    assert ask(agent='agent3') == "Mock reply."
+    assert llm_gateway.get_client() is client
+    assert config.counts['requests'] == 2
+
+
+def test_create_message_returns_the_sdk_message(mock_api):
+    mock_api()
+    message = llm_gateway.create_message(system="You are a tutor.", max_tokens=500, agent='agent2',
+                                         messages=[{"role": "user", "content": "hi"}])
+    assert message.stop_reason == 'end_turn'
+    assert message.content[0].text == "Mock reply."
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+import threading
+import time
+from anthropic import APIConnectionError, APIStatusError
+import pytest
+import llm_gateway
+import llm_limiter
+from llm_limiter import ConcurrencyLimiter, LLMBusyError, backoff_delay, give_up, is_retryable, retry_after
+
+def status_error(status, **headers):
+    response = SimpleNamespace(status_code=status, headers=headers, request=None)
+    return APIStatusError("error", response=response, body=None)
+
+
+def test_limiter_sheds_when_the_queue_is_full():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0, queue_timeout=1)
+    with limiter.slot():
+        with pytest.raises(LLMBusyError):
+            limiter.acquire()
+    assert limiter.stats()['shed'] == 1
+    assert limiter.stats()['active'] == 0
+
+
+def test_limiter_sheds_after_the_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    limiter.acquire()
+    with pytest.raises(LLMBusyError):
+        limiter.acquire()
+    limiter.release()
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_limiter_hands_a_released_slot_to_a_waiter():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        with limiter.slot():
+            acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.02)
+    assert not acquired.is_set()
+    limiter.release()
+    thread.join(1)
+    assert acquired.is_set()
+    assert limiter.stats()['shed'] == 0
+
+
+@pytest.mark.parametrize("status, retryable", [(400, False), (404, False), (408, True), (409, True),
+                                               (429, True), (500, True), (529, True)])
+def test_retryable_statuses(status, retryable):
+    assert is_retryable(status_error(status)) is retryable
+
+
+def test_server_can_veto_a_retry_and_connection_errors_retry():
+    assert not is_retryable(status_error(500, **{'x-should-retry': 'false'}))
+    assert is_retryable(APIConnectionError(request=None))
+    assert not is_retryable(ValueError())
+
+
+def test_retry_after_headers():
+    assert retry_after(status_error(429, **{'retry-after-ms': '1500'})) == 1.5
+    assert retry_after(status_error(429, **{'retry-after': '3'})) == 3.0
+    assert retry_after(status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_backoff_is_jittered_exponential_with_retry_after_as_floor(monkeypatch):
+    monkeypatch.setattr(llm_limiter, 'RETRY_BASE_DELAY', 0.5)
+    monkeypatch.setattr(llm_limiter, 'RETRY_MAX_DELAY', 8)
+    monkeypatch.setattr(llm_limiter, 'MAX_RETRIES', 2)
+    assert 0 <= backoff_delay(status_error(503), 1) <= 1.0
+    assert backoff_delay(status_error(429, **{'retry-after': '4'}), 0) == 4.0
+    assert backoff_delay(status_error(429, **{'retry-after': '60'}), 0) is None
+    assert backoff_delay(status_error(503), 2) is None
+    assert backoff_delay(status_error(400), 0) is None
+
+
+def test_overloads_become_busy_errors_for_students():
+    assert isinstance(give_up(status_error(529)), LLMBusyError)
+    error = status_error(500)
+    assert give_up(error) is error
+
+
+def test_gateway_retries_rate_limits_then_gives_up(mock_api, monkeypatch):
+    monkeypatch.setattr(llm_limiter, 'MAX_RETRIES', 2)
+    config = mock_api(rate_429=1)
+    with pytest.raises(LLMBusyError):
+        llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}],
+                             max_tokens=500, agent='agent1')
+    assert config.counts['requests'] == 3
+    assert config.counts['429'] == 3
+    assert llm_gateway.limiter.stats()['active'] == 0
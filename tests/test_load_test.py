@@ -0,0 +1,64 @@
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+import threading
+import pytest
+from load_test import Recorder, StudentClient, percentile
+from streaming import sse_response
+
+
+@pytest.fixture
+def base_url():
+    """A tiny app with a JSON route, an SSE /chat and a failing route"""
+    app = Flask(__name__)
+
+    @app.route('/question', methods=['POST'])
+    def question():
+        return jsonify({'question': request.json['n']})
+
+    @app.route('/agent1/chat', methods=['POST'])
+    def chat():
+        assert request.json['stream']
+        return sse_response({'attempt': 1}, iter(["Try ", "again."]))
+
+    @app.route('/broken')
+    def broken():
+        return jsonify({'error': "boom"}), 500
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_nearest_rank_percentiles():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([3], 99) == 3
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_per_route():
+    recorder = Recorder()
+    for seconds in (0.1, 0.3, 0.2):
+        recorder.record('POST /agent1/chat', seconds, 200, True)
+    recorder.record('POST /agent1/chat', 2.0, 409, False)
+    row, = recorder.summary(elapsed=2)
+    assert row['count'] == 4
+    assert row['rps'] == 2
+    assert (row['p50'], row['max']) == (0.2, 2.0)
+    assert row['error_rate'] == 0.25
+    assert row['statuses'] == {'200': 3, '409': 1}
+
+
+def test_student_client_times_json_sse_and_failed_requests(base_url):
+    recorder = Recorder()
+    client = StudentClient(base_url, recorder, timeout=5, stream=True)
+    assert client.post('/question', {'n': 7}, '/question') == {'question': 7}
+    assert client.post('/agent1/chat', {'message': "64"}, '/agent1/chat') == {'attempt': 1, 'response': "Try again."}
+    assert client.get('/broken', '/broken') == {}
+    rows = {row['route']: row for row in recorder.summary(elapsed=1)}
+    assert set(rows) == {'POST /question', 'POST /agent1/chat', 'POST /agent1/chat (first token)', 'GET /broken'}
+    assert rows['POST /agent1/chat']['error_rate'] == 0
+    assert rows['GET /broken']['statuses'] == {'500': 1}
+    assert rows['GET /broken']['error_rate'] == 1
+
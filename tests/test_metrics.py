@@ -0,0 +1,76 @@
+from flask import Flask
+import threading
+import pytest
+import metrics
+from metrics_blueprint import metrics_bp
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, '_metrics', [])
+    monkeypatch.setattr(metrics, '_collectors', [])
+
+
+def test_counter_merges_every_thread(registry):
+    counter = metrics.Counter('chats_total', "Chats", ('agent',))
+    threads = [threading.Thread(target=lambda: [counter.inc('agent1') for _ in range(100)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc('agent"2', amount=2.5)
+    assert metrics.render() == (
+        '# HELP chats_total Chats\n'
+        '# TYPE chats_total counter\n'
+        'chats_total{agent="agent\\"2"} 2.5\n'
+        'chats_total{agent="agent1"} 800\n')
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram('reply_seconds', "Replies", ('agent',), buckets=(0.5, 1))
+    for value in (0.1, 0.5, 0.7, 3):
+        histogram.observe(value, 'agent1')
+    assert histogram.render() == [
+        'reply_seconds_bucket{agent="agent1",le="0.5"} 2',
+        'reply_seconds_bucket{agent="agent1",le="1"} 3',
+        'reply_seconds_bucket{agent="agent1",le="+Inf"} 4',
+        'reply_seconds_sum{agent="agent1"} 4.3',
+        'reply_seconds_count{agent="agent1"} 4']
+
+
+def test_collectors_are_read_at_scrape_time(registry):
+    depth = [3]
+    metrics.register_collector(lambda: [('queue_depth', 'gauge', "Waiting", (), [((), depth[0])])])
+    assert metrics.render().endswith('queue_depth 3\n')
+    depth[0] = 0
+    assert metrics.render().endswith('queue_depth 0\n')
+
+
+def make_app():
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp)
+
+    @app.route('/agent1/<int:n>')
+    def page(n):
+        return 'ok'
+
+    return app
+
+
+def test_endpoint_times_routes_and_exposes_llm_state(monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    client = make_app().test_client()
+    client.get('/agent1/7')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{route="/agent1/<int:n>",method="GET",status="200"} ' in body
+    for name in ('llm_queue_depth', 'llm_breaker_open', 'hint_cache_hit_ratio', 'llm_model_tier_info',
+                 'llm_request_duration_seconds'):
+        assert f'# TYPE {name} ' in body
+
+
+def test_endpoint_requires_the_token_when_set(monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 'secret')
+    client = make_app().test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
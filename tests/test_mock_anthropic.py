@@ -0,0 +1,84 @@
+import json
+import os
+import urllib.error
+import urllib.request
+import pytest
+import llm_gateway
+from mock_anthropic import cacheable_prefix, parse_distribution, wants_tool_call
+
+TOOL = {'name': 'nth_subnet', 'input': {'n': 9}}
+
+
+def post(path, payload):
+    request = urllib.request.Request(os.environ['LLM_BASE_URL'] + path, data=payload,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def message(text, **fields):
+    body = dict({'model': 'mock', 'max_tokens': 100, 'messages': [{'role': 'user', 'content': text}]}, **fields)
+    return post('/v1/messages', json.dumps(body).encode('utf-8'))
+
+
+def test_distributions():
+    assert parse_distribution('fixed:0.5')() == 0.5
+    assert 1 <= parse_distribution('uniform:1,2')() <= 2
+    assert parse_distribution('normal:0,0')() == 0
+    with pytest.raises(ValueError):
+        parse_distribution('pareto:1')
+
+
+def test_cacheable_prefix_ends_at_the_last_breakpoint():
+    body = {
+        'system': [{'type': 'text', 'text': "System", 'cache_control': {'type': 'ephemeral'}},
+                   {'type': 'text', 'text': "Context", 'cache_control': {'type': 'ephemeral'}}],
+        'messages': [{'role': 'user', 'content': [{'type': 'text', 'text': "Question"}]}]
+    }
+    assert cacheable_prefix(body) == "System\nContext"
+    assert cacheable_prefix({'system': "System", 'messages': []}) == ''
+
+
+def test_tool_call_only_when_offered_and_not_yet_answered():
+    response = {'tool': TOOL, 'text': "The 9th subnet is..."}
+    offered = {'tools': [{'name': 'nth_subnet'}], 'messages': [{'role': 'user', 'content': "9th subnet?"}]}
+    assert wants_tool_call(offered, response)
+    assert not wants_tool_call(dict(offered, tool_choice={'type': 'none'}), response)
+    assert not wants_tool_call({'messages': offered['messages']}, response)
+    answered = dict(offered, messages=offered['messages'] + [
+        {'role': 'user', 'content': [{'type': 'tool_result', 'tool_use_id': 'x', 'content': '...'}]}])
+    assert not wants_tool_call(answered, response)
+
+
+def test_matching_reply_wins_over_round_robin(mock_api):
+    mock_api([{'match': "mask", 'text': "Mask reply."}, {'text': "First."}, {'text': "Second."}])
+    assert message("what is a mask?")[1]['content'][0]['text'] == "Mask reply."
+    assert [message("hi")[1]['content'][0]['text'] for _ in range(3)] == ["First.", "Second.", "First."]
+
+
+def test_replies_honor_stop_sequences_and_max_tokens(mock_api):
+    mock_api([{'text': "One two three four five"}])
+    status, reply = message("hi", max_tokens=2)
+    assert (status, reply['content'][0]['text'], reply['stop_reason']) == (200, "One two", 'max_tokens')
+    reply = message("hi", stop_sequences=[" four"])[1]
+    assert (reply['content'][0]['text'], reply['stop_reason']) == ("One two three", 'stop_sequence')
+
+
+def test_errors_and_health(mock_api):
+    config = mock_api(rate_429=1, retry_after=3)
+    status, reply = message("hi")
+    assert (status, reply['error']['type']) == (429, 'rate_limit_error')
+    assert post('/v1/messages', b'not json')[0] == 400
+    assert post('/v1/other', b'{}')[0] == 404
+    with urllib.request.urlopen(os.environ['LLM_BASE_URL'] + '/health') as response:
+        assert json.load(response)['counts'] == config.counts == {'requests': 1, '429': 1, '529': 0, 'timeout': 0}
+
+
+def test_gateway_follows_llm_base_url(mock_api):
+    config = mock_api()
+    assert str(llm_gateway.get_client().base_url).rstrip('/') == os.environ['LLM_BASE_URL']
+    llm_gateway.complete(system="You are a tutor.", messages=[{'role': 'user', 'content': "hi"}], max_tokens=100)
+    assert config.counts['requests'] == 1
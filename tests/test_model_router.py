@@ -0,0 +1,59 @@
+import json
+import os
+import pytest
+import llm_gateway
+import model_router
+from model_router import DEFAULT_POLICY, FAST, FULL, ModelRouter
+
+TIERS = {FAST: 'small-model', FULL: 'large-model'}
+
+
+@pytest.fixture
+def policy_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_router, 'RELOAD_INTERVAL', 0)
+    return tmp_path / 'policy.json'
+
+
+def test_early_hints_go_to_the_fast_tier():
+    router = ModelRouter(TIERS, DEFAULT_POLICY)
+    assert router.route('agent1', 3) == (FAST, 'small-model')
+    assert router.route('agent2', 3) == (FULL, 'large-model')
+    assert router.route('agent2', None) == (FULL, 'large-model')
+    assert router.route('unknown', 1) == (FULL, 'large-model')
+
+
+def test_set_policy_accepts_json_levels_and_a_wildcard():
+    router = ModelRouter(TIERS, DEFAULT_POLICY)
+    router.set_policy({'*': {'1': 'fast'}}, {FULL: 'other-model'})
+    assert router.route('agent1', 1) == (FAST, 'small-model')
+    assert router.route('agent1', 2) == (FULL, 'other-model')
+    # An unknown tier name falls back to the default tier's model
+    router.set_policy({'*': {'1': 'tiny'}})
+    assert router.route('agent4', 1) == ('tiny', 'other-model')
+
+
+def test_policy_file_is_reloaded_when_it_changes(policy_file):
+    policy_file.write_text(json.dumps({'policy': {'agent3': {'4': 'fast'}}}))
+    router = ModelRouter(TIERS, DEFAULT_POLICY, path=str(policy_file))
+    assert router.route('agent3', 4) == (FAST, 'small-model')
+    policy_file.write_text(json.dumps({'tiers': {'fast': 'newer-model'}, 'policy': {'agent3': {}}}))
+    os.utime(policy_file, (1, 1))
+    assert router.route('agent3', 4) == (FULL, 'large-model')
+    assert router.snapshot()['tiers'][FAST] == 'newer-model'
+
+
+def test_broken_or_missing_policy_file_keeps_the_current_policy(policy_file):
+    policy_file.write_text("{not json")
+    router = ModelRouter(TIERS, DEFAULT_POLICY, path=str(policy_file))
+    assert router.route('agent1', 1) == (FAST, 'small-model')
+    policy_file.unlink()
+    assert router.route('agent1', 1) == (FAST, 'small-model')
+
+
+def test_gateway_sends_the_routed_model_unless_one_is_given(mock_api, monkeypatch):
+    mock_api()
+    monkeypatch.setattr(llm_gateway, 'router', ModelRouter(TIERS, DEFAULT_POLICY))
+    request = dict(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}], max_tokens=500)
+    assert llm_gateway.create_message(agent='agent1', level=1, **request).model == 'small-model'
+    assert llm_gateway.create_message(agent='agent1', level=None, **request).model == 'large-model'
+    assert llm_gateway.create_message(agent='agent1', level=1, model='pinned', **request).model == 'pinned'
@@ -0,0 +1,160 @@
+from itertools import islice
+import ipaddress
+import re
+import pytest
+import agent2_blueprint
+import agent3_blueprint
+import problem_generator
+
+# Answers as they were typed into agent2 before they were derived
+AGENT2_ANSWERS = {
+    ('222.25.12.0', 15, 14): "C 255.255.255.0 4 4 16 16 14 255.255.255.240 28 N.N.N.sssshhhh",
+    ('222.125.52.0', 4, 58): "C 255.255.255.0 2 6 4 64 62 255.255.255.192 26 N.N.N.sshhhhhh",
+    ('132.112.0.0', 120, 500): "B 255.255.0.0 7 9 128 512 510 255.255.254.0 23 N.N.sssssssh.H",
+    ('168.254.0.0', 1000, 60): "B 255.255.0.0 10 6 1024 64 62 255.255.255.192 26 N.N.ssssssss.sshhhhhh",
+    ('111.0.0.0', 1000, 16000): "A 255.0.0.0 10 14 1024 16384 16382 255.255.192.0 18 N.ssssssss.sshhhhhh.H",
+    ('10.0.0.0', 120, 131000): "A 255.0.0.0 7 17 128 131072 131070 255.254.0.0 15 N.sssssssh.H.H",
+}
+
+# Parts 9-12 as they were typed into agent3, keyed by requirements and subnet numbers
+AGENT3_RANGES = {
+    ('210.220.3.0', 3, 57, (1, 2, 3, 4)):
+        ("210.220.3.0 to 210.220.3.63", "210.220.3.64", "210.220.3.191", "210.220.3.193 to 210.220.3.254"),
+    ('196.23.45.0', 28, 6, (5, 2, 9, 11)):
+        ("196.23.45.32 to 196.23.45.39", "196.23.45.8", "196.23.45.71", "196.23.45.81 to 196.23.45.86"),
+    ('172.33.0.0', 900, 60, (4, 9, 11, 14)):
+        ("172.33.0.192 to 172.33.0.255", "172.33.2.0", "172.33.2.191", "172.33.3.65 to 172.33.3.126"),
+    ('188.16.0.0', 16, 4000, (3, 7, 10, 13)):
+        ("188.16.32.0 to 188.16.47.255", "188.16.96.0", "188.16.159.255", "188.16.192.1 to 188.16.207.254"),
+    ('112.0.0.0', 130000, 126, (7, 4, 11, 13)):
+        ("112.0.3.0 to 112.0.3.127", "112.0.1.128", "112.0.5.127", "112.0.6.1 to 112.0.6.126"),
+    ('10.0.0.0', 30, 500000, (6, 3, 10, 14)):
+        ("10.40.0.0 to 10.47.255.255", "10.16.0.0", "10.79.255.255", "10.104.0.1 to 10.111.255.254"),
+}
+
+SEEDS = range(300)
+
+
+def prefix_of(mask):
+    return sum(bin(int(octet)).count('1') for octet in mask.split('.'))
+
+
+@pytest.mark.parametrize("requirements", sorted(AGENT2_ANSWERS))
+def test_agent2_answers_match_the_hand_typed_table(requirements):
+    answers = problem_generator.agent2_answers(*requirements)
+    assert [answers[f'part{n}'] for n in range(1, 11)] == AGENT2_ANSWERS[requirements].split()
+
+
+def test_agent2_problems_are_the_hand_typed_ones():
+    assert sorted((p['network_address'], p['subnets_needed'], p['hosts_needed'])
+                  for p in agent2_blueprint.PROBLEMS.values()) == sorted(AGENT2_ANSWERS)
+
+
+def test_agent2_rejects_hosts_that_no_longer_fit():
+    with pytest.raises(ValueError):
+        problem_generator.agent2_answers('200.1.1.0', 30, 10)
+
+
+def test_agent2_practice_borrows_the_fewest_bits_and_the_hosts_fit():
+    for seed in SEEDS:
+        problem = problem_generator.agent2_practice(seed)
+        answers = problem['answers']
+        subnet_bits, host_bits = int(answers['part3']), int(answers['part4'])
+        assert 2 ** (subnet_bits - 1) < problem['subnets_needed'] <= 2 ** subnet_bits
+        assert problem['hosts_needed'] <= 2 ** host_bits - 2
+        assert subnet_bits + host_bits == {'A': 24, 'B': 16, 'C': 8}[answers['part1']]
+        assert prefix_of(answers['part8']) == int(answers['part9']) == 32 - host_bits
+        assert answers['part10'].count('s') == subnet_bits
+
+
+
+@pytest.mark.parametrize("requirements", sorted(AGENT3_RANGES))
+def test_agent3_answers_match_the_hand_typed_table(requirements):
+    answers = problem_generator.agent3_answers(*requirements)
+    assert tuple(answers[f'part{n}'] for n in range(9, 13)) == AGENT3_RANGES[requirements]
+    agent2 = problem_generator.agent2_answers(*requirements[:3])
+    assert all(answers[f'part{n}'] == agent2[f'part{n}'] for n in range(1, 9))
+
+
+def test_agent3_problems_are_the_hand_typed_ones():
+    assert sorted(agent3_blueprint.PROBLEM_REQUIREMENTS.values()) == sorted(AGENT3_RANGES)
+
+
+def test_agent3_practice_ranges_agree_with_ipaddress():
+    for seed in SEEDS:
+        problem = problem_generator.agent3_practice(seed)
+        answers = problem['answers']
+        network = ipaddress.ip_network(f"{problem['network_address']}/{prefix_of(answers['part2'])}")
+        subnets = list(islice(network.subnets(prefixlen_diff=int(answers['part3'])), 16))
+        numbers = [int(re.search(r'(\d+)(st|nd|rd|th) subnet', problem['questions'][f'q{n}']).group(1))
+                   for n in range(9, 13)]
+        n9, n10, n11, n12 = (subnets[n - 1] for n in numbers)
+        assert answers['part9'] == f"{n9.network_address} to {n9.broadcast_address}"
+        assert answers['part10'] == str(n10.network_address)
+        assert answers['part11'] == str(n11.broadcast_address)
+        assert answers['part12'] == f"{n12.network_address + 1} to {n12.broadcast_address - 1}"
+
+
+def test_practice_problems_are_rebuilt_from_their_seed():
+    assert problem_generator.agent3_practice(7) == problem_generator.agent3_practice.__wrapped__(7)
+    assert problem_generator.agent2_practice(7) == problem_generator.agent2_practice.__wrapped__(7)
+    assert problem_generator.agent3_practice(7) != problem_generator.agent3_practice(8)
+
+
+def agent1_questions(quiz_type, seeds=range(50)):
+    for seed in seeds:
+        for question in problem_generator.agent1_batch(quiz_type, seed):
+            yield question['question'].split(': ', 1)[1], question['answer']
+
+
+def first_octet_class(address):
+    first = int(address.split('.')[0])
+    return next(c for c, top in (('A', 127), ('B', 191), ('C', 223), ('D', 239), ('E', 255)) if first <= top)
+
+
+def test_agent1_binary_and_decimal_answers():
+    for text, answer in agent1_questions('binary_to_decimal'):
+        assert int(text.split(': ')[1], 2) == int(answer)
+    for text, answer in agent1_questions('decimal_to_binary'):
+        assert len(answer) == 8 and int(answer, 2) == int(text.split(': ')[1])
+
+
+def test_agent1_class_and_default_mask_answers():
+    classes = set()
+    for text, answer in agent1_questions('address_classification_identification'):
+        classes.add(answer)
+        assert answer == first_octet_class(text.split(': ')[1])
+    assert classes == set('ABCDE')
+    for text, answer in agent1_questions('identify_default_subnet_mask'):
+        address = text.split(': ')[1]
+        prefix = {'A': 8, 'B': 16, 'C': 24}[first_octet_class(address)]
+        assert answer == str(ipaddress.ip_network(f"0.0.0.0/{prefix}").netmask)
+
+
+@pytest.mark.parametrize("quiz_type, network", [('Identify_network_address_portion', True),
+                                                ('identify_host_address_portion', False)])
+def test_agent1_portion_answers(quiz_type, network):
+    for text, answer in agent1_questions(quiz_type):
+        address, mask = re.match(r"Identify \w+ portion: (\S+) with mask (\S+)", text).groups()
+        interface = ipaddress.ip_interface(f"{address}/{mask}")
+        expected = interface.network.network_address if network else \
+            ipaddress.ip_address(int(interface.ip) & int(interface.network.hostmask))
+        assert answer == str(expected)
+
+
+@pytest.mark.parametrize("quiz_type, network", [('ipv4_network_identification', True),
+                                                ('ipv4_host_identification', False)])
+def test_agent1_portion_octet_answers(quiz_type, network):
+    for text, answer in agent1_questions(quiz_type):
+        network_octets = {'A': 1, 'B': 2, 'C': 3}[first_octet_class(text.split(': ')[1])]
+        octets = range(network_octets) if network else range(network_octets, 4)
+        assert answer == problem_generator.octet_names(octets)
+    assert problem_generator.octet_names([1, 2, 3]) == "Second, Third, and Fourth octets"
+
+
+def test_agent1_questions_do_not_depend_on_the_ones_before_them():
+    for quiz_type in problem_generator.QUIZ_GENERATORS:
+        batch = problem_generator.agent1_batch(quiz_type, 5)
+        assert problem_generator.agent1_question.__wrapped__(quiz_type, 5, 7) == batch[6]
+        assert batch[6]['question'].startswith("Question 7: ")
+        assert batch != problem_generator.agent1_batch(quiz_type, 6)
@@ -0,0 +1,40 @@
+from prompt_builder import clip_student_message, estimate_tokens, fit_to_budget, level_guidance, level_hint
+
+PART = {f'hint_level_{level}': f"hint {level}" for level in range(1, 6)}
+
+
+def turns(count, size):
+    return [{"role": "user" if n % 2 == 0 else "assistant", "content": f"{n}" + "x" * size} for n in range(count)]
+
+
+def test_only_the_current_level_is_included():
+    assert level_guidance(2) == "Level 2: Conceptual guidance and methodology - still no specific numbers"
+    assert level_guidance(0).startswith("Level 1:")
+    assert level_hint(PART, 9) == "Hint level 5: hint 5"
+    assert level_hint(PART, 3) == "Hint level 3: hint 3"
+
+
+def test_long_student_messages_are_clipped():
+    assert clip_student_message("is it /25?") == "is it /25?"
+    clipped = clip_student_message("a" * 100, max_tokens=10)
+    assert clipped == "a" * 40 + " [...message shortened]"
+
+
+def test_prompt_within_budget_is_untouched():
+    messages = turns(4, 40)
+    assert fit_to_budget("system", "context", messages, budget=1000) is messages
+
+
+def test_oldest_exchanges_are_dropped_first():
+    messages = turns(7, 400)
+    fitted = fit_to_budget("system", None, messages, budget=350)
+    assert [m['content'][0] for m in fitted] == ['4', '5', '6']
+    assert fitted[0]['role'] == 'user'
+    assert len(messages) == 7
+
+
+def test_last_turn_is_clipped_when_dropping_history_is_not_enough():
+    messages = turns(1, 4000)
+    fitted = fit_to_budget("system", "context", messages, budget=500)
+    assert fitted[-1]['content'].endswith(" [...shortened]")
+    assert estimate_tokens("system") + estimate_tokens("context") + estimate_tokens(fitted[-1]['content']) <= 500
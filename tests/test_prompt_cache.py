@@ -0,0 +1,48 @@
+import pytest
+import llm_gateway
+from types import SimpleNamespace
+
+
+@pytest.fixture
+def cache_stats(monkeypatch):
+    stats = llm_gateway.PromptCacheStats()
+    monkeypatch.setattr(llm_gateway, 'prompt_cache_stats', stats)
+    return stats
+
+
+def test_system_prompt_and_context_are_cache_breakpoints():
+    assert llm_gateway._system_blocks("System", None) == [
+        {"type": "text", "text": "System", "cache_control": {"type": "ephemeral"}}]
+    blocks = llm_gateway._system_blocks("System", "Problem 1")
+    assert [b['text'] for b in blocks] == ["System", "Problem 1"]
+    assert all(b['cache_control'] == llm_gateway.CACHE_CONTROL for b in blocks)
+
+
+def test_cache_history_marks_only_the_last_turn_of_a_copy():
+    messages = [{"role": "user", "content": "first"}, {"role": "assistant", "content": "reply"},
+                {"role": "user", "content": "second"}]
+    cached = llm_gateway._cache_last_turn(messages)
+    assert cached[:2] == messages[:2]
+    assert cached[2]['content'] == [{"type": "text", "text": "second", "cache_control": {"type": "ephemeral"}}]
+    assert messages[2]['content'] == "second"
+
+
+def test_stats_count_hits_and_the_cached_token_ratio(cache_stats):
+    cache_stats.record('agent4', SimpleNamespace(input_tokens=20, cache_read_input_tokens=0,
+                                                 cache_creation_input_tokens=80))
+    cache_stats.record('agent4', SimpleNamespace(input_tokens=20, cache_read_input_tokens=80,
+                                                 cache_creation_input_tokens=0))
+    assert cache_stats.snapshot()['agent4'] == {
+        'requests': 2, 'cache_hits': 1, 'cache_read_tokens': 80, 'cache_write_tokens': 80,
+        'uncached_input_tokens': 40, 'cached_token_ratio': 0.4}
+
+
+def test_students_on_the_same_part_share_the_cached_prefix(mock_api, cache_stats):
+    mock_api()
+    for question in ("Why /25?", "What is a block size?"):
+        llm_gateway.complete(system="You are a tutor. " * 50, context="Part 1 of problem 1. " * 50,
+                             messages=[{"role": "user", "content": question}], max_tokens=500, agent='agent4')
+    stats = cache_stats.snapshot()['agent4']
+    assert stats['requests'] == 2
+    assert stats['cache_hits'] == 1
+    assert stats['cache_read_tokens'] == stats['cache_write_tokens'] > 0
@@ -0,0 +1,56 @@
+import llm_gateway
+import reply_budget
+from reply_budget import _parse_overrides, for_level, trim_to_sentence, with_length_instruction
+from subnet_calc import subnet_tools
+
+REQUEST = dict(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}], max_tokens=2000)
+
+
+def test_budgets_grow_with_the_hint_level():
+    budgets = [for_level(level)[0] for level in range(1, 6)]
+    assert budgets == sorted(budgets)
+    assert for_level(None) == for_level(9) == reply_budget.BUDGETS[None]
+
+
+def test_budget_overrides():
+    assert _parse_overrides("1=150, free=600,,") == {1: 150, None: 600}
+
+
+def test_length_instruction_goes_on_a_copy_of_the_last_turn():
+    messages = [{"role": "user", "content": "first"}, {"role": "user", "content": [{"type": "text", "text": "x"}]}]
+    result = with_length_instruction(messages, "Be brief.")
+    assert result[0] is messages[0]
+    assert result[1]['content'][-1] == {"type": "text", "text": "Be brief."}
+    assert len(messages[1]['content']) == 1
+    assert with_length_instruction([{"role": "user", "content": "hi"}], "Be brief.")[0]['content'] == "hi\n\nBe brief."
+
+
+def test_cut_off_replies_end_at_the_last_full_sentence():
+    assert trim_to_sentence("Start with 128. Then add 64. Then ad") == "Start with 128. Then add 64."
+    # Cutting would lose most of the reply, so it is kept as is
+    assert trim_to_sentence("Short. Then a very long unfinished thought that goes on") == (
+        "Short. Then a very long unfinished thought that goes on")
+
+
+def test_level_budget_caps_max_tokens_and_tool_rounds_get_the_reserve():
+    params = llm_gateway._request_params(model='m', context=None, cache_history=False, level=1, agent='agent1',
+                                         tools=None, **REQUEST)
+    assert params['max_tokens'] == for_level(1)[0]
+    assert params['messages'][-1]['content'].endswith(for_level(1)[1])
+    assert llm_gateway._round_params(params) is params
+    with_tools = llm_gateway._request_params(model='m', context=None, cache_history=False, level=1,
+                                             agent='agent1', tools=subnet_tools, **REQUEST)
+    assert llm_gateway._round_params(with_tools)['max_tokens'] == for_level(1)[0] + reply_budget.TOOL_ROUND_RESERVE
+    last_round = dict(with_tools, tool_choice={'type': 'none'})
+    assert llm_gateway._round_params(last_round)['max_tokens'] == for_level(1)[0]
+
+
+def test_replies_over_budget_are_trimmed_and_stop_before_a_student_turn(mock_api):
+    mock_api([{'match': "long", 'text': "Use the matrix. " * 150},
+              {'match': "role", 'text': "Try 128.\nStudent: is it 64?"}])
+    reply = llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": "long"}],
+                                 max_tokens=2000, level=1)
+    assert reply.endswith("Use the matrix.")
+    assert len(reply.split()) <= for_level(1)[0]
+    assert llm_gateway.complete(system="You are a tutor.", messages=[{"role": "user", "content": "role"}],
+                                max_tokens=2000) == "Try 128."
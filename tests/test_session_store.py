@@ -0,0 +1,92 @@
+from flask import Flask, jsonify, session
+import pytest
+from session_store import (MemorySessionBackend, SQLiteSessionBackend, ServerSideSessionInterface,
+                           create_session_interface, persist_session)
+
+
+def make_app(backend):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(backend)
+
+    @app.route('/count')
+    def count():
+        session['count'] = session.get('count', 0) + 1
+        return jsonify(count=session['count'])
+
+    @app.route('/later')
+    def later():
+        # A change made after Flask has saved the session, as a stream would
+        session['count'] = 100
+        persist_session()
+        return ''
+
+    @app.route('/reset')
+    def reset():
+        session.clear()
+        return ''
+
+    return app
+
+
+def test_memory_backend_evicts_the_least_recently_used_and_expires():
+    backend = MemorySessionBackend(ttl=60, max_entries=2)
+    backend.set('a', 'A')
+    backend.set('b', 'B')
+    assert backend.get('a') == 'A'
+    backend.set('c', 'C')
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == ('A', 'C')
+    expired = MemorySessionBackend(ttl=0, max_entries=2)
+    expired.set('a', 'A')
+    assert expired.get('a') is None
+
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    SQLiteSessionBackend(path, ttl=60).set('a', 'A')
+    other = SQLiteSessionBackend(path, ttl=60)
+    assert other.get('a') == 'A'
+    other.delete('a')
+    assert other.get('a') is None
+    expired = SQLiteSessionBackend(path, ttl=-1)
+    expired.set('b', 'B')
+    assert expired.get('b') is None
+
+
+@pytest.mark.parametrize("backend", ['memory', 'sqlite'])
+def test_cookie_carries_only_the_session_id(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv('SESSION_BACKEND', backend)
+    monkeypatch.setenv('SESSION_SQLITE_PATH', str(tmp_path / 'sessions.sqlite3'))
+    app = make_app(None)
+    app.session_interface = create_session_interface()
+    client = app.test_client()
+    assert client.get('/count').get_json() == {'count': 1}
+    assert client.get('/count').get_json() == {'count': 2}
+    sid = client.get_cookie('session').value
+    assert 'count' not in sid
+    assert app.session_interface.backend.get(sid) is not None
+
+
+def test_persist_session_saves_changes_immediately():
+    backend = MemorySessionBackend(ttl=60, max_entries=10)
+    client = make_app(backend).test_client()
+    client.get('/count')
+    client.get('/later')
+    assert client.get('/count').get_json() == {'count': 101}
+
+
+def test_cleared_session_is_deleted_with_its_cookie():
+    backend = MemorySessionBackend(ttl=60, max_entries=10)
+    client = make_app(backend).test_client()
+    client.get('/count')
+    sid = client.get_cookie('session').value
+    client.get('/reset')
+    assert backend.get(sid) is None
+    assert client.get_cookie('session') is None
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv('SESSION_BACKEND', 'redis')
+    with pytest.raises(ValueError):
+        create_session_interface()
@@ -0,0 +1,121 @@
+from flask import Blueprint, Flask, jsonify, session
+import threading
+import time
+import pytest
+import single_flight
+from session_store import MemorySessionBackend, ServerSideSessionInterface
+from single_flight import ChatGuard, SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return 'hint'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('key', slow)))
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=lambda: results.append(flights.do('key', slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.02)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(1)
+    assert results == ['hint'] * 4
+    assert len(calls) == 1
+    assert flights.stats()['coalesced'] == 3
+    assert flights.stats()['in_flight'] == 0
+
+
+def test_single_flight_shares_errors_and_then_retries():
+    flights = SingleFlight()
+
+    def failing():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        flights.do('key', failing)
+    assert flights.do('key', lambda: 'ok') == 'ok'
+    assert flights.stats()['calls'] == 2
+
+
+def test_streams_are_read_once_and_replayed_to_every_waiter():
+    flights = SingleFlight()
+    release = threading.Event()
+    reads = []
+
+    def upstream():
+        reads.append(1)
+        yield "Try "
+        release.wait(1)
+        yield "128."
+
+    first = flights.stream('key', upstream)
+    assert next(first) == "Try "
+    second = flights.stream('key', upstream)
+    assert next(second) == "Try "
+    release.set()
+    assert list(first) == ["128."]
+    assert list(second) == ["128."]
+    assert len(reads) == 1
+    assert flights.stats()['coalesced'] == 1
+
+
+def test_stream_errors_reach_every_waiter_after_the_sent_chunks():
+    flights = SingleFlight()
+
+    def upstream():
+        yield "Try "
+        raise RuntimeError('upstream down')
+
+    chunks = []
+    with pytest.raises(RuntimeError):
+        for chunk in flights.stream('key', upstream):
+            chunks.append(chunk)
+    assert chunks == ["Try "]
+    assert flights.stats()['in_flight'] == 0
+
+
+def test_chat_guard_admits_one_request_per_key():
+    guard = ChatGuard()
+    assert guard.enter(('agent1', 'sid'))
+    assert not guard.enter(('agent1', 'sid'))
+    assert guard.enter(('agent2', 'sid'))
+    guard.leave(('agent1', 'sid'))
+    assert guard.enter(('agent1', 'sid'))
+    assert guard.rejected == 1
+
+
+def test_second_chat_from_the_same_student_gets_a_409(monkeypatch):
+    guard = ChatGuard()
+    monkeypatch.setattr(single_flight, 'chat_guard', guard)
+    bp = Blueprint('tutor', __name__)
+
+    @bp.route('/chat', methods=['POST'])
+    @single_flight.one_chat_at_a_time
+    def chat():
+        session['seen'] = True
+        return jsonify({'response': "ok"})
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(MemorySessionBackend(ttl=60, max_entries=10))
+    app.register_blueprint(bp)
+    client = app.test_client()
+    assert client.post('/chat').status_code == 200
+    assert client.post('/chat').status_code == 200
+    # As if the student's first request were still running
+    guard.enter(('tutor', client.get_cookie('session').value))
+    busy = client.post('/chat')
+    assert busy.status_code == 409
+    assert busy.get_json()['busy']
+    assert app.test_client().post('/chat').status_code == 200
@@ -0,0 +1,78 @@
+import json
+from flask import Flask
+import pytest
+import agent1_blueprint
+import hint_cache
+import llm_gateway
+from streaming import sse_event, sse_response, wants_stream
+
+QUESTION = {"question": "Question 1: Convert Binary to Decimal: 01011000", "answer": "88", "number": 1}
+
+
+def events(body):
+    """(event, data) pairs of an SSE body"""
+    result = []
+    for block in body.strip().split('\n\n'):
+        name, data = block.split('\n')
+        result.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return result
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(hint_cache, 'hint_cache', hint_cache.HintCache(16, 60))
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(agent1_blueprint.agent1_bp, url_prefix='/agent1')
+    return app
+
+
+def test_sse_event_format():
+    assert sse_event('delta', {'text': 'hi'}) == 'event: delta\ndata: {"text": "hi"}\n\n'
+
+
+def test_wants_stream_from_body_or_accept_header(app):
+    with app.test_request_context('/', headers={'Accept': 'text/event-stream'}):
+        assert wants_stream({})
+    with app.test_request_context('/'):
+        assert wants_stream({'stream': True})
+        assert not wants_stream({'message': 'hi'})
+
+
+def test_sse_response_sends_meta_deltas_and_done(app):
+    with app.test_request_context('/'):
+        response = sse_response({'attempt': 1}, iter(["Hel", "lo"]), on_complete=lambda text: {'length': len(text)})
+        body = ''.join(response.response)
+    assert response.mimetype == 'text/event-stream'
+    assert events(body) == [('meta', {'attempt': 1}), ('delta', {'text': 'Hel'}), ('delta', {'text': 'lo'}),
+                            ('done', {'attempt': 1, 'response': 'Hello', 'length': 5})]
+
+
+def test_sse_response_reports_a_failure_as_an_error_event(app):
+    def failing():
+        yield "partial"
+        raise RuntimeError("down")
+
+    with app.test_request_context('/'):
+        body = ''.join(sse_response({'attempt': 2}, failing(), on_error=lambda e: "Try again").response)
+    assert events(body)[-1] == ('error', {'attempt': 2, 'response': "Try again"})
+
+
+def test_gateway_stream_yields_text_as_it_arrives(mock_api):
+    mock_api([{'text': "Start with the Powers of 2 Matrix."}])
+    chunks = list(llm_gateway.stream(system="You are a tutor.", messages=[{"role": "user", "content": "hi"}],
+                                     max_tokens=500, agent='agent1'))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == "Start with the Powers of 2 Matrix."
+
+
+def test_chat_streams_a_hint(app, mock_api):
+    mock_api([{'text': "Line the bits up under 128 | 64 | 32 | 16 | 8 | 4 | 2 | 1."}])
+    response = app.test_client().post('/agent1/chat', json={
+        'message': '89', 'question': QUESTION, 'attempt': 0, 'stream': True})
+    assert response.mimetype == 'text/event-stream'
+    received = events(response.get_data(as_text=True))
+    assert received[0] == ('meta', {'is_correct': False, 'attempt': 1})
+    assert [name for name, _ in received[1:-1]] == ['delta'] * (len(received) - 2)
+    assert received[-1][0] == 'done'
+    assert received[-1][1]['response'] == "Line the bits up under 128 | 64 | 32 | 16 | 8 | 4 | 2 | 1."
@@ -0,0 +1,86 @@
+from flask import Flask, g
+import json
+import logging
+import queue
+import structured_logging
+from structured_logging import DroppingQueueHandler, JsonFormatter, RequestIdFilter, _parse_levels, log_payload
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord('agent1_blueprint', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_carry_the_message_and_extra_fields():
+    entry = json.loads(JsonFormatter().format(make_record("Hint %s served", 3, request_id='abc', level_used=3)))
+    assert entry['msg'] == "Hint 3 served"
+    assert (entry['level'], entry['logger']) == ('INFO', 'agent1_blueprint')
+    assert (entry['request_id'], entry['level_used']) == ('abc', 3)
+    assert entry['ts'].endswith('Z')
+    assert 'args' not in entry
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    for n in range(3):
+        handler.handle(make_record(f"line {n}"))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().getMessage() == "line 0"
+
+
+def test_per_module_levels():
+    assert _parse_levels("agent3_blueprint=debug, werkzeug=WARNING,,broken") == {
+        'agent3_blueprint': 'DEBUG', 'werkzeug': 'WARNING'}
+    assert _parse_levels('') == {}
+
+
+def test_request_ids_are_stamped_and_echoed(monkeypatch):
+    # A handler is already installed, so only the request hooks are added
+    monkeypatch.setattr(structured_logging, '_handler', DroppingQueueHandler(queue.Queue(1)))
+    app = Flask(__name__)
+    structured_logging.configure_logging(app)
+    stamped = []
+
+    @app.route('/')
+    def index():
+        record = make_record("hi")
+        RequestIdFilter().filter(record)
+        stamped.append(record.request_id)
+        return 'ok'
+
+    client = app.test_client()
+    assert client.get('/', headers={'X-Request-ID': 'req-1'}).headers['X-Request-ID'] == 'req-1'
+    generated = client.get('/').headers['X-Request-ID']
+    assert stamped == ['req-1', generated]
+    assert len(generated) == 16
+
+
+def test_payloads_are_logged_only_for_sampled_requests(monkeypatch):
+    monkeypatch.setattr(structured_logging, 'PAYLOAD_MAX_CHARS', 10)
+    log = logging.getLogger('test_payloads')
+    handler = ListHandler()
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    app = Flask(__name__)
+    try:
+        log_payload(log, "outside a request", {'a': 1})
+        with app.test_request_context():
+            g.log_payload = False
+            log_payload(log, "not sampled", {'a': 1})
+            g.log_payload = True
+            log_payload(log, "sampled", "x" * 25)
+    finally:
+        log.removeHandler(handler)
+    record, = handler.records
+    assert record.getMessage() == "sampled"
+    assert record.payload == "x" * 10 + "... (25 chars)"
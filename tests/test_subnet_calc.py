@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+import json
+import pytest
+import llm_gateway
+import subnet_calc
+
+
+def test_subnet_info_describes_an_address():
+    info = subnet_calc.subnet_info('196.23.45.77', prefix=29)
+    assert (info['network'], info['broadcast'], info['first_host'], info['last_host']) == \
+        ('196.23.45.72', '196.23.45.79', '196.23.45.73', '196.23.45.78')
+    assert (info['mask'], info['block_size'], info['usable_hosts'], info['address_class']) == \
+        ('255.255.255.248', 8, 6, 'C')
+    assert subnet_calc.subnet_info('172.33.9.1', mask='255.255.252.0')['cidr'] == '172.33.8.0/22'
+    assert subnet_calc.subnet_info('10.1.2.3')['cidr'] == '10.0.0.0/8'
+
+
+def test_nth_and_containing_subnet_count_subnet_zero_as_one():
+    ninth = subnet_calc.nth_subnet('172.33.0.0', 10, 9)
+    assert (ninth['network'], ninth['broadcast']) == ('172.33.2.0', '172.33.2.63')
+    assert subnet_calc.containing_subnet('172.33.0.0', 10, '172.33.2.60')['n'] == 9
+
+
+def tool_use(name, **arguments):
+    return SimpleNamespace(id='toolu_1', name=name, input=arguments)
+
+
+def test_tool_results_are_json_and_mistakes_are_reported_to_the_model():
+    result = subnet_calc.subnet_tools.run(tool_use('nth_subnet', network='172.33.0.0', subnet_bits=10, n=9))
+    assert (result['tool_use_id'], result['is_error']) == ('toolu_1', False)
+    assert json.loads(result['content'])['network'] == '172.33.2.0'
+    assert subnet_calc.subnet_tools.run(tool_use('ping'))['content'] == "Unknown tool ping"
+    for bad in (tool_use('nth_subnet', network='300.1.1.1', subnet_bits=2, n=1),
+                tool_use('subnet_info', address='10.0.0.1', colour='red')):
+        assert subnet_calc.subnet_tools.run(bad)['is_error']
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_gateway_answers_tool_calls_before_the_reply(mock_api, streamed):
+    config = mock_api([{'match': "9th", 'text': "It starts at 172.33.2.0.",
+                        'tool': {'name': 'nth_subnet', 'input': {'network': '172.33.0.0', 'subnet_bits': 10, 'n': 9}}}])
+    request = dict(system="You are a tutor.", messages=[{"role": "user", "content": "Where is the 9th subnet?"}],
+                   max_tokens=500, tools=subnet_calc.subnet_tools)
+    if streamed:
+        reply = ''.join(llm_gateway.stream(**request))
+    else:
+        reply = llm_gateway.complete(**request)
+    assert reply == "It starts at 172.33.2.0."
+    assert config.counts['requests'] == 2
+
+
+def test_subnet_plan_from_subnets_or_hosts():
+    by_subnets = subnet_calc.subnet_plan('168.254.0.0', subnets=1000)
+    assert (by_subnets['subnet_bits'], by_subnets['host_bits'], by_subnets['custom_mask']) == (10, 6, '255.255.255.192')
+    by_hosts = subnet_calc.subnet_plan('222.125.52.0', hosts=58)
+    assert (by_hosts['subnet_bits'], by_hosts['prefix'], by_hosts['address_map']) == (2, 26, 'N.N.N.sshhhhhh')
+    assert not subnet_calc.subnet_plan('200.1.1.0', subnets=30, hosts=10)['hosts_fit']
+    with pytest.raises(ValueError):
+        subnet_calc.subnet_plan('200.1.1.0', subnets=100)
+    with pytest.raises(ValueError):
+        subnet_calc.subnet_plan('200.1.1.0')
+
+
+@pytest.mark.parametrize("base, bits, letters", [(24, 4, 'N.N.N.sssshhhh'), (16, 7, 'N.N.sssssssh.H'),
+                                                 (8, 16, 'N.ssssssss.ssssssss.H'), (16, 0, 'N.N.H.H')])
+def test_address_map(base, bits, letters):
+    assert subnet_calc.address_map(base, bits) == letters
@@ -0,0 +1,38 @@
+import ipaddress
+import pytest
+import subnet_calc
+
+
+def test_subnet_ranges_finds_subnets_without_listing_them():
+    ranges = subnet_calc.SubnetRanges('10.0.0.0', 14)
+    assert ranges.count == 16384
+    assert subnet_calc.format_address(ranges.subnet_id(1)) == '10.0.0.0'
+    assert subnet_calc.format_address(ranges.subnet_id(2)) == '10.0.4.0'
+    assert ranges.subnet_range(16384) == ('10.255.252.0', '10.255.255.255')
+    assert ranges.usable_range(2) == ('10.0.4.1', '10.0.7.254')
+    assert subnet_calc.format_address(ranges.broadcast(3)) == '10.0.11.255'
+    assert ranges.containing('10.0.9.200') == 3
+    assert ranges.describe(3)['n'] == 3
+
+
+def test_subnet_ranges_rejects_out_of_range_queries():
+    ranges = subnet_calc.SubnetRanges('192.168.1.0', 2)
+    with pytest.raises(ValueError):
+        ranges.subnet_id(5)
+    with pytest.raises(ValueError):
+        ranges.containing('192.168.2.1')
+    with pytest.raises(ValueError):
+        subnet_calc.SubnetRanges('192.168.1.0', 7)
+
+
+@pytest.mark.parametrize("network, bits", [('196.23.45.0', 5), ('172.33.0.0', 10), ('112.0.0.0', 17),
+                                           ('10.0.0.0', 5)])
+def test_subnet_ranges_agree_with_ipaddress(network, bits):
+    ranges = subnet_calc.SubnetRanges(network, bits)
+    subnets = ipaddress.ip_network(f"{network}/{ranges.base_prefix}").subnets(prefixlen_diff=bits)
+    for n, subnet in zip(range(1, 41), subnets):
+        assert ranges.subnet_range(n) == (str(subnet.network_address), str(subnet.broadcast_address))
+        assert ranges.usable_range(n) == (str(subnet.network_address + 1), str(subnet.broadcast_address - 1))
+        assert ranges.containing(str(subnet.network_address + 1)) == n
+    last = ipaddress.ip_network(f"{network}/{ranges.base_prefix}").broadcast_address
+    assert ranges.subnet_range(ranges.count)[1] == str(last)
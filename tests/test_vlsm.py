@@ -0,0 +1,107 @@
+import ipaddress
+import random
+import time
+import pytest
+import problem_generator
+import subnet_calc
+from agent4_blueprint import PROBLEMS
+
+
+@pytest.mark.parametrize("number", sorted(PROBLEMS))
+def test_vlsm_allocate_matches_agent4_problems(number):
+    problem = PROBLEMS[number]
+    parts = [problem['parts'][n] for n in sorted(problem['parts'])]
+    requirements = [{'name': part['subnet'], 'hosts': part['hosts_needed']} for part in parts]
+    plan = subnet_calc.vlsm_allocate(problem['network'], requirements)
+    assert [a['cidr'] for a in plan['allocations']] == [part['answer'] for part in parts]
+    assert [a['name'] for a in plan['allocations']] == [part['subnet'] for part in parts]
+
+
+def test_vlsm_allocate_places_largest_first_and_reports_free_space():
+    plan = subnet_calc.vlsm_allocate('192.168.1.0/24', [
+        {'name': 'WAN', 'hosts': 2},
+        {'name': 'Office', 'hosts': 50},
+    ])
+    office, wan = plan['allocations']
+    assert (office['name'], office['cidr'], office['mask'], office['broadcast']) == \
+        ('Office', '192.168.1.0/26', '255.255.255.192', '192.168.1.63')
+    assert (wan['name'], wan['cidr'], wan['usable_hosts']) == ('WAN', '192.168.1.64/30', 2)
+    assert plan['free_blocks'] == ['192.168.1.68/30', '192.168.1.72/29', '192.168.1.80/28', '192.168.1.96/27',
+                                   '192.168.1.128/25']
+    assert plan['addresses_used'] == 68
+    assert plan['addresses_free'] == 188
+    assert plan['utilization'] == round(68 / 256, 4)
+
+
+def test_vlsm_allocate_uses_classful_default_without_prefix():
+    plan = subnet_calc.vlsm_allocate('172.16.5.9', [{'name': 'LAN', 'hosts': 1000}])
+    assert plan['network'] == '172.16.0.0/16'
+    assert plan['allocations'][0]['cidr'] == '172.16.0.0/22'
+
+
+def test_vlsm_allocate_rejects_requirements_that_do_not_fit():
+    with pytest.raises(ValueError, match="Big does not fit"):
+        subnet_calc.vlsm_allocate('10.0.0.0/28', [{'name': 'Big', 'hosts': 20}])
+
+
+def test_vlsm_allocator_splits_the_lowest_free_block():
+    allocator = subnet_calc.VlsmAllocator(subnet_calc.parse_address('10.0.0.0'), 24)
+    assert subnet_calc.format_address(allocator.allocate(30)) == '10.0.0.0'
+    assert subnet_calc.format_address(allocator.allocate(26)) == '10.0.0.64'
+    assert subnet_calc.format_address(allocator.allocate(30)) == '10.0.0.4'
+    assert allocator.utilization() == 72 / 256
+
+
+@pytest.mark.parametrize("hosts, prefix", [(1, 30), (2, 30), (3, 29), (6, 29), (14, 28), (100, 25), (126, 25),
+                                           (127, 24)])
+def test_host_prefix(hosts, prefix):
+    assert subnet_calc.host_prefix(hosts) == prefix
+
+
+def random_requirements(count, seed=1):
+    rng = random.Random(seed)
+    return [{'name': f"LAN {n}", 'hosts': rng.randint(1, 1000)} for n in range(count)]
+
+
+def test_vlsm_blocks_are_aligned_disjoint_and_cover_the_network_with_the_free_blocks():
+    plan = subnet_calc.vlsm_allocate('10.0.0.0/8', random_requirements(300))
+    blocks = [ipaddress.ip_network(a['cidr']) for a in plan['allocations']]
+    blocks += [ipaddress.ip_network(cidr) for cidr in plan['free_blocks']]
+    blocks.sort()
+    assert sum(block.num_addresses for block in blocks) == 2 ** 24
+    for block, following in zip(blocks, blocks[1:]):
+        assert block.broadcast_address + 1 == following.network_address
+    for allocation in plan['allocations']:
+        assert allocation['usable_hosts'] >= allocation['hosts_needed']
+
+
+def best_time(requirements, runs=5):
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        subnet_calc.vlsm_allocate('10.0.0.0/8', requirements)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_vlsm_allocate_takes_about_a_millisecond_and_scales_as_n_log_n():
+    small, large = random_requirements(300), random_requirements(3000)
+    # About 1 ms on a laptop; the bound leaves room for slow CI machines
+    assert best_time(small) < 0.02
+    # Ten times the subnets: n log n is about 13x, quadratic would be 100x
+    assert best_time(large) / best_time(small) < 40
+
+
+def test_generated_vlsm_practice_scenarios():
+    for seed in range(100):
+        problem = problem_generator.agent4_practice(seed)
+        network = ipaddress.ip_network(f"{problem['network']}/{16 if problem['network_class'] == 'B' else 24}")
+        parts = [problem['parts'][n] for n in sorted(problem['parts'])]
+        assert parts[-1]['hosts_needed'] == 2
+        assert [p['hosts_needed'] for p in parts] == sorted((p['hosts_needed'] for p in parts), reverse=True)
+        for part in parts:
+            subnet = ipaddress.ip_network(part['answer'])
+            assert subnet.subnet_of(network)
+            assert part['hosts_needed'] <= subnet.num_addresses - 2
+            assert all(part[f'hint_level_{level}'] for level in range(1, 6))
+        assert problem_generator.agent4_practice.__wrapped__(seed) == problem